@@ -0,0 +1,225 @@
+"""
+Vazão, latência (p50/p95/p99) e alocações por requisição de GET /auth, POST /auth e
+POST /auth/batch rodando o source.main.app de verdade (middlewares, dependências, use cases e
+serialização) pelo transporte ASGI do httpx, sem rede nem uvicorn.
+
+O repositório é plugável: "memory" (padrão, com latência simulada), "dynamodb"
+(AsyncDatabaseRepository contra o dynamodb-local) ou "modulo:fabrica" para qualquer
+objeto com find_user_by_tax_id, find_users_by_tax_ids e create_user. Na rota "batch",
+cada requisição leva --batch-size CPFs e o relatório traz também tokens por segundo,
+para comparar com o GET /auth de um CPF por vez. O JSON de saída é a linha de base para
+comparar mudanças de desempenho (--output grava em arquivo).
+
+    python -m benchmarks.asgi_routes --requests 2000 --concurrency 32
+    python -m benchmarks.asgi_routes --routes get --repository dynamodb --output baseline.json
+    python -m benchmarks.asgi_routes --routes get batch --batch-size 50 --requests 200
+"""
+import argparse
+import asyncio
+import gc
+import importlib
+import itertools
+import platform
+import sys
+import time
+import tracemalloc
+import uuid
+
+import orjson
+from httpx import ASGITransport, AsyncClient
+
+from benchmarks.common import (
+    DEFAULT_ENDPOINT_URL,
+    configure_local_credentials,
+    ensure_users_table,
+    generate_rsa_private_key,
+    summarize_latencies,
+)
+from benchmarks.fakes import InMemoryUserRepository
+from source.configs.services import Services
+from source.configs.settings import Settings
+from source.depends.app import get_services, get_settings
+from source.helpers.jwt import SIGNING_EXECUTORS, JwtSignatureProvider
+from source.helpers.repository import AsyncDatabaseRepository
+from source.main import app
+from source.models.user import User
+
+ROUTES = ("get", "post", "batch")
+
+
+async def new_repository(args):
+    if args.repository == "memory":
+        return InMemoryUserRepository(latency=args.repository_latency)
+    if args.repository == "dynamodb":
+        configure_local_credentials()
+        repository = AsyncDatabaseRepository(table_name=args.table_name, endpoint_url=args.endpoint_url)
+        await ensure_users_table(repository)
+        await repository.open()
+        return repository
+    module_name, _, factory = args.repository.partition(":")
+    return getattr(importlib.import_module(module_name), factory)()
+
+
+async def seed(repository, count: int) -> list:
+    # prefixo por execução: rodadas repetidas contra o dynamodb-local não colidem nos CPFs
+    prefix = uuid.uuid4().hex[:3]
+    tax_ids = [f"{prefix}{index:08d}" for index in range(count)]
+    for tax_id in tax_ids:
+        user = User.create_costumer(tax_id=tax_id, email=f"{tax_id}@bench.local", name="Bench User")
+        await repository.create_user(user.model_dump())
+    return tax_ids
+
+
+def get_request(tax_ids: list):
+    cycle = itertools.cycle(tax_ids)
+    return lambda client: client.get("/auth", params={"tax_id": next(cycle)})
+
+
+def batch_request(tax_ids: list, batch_size: int):
+    cycle = itertools.cycle(tax_ids)
+    return lambda client: client.post("/auth/batch", json={"tax_ids": [next(cycle) for _ in range(batch_size)]})
+
+
+def post_request():
+    def send(client):
+        tax_id = str(uuid.uuid4().int)[:11]
+        return client.post("/auth", json={"tax_id": tax_id, "email": f"{tax_id}@bench.local", "name": "Bench User"})
+    return send
+
+
+async def measure(client: AsyncClient, send, expected_status: int, requests: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await send(client)
+            latencies.append(time.perf_counter() - started)
+            errors += response.status_code != expected_status
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    wall = time.perf_counter() - started
+    return {**summarize_latencies(latencies), "requests_per_second": requests / wall, "errors": errors}
+
+
+async def measure_allocations(client: AsyncClient, send, requests: int) -> dict:
+    # Passada separada e sequencial: o tracemalloc deixa tudo várias vezes mais lento e,
+    # com concorrência, o pico de uma requisição se misturaria com o das outras.
+    gc.collect()
+    tracemalloc.start()
+    peaks = []
+    try:
+        before = tracemalloc.take_snapshot()
+        for _ in range(requests):
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            await send(client)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - baseline)
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    retained = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    return {
+        "requests": requests,
+        "peak_bytes_per_request": sum(peaks) / len(peaks) if peaks else 0.0,
+        "max_peak_bytes": max(peaks) if peaks else 0,
+        "retained_bytes_per_request": retained / requests if requests else 0.0,
+        "retained_blocks_per_request": blocks / requests if requests else 0.0,
+    }
+
+
+async def run_route(client: AsyncClient, name: str, send, expected_status: int, args) -> dict:
+    # aquecimento: pool do executor, caches do pydantic e conexões do repositório
+    await measure(client, send, expected_status, args.warmup, args.concurrency)
+    result = await measure(client, send, expected_status, args.requests, args.concurrency)
+    if args.allocation_requests > 0:
+        result["allocations"] = await measure_allocations(client, send, args.allocation_requests)
+    return result
+
+
+async def main(args):
+    repository = await new_repository(args)
+    tax_ids = await seed(repository, args.users)
+
+    services = Services()
+    services.repository = repository
+    services.jwt_signer = JwtSignatureProvider(
+        private_key=generate_rsa_private_key(args.key_size),
+        executor_type=args.signing_executor,
+        max_workers=args.max_workers,
+    )
+    settings = Settings(auth_batch_max_size=max(args.batch_size, Settings().auth_batch_max_size))
+    app.dependency_overrides[get_services] = lambda: services
+    app.dependency_overrides[get_settings] = lambda: settings
+
+    routes = {
+        "get": ("GET /auth", get_request(tax_ids), 200),
+        "post": ("POST /auth", post_request(), 201),
+        "batch": ("POST /auth/batch", batch_request(tax_ids, args.batch_size), 200),
+    }
+    results = {}
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            for route in args.routes:
+                name, send, expected_status = routes[route]
+                results[name] = await run_route(client, name, send, expected_status, args)
+                if route == "batch":
+                    results[name]["tokens_per_second"] = results[name]["requests_per_second"] * args.batch_size
+    finally:
+        app.dependency_overrides.clear()
+        services.jwt_signer.close()
+        if isinstance(repository, AsyncDatabaseRepository):
+            await repository.close()
+
+    report = {
+        "config": {
+            "python": platform.python_version(),
+            "platform": sys.platform,
+            "repository": args.repository,
+            "repository_latency": args.repository_latency if args.repository == "memory" else None,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "users": args.users,
+            "batch_size": args.batch_size,
+            "key_size": args.key_size,
+            "signing_executor": args.signing_executor,
+            "max_workers": args.max_workers,
+        },
+        "routes": results,
+    }
+    output = orjson.dumps(report, option=orjson.OPT_INDENT_2)
+    if args.output:
+        with open(args.output, "wb") as file:
+            file.write(output + b"\n")
+    print(output.decode())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--routes", nargs="+", choices=ROUTES, default=list(ROUTES))
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--allocation-requests", type=int, default=200,
+                        help="requisições sequenciais medidas com tracemalloc (0 desliga)")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=50, help="CPFs por requisição na rota batch")
+    parser.add_argument("--repository", default="memory",
+                        help='"memory", "dynamodb" ou "modulo:fabrica" de um repositório próprio')
+    parser.add_argument("--repository-latency", type=float, default=0.005,
+                        help="latência simulada do repositório em memória, em segundos")
+    parser.add_argument("--endpoint-url", default=DEFAULT_ENDPOINT_URL)
+    parser.add_argument("--table-name", default="bench-auth-service-users")
+    parser.add_argument("--key-size", type=int, default=2048)
+    parser.add_argument("--signing-executor", choices=SIGNING_EXECUTORS, default="thread")
+    parser.add_argument("--max-workers", type=int, default=1)
+    parser.add_argument("--output", help="também grava o JSON neste arquivo")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,120 @@
+"""
+Tempo até o primeiro GET /auth com sucesso a partir de um processo uvicorn novo,
+com o detalhamento do relatório de startup (import, busca do segredo, parse da
+chave e abertura do repositório).
+
+O dynamodb-local não tem Secrets Manager: aponte --secrets-endpoint-url para um
+LocalStack ou moto_server (o moto atende os dois serviços na mesma porta).
+
+    moto_server -p 8000 &
+    python -m benchmarks.cold_start --runs 5
+    python -m benchmarks.cold_start --endpoint-url http://localhost:8000 --secrets-endpoint-url http://localhost:4566
+"""
+import argparse
+import asyncio
+import os
+import re
+import subprocess
+import sys
+import time
+import uuid
+
+import aioboto3
+import httpx
+import orjson
+
+from benchmarks.common import (
+    DEFAULT_ENDPOINT_URL,
+    configure_local_credentials,
+    ensure_users_table,
+    generate_rsa_private_key,
+    summarize_latencies,
+)
+from source.helpers.repository import AsyncDatabaseRepository
+from source.models.user import User
+
+STARTUP_LINE = re.compile(r"Startup completed in ([\d.]+) ms \((.*)\)")
+
+
+async def prepare(args) -> str:
+    configure_local_credentials()
+    repository = AsyncDatabaseRepository(table_name=args.table_name, endpoint_url=args.endpoint_url)
+    await ensure_users_table(repository)
+
+    tax_id = uuid.uuid4().hex[:11]
+    user = User.create_costumer(tax_id=tax_id, email=f"{tax_id}@bench.local", name="Bench User")
+    await repository.create_user(user.model_dump())
+
+    secret = orjson.dumps({"JWT_PRIVATE_KEY": generate_rsa_private_key(args.key_size)}).decode()
+    async with aioboto3.Session().client("secretsmanager", endpoint_url=args.secrets_endpoint_url) as client:
+        try:
+            await client.create_secret(Name=args.secret_name, SecretString=secret)
+        except client.exceptions.ResourceExistsException:
+            await client.put_secret_value(SecretId=args.secret_name, SecretString=secret)
+    return tax_id
+
+
+def parse_startup_report(output: str) -> dict:
+    match = STARTUP_LINE.search(output)
+    if match is None:
+        return {}
+    steps = {}
+    for item in match.group(2).split(", "):
+        name, _, value = item.partition("=")
+        steps[name] = float(value.removesuffix("ms"))
+    return {"total_ms": float(match.group(1)), "steps_ms": steps}
+
+
+def run_once(args, tax_id: str) -> dict:
+    env = {
+        **os.environ,
+        "APPLICATION_SECRET_NAME": args.secret_name,
+        "APPLICATION_TABLE_NAME": args.table_name,
+        "DYNAMODB_ENDPOINT_URL": args.endpoint_url,
+        "AWS_ENDPOINT_URL_SECRETS_MANAGER": args.secrets_endpoint_url,
+        "JWT_KEY_REFRESH_INTERVAL_SECONDS": "0",
+    }
+    command = [sys.executable, "-m", "uvicorn", "source.main:app", "--port", str(args.port), "--log-level", "info"]
+
+    started = time.perf_counter()
+    process = subprocess.Popen(command, env=env, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, text=True)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{args.port}") as client:
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {process.returncode}: {process.stderr.read()}")
+                if time.perf_counter() - started > args.timeout:
+                    raise TimeoutError(f"No successful /auth after {args.timeout}s")
+                try:
+                    if client.get("/auth", params={"tax_id": tax_id}).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                time.sleep(args.poll_interval)
+        time_to_first_auth = time.perf_counter() - started
+    finally:
+        process.terminate()
+        _, output = process.communicate(timeout=10)
+
+    return {"time_to_first_auth_ms": time_to_first_auth * 1000, "startup": parse_startup_report(output)}
+
+
+def main(args):
+    tax_id = asyncio.run(prepare(args))
+    runs = [run_once(args, tax_id) for _ in range(args.runs)]
+    summary = summarize_latencies([run["time_to_first_auth_ms"] / 1000 for run in runs])
+    print(orjson.dumps({"time_to_first_auth": summary, "runs": runs}, option=orjson.OPT_INDENT_2).decode())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint-url", default=DEFAULT_ENDPOINT_URL)
+    parser.add_argument("--secrets-endpoint-url", default=os.getenv("SECRETS_MANAGER_ENDPOINT_URL", DEFAULT_ENDPOINT_URL))
+    parser.add_argument("--table-name", default="bench-auth-service-users")
+    parser.add_argument("--secret-name", default="bench-auth-service-secrets")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--key-size", type=int, default=2048)
+    parser.add_argument("--poll-interval", type=float, default=0.01)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    main(parser.parse_args())
@@ -0,0 +1,85 @@
+import os
+import statistics
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+from source.helpers.repository import AsyncDatabaseRepository
+
+DEFAULT_ENDPOINT_URL = os.getenv("DYNAMODB_ENDPOINT_URL", "http://localhost:8000")
+
+
+def configure_local_credentials():
+    # dynamodb-local aceita qualquer credencial, mas o botocore exige que existam
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "local")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "local")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+
+def generate_rsa_private_key(key_size: int = 2048) -> str:
+    return _to_pem(rsa.generate_private_key(public_exponent=65537, key_size=key_size))
+
+
+def generate_private_key(algorithm: str, rsa_key_size: int = 2048) -> str:
+    if algorithm in ("RS256", "PS256"):
+        return generate_rsa_private_key(rsa_key_size)
+    if algorithm == "ES256":
+        return _to_pem(ec.generate_private_key(ec.SECP256R1()))
+    if algorithm == "EdDSA":
+        return _to_pem(ed25519.Ed25519PrivateKey.generate())
+    raise ValueError(f"Unsupported algorithm '{algorithm}'")
+
+
+def _to_pem(private_key) -> str:
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    ).decode()
+
+
+def percentile(samples: list, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize_latencies(samples: list) -> dict:
+    return {
+        "count": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples) * 1000 if samples else 0.0,
+    }
+
+
+async def ensure_users_table(repository: AsyncDatabaseRepository):
+    # Mesmo schema de deploy/terraform/dynamodb.tf
+    async with repository.resource() as dynamodb:
+        client = dynamodb.meta.client
+        existing = await client.list_tables()
+        if repository.table_name in existing.get("TableNames", []):
+            return False
+
+        table = await dynamodb.create_table(
+            TableName=repository.table_name,
+            BillingMode="PAY_PER_REQUEST",
+            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+            AttributeDefinitions=[
+                {"AttributeName": "id", "AttributeType": "S"},
+                {"AttributeName": "tax_id", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    "IndexName": "TaxIDIndex",
+                    "KeySchema": [{"AttributeName": "tax_id", "KeyType": "HASH"}],
+                    "Projection": {"ProjectionType": "ALL"},
+                }
+            ],
+        )
+        await table.wait_until_exists()
+        return True
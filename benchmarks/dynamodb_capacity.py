@@ -0,0 +1,212 @@
+"""
+Capacidade do DynamoDB consumida por tipo de requisição, com o serviço rodando de
+verdade contra o dynamodb-local: semeia N usuários pelo repositório, repete uma mistura
+de logins e cadastros contra --base-url e lê de /metrics as unidades que o serviço
+recebeu em ReturnConsumedCapacity em cada chamada.
+
+O relatório traz chamadas, RCU e WCU por requisição de cada tipo, e a projeção mensal
+do PAY_PER_REQUEST em --target-rps. Uma chamada a mais por requisição aparece aqui antes
+de aparecer na fatura.
+
+    docker compose up -d dynamodb
+    DYNAMODB_ENDPOINT_URL=http://localhost:8000 DYNAMODB_RETURN_CONSUMED_CAPACITY=true \\
+        APPLICATION_TABLE_NAME=bench-auth-service-users uvicorn source.main:app --port 8080 &
+    python -m benchmarks.dynamodb_capacity --requests 2000 --mix login=80,unknown=10,register=8,duplicate=2
+
+Com --workers N, use METRICS_MULTIPROCESS_DIR e --settle-seconds acima de
+METRICS_FLUSH_INTERVAL_SECONDS, para o /metrics final incluir todos os workers.
+"""
+import argparse
+import asyncio
+import random
+import re
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+import orjson
+
+from benchmarks.common import DEFAULT_ENDPOINT_URL, configure_local_credentials, ensure_users_table, summarize_latencies
+from source.helpers.metrics import REQUEST_DYNAMODB_USAGE, DynamoDBUsage
+from source.helpers.repository import AsyncDatabaseRepository
+from source.models.user import User
+
+# tipo de requisição -> (método, rota, status esperado)
+REQUEST_TYPES = {
+    "login": ("GET", "/auth", "200"),
+    "unknown": ("GET", "/auth", "404"),
+    "register": ("POST", "/auth", "201"),
+    "duplicate": ("POST", "/auth", "409"),
+}
+SAMPLE_LINE = re.compile(r'^(\w+)\{(.*)\} ([0-9.e+-]+)$')
+LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+SECONDS_PER_MONTH = 30 * 24 * 3600
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in REQUEST_TYPES:
+            raise argparse.ArgumentTypeError(f"unknown request type '{name}', expected one of {list(REQUEST_TYPES)}")
+        mix[name] = float(weight)
+    return mix
+
+
+def parse_metrics(text: str) -> dict:
+    # {(métrica, (("label", "valor"), ...)): valor}, só com o que este benchmark usa
+    samples = {}
+    for line in text.splitlines():
+        match = SAMPLE_LINE.match(line)
+        if match is None or not match.group(1).startswith(("auth_request_dynamodb", "auth_http_responses")):
+            continue
+        labels = tuple(sorted(LABEL.findall(match.group(2))))
+        samples[(match.group(1), labels)] = float(match.group(3))
+    return samples
+
+
+def route_value(samples: dict, metric: str, method: str, route: str, status: str, **extra) -> float:
+    labels = tuple(sorted({"method": method, "route": route, "status": status, **extra}.items()))
+    return samples.get((metric, labels), 0.0)
+
+
+async def seed(repository: AsyncDatabaseRepository, count: int, concurrency: int) -> tuple[list, DynamoDBUsage]:
+    usage = DynamoDBUsage()
+    REQUEST_DYNAMODB_USAGE.set(usage)
+    prefix = uuid.uuid4().hex[:3]
+    tax_ids = [f"{prefix}{index:08d}" for index in range(count)]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def create(tax_id: str):
+        async with semaphore:
+            user = User.create_costumer(tax_id=tax_id, email=f"{tax_id}@bench.local", name="Bench User")
+            await repository.create_user(user.model_dump())
+
+    await asyncio.gather(*(create(tax_id) for tax_id in tax_ids))
+    return tax_ids, usage
+
+
+def new_tax_id() -> str:
+    return str(uuid.uuid4().int)[:11]
+
+
+async def replay(client: httpx.AsyncClient, tax_ids: list, mix: dict, requests: int, concurrency: int) -> dict:
+    names = random.choices(list(mix), weights=list(mix.values()), k=requests)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = defaultdict(list)
+    unexpected = defaultdict(int)
+
+    async def one(name: str):
+        method, _, expected = REQUEST_TYPES[name]
+        if name == "login":
+            request = client.get("/auth", params={"tax_id": random.choice(tax_ids)})
+        elif name == "unknown":
+            request = client.get("/auth", params={"tax_id": new_tax_id()})
+        else:
+            tax_id = random.choice(tax_ids) if name == "duplicate" else new_tax_id()
+            request = client.post("/auth", json={"tax_id": tax_id, "email": f"{tax_id}@bench.local", "name": "Bench"})
+        async with semaphore:
+            started = time.perf_counter()
+            response = await request
+            latencies[name].append(time.perf_counter() - started)
+            if str(response.status_code) != expected:
+                unexpected[f"{name}:{response.status_code}"] += 1
+
+    await asyncio.gather(*(one(name) for name in names))
+    return {"latencies": latencies, "unexpected": dict(unexpected)}
+
+
+def report_types(before: dict, after: dict, mix: dict, latencies: dict) -> dict:
+    result = {}
+    for name in mix:
+        method, route, status = REQUEST_TYPES[name]
+
+        def delta(metric, **extra):
+            return route_value(after, metric, method, route, status, **extra) - \
+                route_value(before, metric, method, route, status, **extra)
+
+        requests = delta("auth_http_responses_total")
+        per_request = (lambda value: value / requests) if requests else (lambda value: 0.0)
+        result[name] = {
+            "requests": int(requests),
+            "dynamodb_calls_per_request": per_request(delta("auth_request_dynamodb_calls_total")),
+            "read_units_per_request": per_request(delta("auth_request_dynamodb_capacity_units_total", capacity="read")),
+            "write_units_per_request": per_request(delta("auth_request_dynamodb_capacity_units_total", capacity="write")),
+            "latency": summarize_latencies(latencies.get(name, [])),
+        }
+    return result
+
+
+def projection(types: dict, mix: dict, args) -> dict:
+    total_weight = sum(mix.values())
+    read_units = sum(types[name]["read_units_per_request"] * weight for name, weight in mix.items()) / total_weight
+    write_units = sum(types[name]["write_units_per_request"] * weight for name, weight in mix.items()) / total_weight
+    monthly_requests = args.target_rps * SECONDS_PER_MONTH
+    return {
+        "target_rps": args.target_rps,
+        "read_units_per_request": read_units,
+        "write_units_per_request": write_units,
+        "monthly_read_units": read_units * monthly_requests,
+        "monthly_write_units": write_units * monthly_requests,
+        "monthly_cost_usd": (
+            read_units * monthly_requests / 1e6 * args.read_price_per_million
+            + write_units * monthly_requests / 1e6 * args.write_price_per_million
+        ),
+    }
+
+
+async def main(args):
+    configure_local_credentials()
+    repository = AsyncDatabaseRepository(
+        table_name=args.table_name,
+        endpoint_url=args.endpoint_url,
+        return_consumed_capacity=True,
+    )
+    await ensure_users_table(repository)
+    await repository.open()
+    try:
+        tax_ids, seed_usage = await seed(repository, args.users, args.concurrency)
+    finally:
+        await repository.close()
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30) as client:
+        before = parse_metrics((await client.get("/metrics")).text)
+        replayed = await replay(client, tax_ids, args.mix, args.requests, args.concurrency)
+        await asyncio.sleep(args.settle_seconds)
+        after = parse_metrics((await client.get("/metrics")).text)
+
+    types = report_types(before, after, args.mix, replayed["latencies"])
+    reported = any(item["read_units_per_request"] or item["write_units_per_request"] for item in types.values())
+    report = {
+        # sem DYNAMODB_RETURN_CONSUMED_CAPACITY=true no serviço, só as chamadas são contadas
+        "capacity_reported": reported,
+        "seed": {
+            "users": args.users,
+            "write_units_per_user": seed_usage.write_units / args.users if args.users else 0.0,
+            "read_units_per_user": seed_usage.read_units / args.users if args.users else 0.0,
+        },
+        "mix": args.mix,
+        "request_types": types,
+        "unexpected_statuses": replayed["unexpected"],
+        "projection": projection(types, args.mix, args),
+    }
+    print(orjson.dumps(report, option=orjson.OPT_INDENT_2).decode())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8080")
+    parser.add_argument("--endpoint-url", default=DEFAULT_ENDPOINT_URL)
+    parser.add_argument("--table-name", default="bench-auth-service-users",
+                        help="a mesma tabela do APPLICATION_TABLE_NAME do serviço")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("login=80,unknown=10,register=8,duplicate=2"))
+    parser.add_argument("--settle-seconds", type=float, default=0.0)
+    parser.add_argument("--target-rps", type=float, default=100.0)
+    # preços on-demand da us-east-1, em USD por milhão de unidades de leitura/escrita
+    parser.add_argument("--read-price-per-million", type=float, default=0.125)
+    parser.add_argument("--write-price-per-million", type=float, default=0.625)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,90 @@
+"""
+Compara o custo por requisição do resource do DynamoDB criado a cada chamada
+(comportamento anterior) com o resource único aberto no app_lifespan.
+
+    docker compose up -d dynamodb
+    python -m benchmarks.dynamodb_client_reuse --requests 2000 --concurrency 16
+
+Para cada modo imprime latência (média/p50/p95/p99) e CPU por requisição, em JSON.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import orjson
+
+from benchmarks.common import (
+    DEFAULT_ENDPOINT_URL,
+    configure_local_credentials,
+    ensure_users_table,
+    summarize_latencies,
+)
+from source.helpers.repository import AsyncDatabaseRepository
+from source.models.user import User
+
+
+async def run_mode(repository: AsyncDatabaseRepository, tax_ids: list, requests: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(index: int):
+        async with semaphore:
+            started = time.perf_counter()
+            await repository.find_user_by_tax_id(tax_ids[index % len(tax_ids)])
+            latencies.append(time.perf_counter() - started)
+
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    wall = time.perf_counter() - wall_started
+    cpu = time.process_time() - cpu_started
+
+    return {
+        **summarize_latencies(latencies),
+        "requests_per_second": requests / wall,
+        "cpu_ms_per_request": cpu / requests * 1000,
+    }
+
+
+async def main(args):
+    configure_local_credentials()
+
+    def new_repository():
+        return AsyncDatabaseRepository(
+            table_name=args.table_name,
+            endpoint_url=args.endpoint_url,
+            max_pool_connections=args.pool_size,
+        )
+
+    seed_repository = new_repository()
+    await ensure_users_table(seed_repository)
+
+    tax_ids = []
+    for _ in range(args.users):
+        tax_id = uuid.uuid4().hex[:11]
+        user = User.create_costumer(tax_id=tax_id, email=f"{tax_id}@bench.local", name="Bench User")
+        await seed_repository.create_user(user.model_dump())
+        tax_ids.append(tax_id)
+
+    per_call = await run_mode(new_repository(), tax_ids, args.requests, args.concurrency)
+
+    pooled_repository = new_repository()
+    await pooled_repository.open()
+    try:
+        pooled = await run_mode(pooled_repository, tax_ids, args.requests, args.concurrency)
+    finally:
+        await pooled_repository.close()
+
+    print(orjson.dumps({"per_call_resource": per_call, "pooled_resource": pooled}, option=orjson.OPT_INDENT_2).decode())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint-url", default=DEFAULT_ENDPOINT_URL)
+    parser.add_argument("--table-name", default="bench-auth-service-users")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--pool-size", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,47 @@
+import asyncio
+import uuid
+
+from source.helpers.repository import UserAlreadyExistsError
+from source.models.user import User
+
+
+class InMemoryUserRepository:
+    """Repositório em memória com a mesma interface do AsyncDatabaseRepository."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.users_by_tax_id: dict[str, dict] = {}
+
+    async def _wait(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        else:
+            await asyncio.sleep(0)
+
+    def seed(self, count: int) -> list:
+        tax_ids = []
+        for index in range(count):
+            tax_id = f"{index:011d}"
+            user = User.create_costumer(tax_id=tax_id, email=f"{tax_id}@bench.local", name=f"Bench User {index}")
+            self.users_by_tax_id[tax_id] = user.model_dump(mode="json")
+            tax_ids.append(tax_id)
+        return tax_ids
+
+    async def find_user_by_tax_id(self, tax_id: str):
+        await self._wait()
+        return self.users_by_tax_id.get(tax_id)
+
+    async def find_users_by_tax_ids(self, tax_ids, concurrency: int = 16) -> dict:
+        # uma única espera por lote, como um BatchGetItem
+        await self._wait()
+        return {tax_id: self.users_by_tax_id.get(tax_id) for tax_id in tax_ids}
+
+    async def create_user(self, user_data: dict):
+        await self._wait()
+        if user_data["tax_id"] in self.users_by_tax_id:
+            raise UserAlreadyExistsError(user_data["tax_id"])
+        self.users_by_tax_id[user_data["tax_id"]] = user_data
+
+
+def new_tax_id() -> str:
+    return str(uuid.uuid4().int)[:11]
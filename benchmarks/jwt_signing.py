@@ -0,0 +1,287 @@
+"""
+Matriz de custo de assinatura e verificação de JWT: algoritmo (RS256, PS256, ES256,
+EdDSA) x tamanho da chave RSA (2048, 3072, 4096) x payload x modo de execução x
+implementação.
+
+Os payloads são claims de User de verdade (as mesmas que o AuthUseCase assina, com
+iat/nbf/exp), de um nome curto a um nome longo e com acentos; esse último sai do
+caminho do orjson em encode_json e passa pelo json.dumps. Os modos são "inline" (um
+core, chamando sign()/verify() direto) e "thread:N" (sign_async()/verify_async() de um
+JwtSignatureProvider com executor_type="thread" e max_workers=N, como no serviço). As
+implementações de assinatura são o caminho rápido (JwsSigner, o que o serviço usa) e o
+jwcrypto.JWT (sign_with_jwcrypto); a verificação é sempre a do provider.
+
+O JSON vai para a saída padrão e, com --output, para um arquivo; --compare lê um
+resultado anterior e marca como regressão as células que ficaram mais lentas que
+--regression-threshold, para uma troca de chave ou de biblioteca vir com o custo medido.
+
+    python -m benchmarks.jwt_signing --iterations 2000 --output baseline.json
+    python -m benchmarks.jwt_signing --algorithms RS256 --rsa-key-sizes 2048 4096 --modes inline thread:8
+    python -m benchmarks.jwt_signing --compare baseline.json --fail-on-regression
+"""
+import argparse
+import asyncio
+import platform
+import sys
+import time
+
+import orjson
+
+from benchmarks.common import generate_private_key
+from source.helpers.jws import SIGNERS, encode_json
+from source.helpers.jwt import JwtSignatureProvider, sign_with_jwcrypto
+from source.models.user import User
+
+RSA_ALGORITHMS = ("RS256", "PS256")
+IMPLEMENTATIONS = ("fast_path", "jwcrypto")
+ISSUED_AT = 1700000000
+EXPIRES_AT = 4102444800
+
+# payload -> (nome, email) de um usuário cadastrado
+PAYLOADS = {
+    "short": ("Ana Lima", "ana@ex.io"),
+    "typical": ("Maria Aparecida dos Santos", "maria.santos@example.com.br"),
+    "accented": ("João Conceição Araújo Gonçalves", "joao.goncalves@example.com.br"),
+    "long": ("Maria " + "Aparecida Conceição dos Santos " * 4 + "Silva", "maria.aparecida." * 4 + "silva@example.com.br"),
+}
+
+
+def user_claims(payload: str) -> dict:
+    name, email = PAYLOADS[payload]
+    user = User.create_costumer(tax_id="12345678900", email=email, name=name)
+    return {
+        "sub": user.id,
+        "tax_id": user.tax_id,
+        "email": user.email,
+        "name": user.name,
+        "user_type": user.user_type.value,
+        "iat": ISSUED_AT,
+        "nbf": ISSUED_AT,
+        "exp": EXPIRES_AT,
+    }
+
+
+def parse_mode(value: str) -> int:
+    # "inline" -> 0; "thread:N" ou só N -> N threads
+    if value == "inline":
+        return 0
+    workers = int(value.removeprefix("thread:"))
+    if workers < 1:
+        raise argparse.ArgumentTypeError("thread pool size must be at least 1")
+    return workers
+
+
+def mode_name(workers: int) -> str:
+    return "inline" if workers == 0 else f"thread:{workers}"
+
+
+def measure(operation, iterations: int) -> dict:
+    for _ in range(min(50, iterations)):
+        operation()
+
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+    for _ in range(iterations):
+        operation()
+    wall = time.perf_counter() - wall_started
+    cpu = time.process_time() - cpu_started
+
+    return {
+        "iterations": iterations,
+        "per_second": iterations / wall,
+        "per_second_per_core": iterations / cpu,
+        "wall_us": wall / iterations * 1_000_000,
+    }
+
+
+async def measure_async(operation, iterations: int, workers: int) -> dict:
+    # Mantém o pool cheio com 2x max_workers em voo, como várias requisições concorrentes no serviço.
+    in_flight = asyncio.Semaphore(workers * 2)
+
+    async def one():
+        async with in_flight:
+            await operation()
+
+    await asyncio.gather(*(one() for _ in range(min(50, iterations))))
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(iterations)))
+    wall = time.perf_counter() - wall_started
+    cpu = time.process_time() - cpu_started
+
+    return {
+        "iterations": iterations,
+        "per_second": iterations / wall,
+        "per_second_per_core": iterations / cpu,
+        "wall_us": wall / iterations * 1_000_000,
+    }
+
+
+async def benchmark_cell(private_key: str, algorithm: str, claims: dict, workers: int, args) -> dict:
+    provider = JwtSignatureProvider(
+        private_key=private_key,
+        algorithm=algorithm,
+        executor_type="inline" if workers == 0 else "thread",
+        max_workers=max(workers, 1),
+    )
+    token = provider.sign(claims)
+    operations = {}
+    try:
+        for implementation in args.implementations:
+            if implementation == "fast_path" and workers == 0:
+                sign = measure(lambda: provider.sign(claims), args.iterations)
+            elif implementation == "fast_path":
+                sign = await measure_async(lambda: provider.sign_async(claims), args.iterations, workers)
+            elif workers == 0:
+                sign = measure(
+                    lambda: sign_with_jwcrypto(provider.private_key, claims, algorithm, kid=provider.kid),
+                    args.iterations,
+                )
+            else:
+                loop = asyncio.get_running_loop()
+                sign = await measure_async(
+                    lambda: loop.run_in_executor(
+                        provider.executor, sign_with_jwcrypto, provider.private_key, claims, algorithm, provider.kid
+                    ),
+                    args.iterations,
+                    workers,
+                )
+            operations[f"sign_{implementation}"] = sign
+
+        if workers == 0:
+            operations["verify"] = measure(lambda: provider.verify(token), args.iterations)
+        else:
+            operations["verify"] = await measure_async(lambda: provider.verify_async(token), args.iterations, workers)
+    finally:
+        provider.close()
+    return operations
+
+
+def key_sizes(algorithm: str, args) -> list:
+    return args.rsa_key_sizes if algorithm in RSA_ALGORITHMS else [None]
+
+
+async def run_matrix(args) -> list:
+    rows = []
+    for algorithm in args.algorithms:
+        for key_size in key_sizes(algorithm, args):
+            # uma chave por célula de algoritmo/tamanho: gerar RSA 4096 leva segundos
+            private_key = generate_private_key(algorithm, rsa_key_size=key_size or 2048)
+            for payload in args.payloads:
+                claims = user_claims(payload)
+                token_bytes = len(JwtSignatureProvider(private_key=private_key, algorithm=algorithm).sign(claims))
+                for workers in args.modes:
+                    operations = await benchmark_cell(private_key, algorithm, claims, workers, args)
+                    for operation, result in operations.items():
+                        rows.append({
+                            "algorithm": algorithm,
+                            "key_size": key_size,
+                            "payload": payload,
+                            "payload_bytes": len(encode_json(claims)),
+                            "token_bytes": token_bytes,
+                            "mode": mode_name(workers),
+                            "operation": operation,
+                            **result,
+                        })
+    return rows
+
+
+def row_key(row: dict) -> str:
+    key_size = row["key_size"] if row["key_size"] is not None else "-"
+    return f'{row["algorithm"]}/{key_size}/{row["payload"]}/{row["mode"]}/{row["operation"]}'
+
+
+def relative_to_rs256(rows: list) -> None:
+    # Capacidade de cada célula relativa ao RS256 com a menor chave, mesmo payload, modo e operação.
+    sizes = [row["key_size"] for row in rows if row["algorithm"] == "RS256"]
+    if not sizes:
+        return
+    reference = {
+        (row["payload"], row["mode"], row["operation"]): row["per_second"]
+        for row in rows
+        if row["algorithm"] == "RS256" and row["key_size"] == min(sizes)
+    }
+    for row in rows:
+        baseline = reference.get((row["payload"], row["mode"], row["operation"]))
+        if baseline:
+            row["vs_rs256"] = row["per_second"] / baseline
+
+
+def compare(rows: list, baseline: dict, threshold: float) -> dict:
+    previous = {row_key(row): row for row in baseline.get("results", [])}
+    cells = {}
+    regressions = []
+    for row in rows:
+        key = row_key(row)
+        old = previous.get(key)
+        if old is None:
+            continue
+        delta = row["per_second"] / old["per_second"] - 1
+        regression = delta < -threshold
+        cells[key] = {
+            "baseline_per_second": old["per_second"],
+            "per_second": row["per_second"],
+            "delta": delta,
+            "regression": regression,
+        }
+        if regression:
+            regressions.append(key)
+
+    current = {row_key(row) for row in rows}
+    return {
+        "threshold": threshold,
+        "baseline_config": baseline.get("config"),
+        "cells": cells,
+        "regressions": regressions,
+        "missing_in_current": sorted(set(previous) - current),
+        "new_in_current": sorted(current - set(previous)),
+    }
+
+
+async def main(args) -> int:
+    rows = await run_matrix(args)
+    relative_to_rs256(rows)
+    report = {
+        "config": {
+            "python": platform.python_version(),
+            "platform": sys.platform,
+            "machine": platform.machine(),
+            "iterations": args.iterations,
+            "algorithms": args.algorithms,
+            "rsa_key_sizes": args.rsa_key_sizes,
+            "payloads": args.payloads,
+            "modes": [mode_name(workers) for workers in args.modes],
+            "implementations": args.implementations,
+        },
+        "results": rows,
+    }
+    if args.compare:
+        with open(args.compare, "rb") as file:
+            report["comparison"] = compare(rows, orjson.loads(file.read()), args.regression_threshold)
+
+    output = orjson.dumps(report, option=orjson.OPT_INDENT_2)
+    if args.output:
+        with open(args.output, "wb") as file:
+            file.write(output + b"\n")
+    print(output.decode())
+
+    if args.fail_on_regression and report.get("comparison", {}).get("regressions"):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--algorithms", nargs="+", choices=list(SIGNERS), default=list(SIGNERS))
+    parser.add_argument("--rsa-key-sizes", nargs="+", type=int, default=[2048, 3072, 4096])
+    parser.add_argument("--payloads", nargs="+", choices=list(PAYLOADS), default=list(PAYLOADS))
+    parser.add_argument("--modes", nargs="+", type=parse_mode, default=[0, 4],
+                        help='"inline" e/ou "thread:N" (padrão: inline thread:4)')
+    parser.add_argument("--implementations", nargs="+", choices=IMPLEMENTATIONS, default=list(IMPLEMENTATIONS))
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--output", help="também grava o JSON neste arquivo")
+    parser.add_argument("--compare", help="JSON de uma execução anterior (--output) para comparar")
+    parser.add_argument("--regression-threshold", type=float, default=0.10,
+                        help="queda relativa de per_second que conta como regressão (padrão: 0.10)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="sai com código 1 se houver regressão")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,82 @@
+"""
+Vazão e latência de GET /auth concorrente para cada modo de assinatura
+(inline, thread, process), com repositório em memória.
+
+Para reproduzir as tasks de 0.25 vCPU do ECS, rode dentro de um container limitado:
+
+    docker run --rm --cpus=0.25 -v $PWD:/app -w /app python:3.13-slim \\
+        sh -c "pip install -q . httpx && python -m benchmarks.signing_executor"
+"""
+import argparse
+import asyncio
+import time
+
+import orjson
+from httpx import ASGITransport, AsyncClient
+
+from benchmarks.common import generate_rsa_private_key, summarize_latencies
+from benchmarks.fakes import InMemoryUserRepository
+from source.configs.services import Services
+from source.depends.app import get_services
+from source.helpers.jwt import SIGNING_EXECUTORS, JwtSignatureProvider
+from source.main import app
+
+
+async def run_mode(services: Services, tax_ids: list, requests: int, concurrency: int) -> dict:
+    app.dependency_overrides[get_services] = lambda: services
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        async def one(index: int):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get("/auth", params={"tax_id": tax_ids[index % len(tax_ids)]})
+                latencies.append(time.perf_counter() - started)
+                errors += response.status_code != 200
+
+        wall_started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        wall = time.perf_counter() - wall_started
+
+    app.dependency_overrides.clear()
+    return {**summarize_latencies(latencies), "requests_per_second": requests / wall, "errors": errors}
+
+
+async def main(args):
+    private_key = generate_rsa_private_key(args.key_size)
+    repository = InMemoryUserRepository(latency=args.repository_latency)
+    tax_ids = repository.seed(args.users)
+
+    results = {}
+    for executor_type in args.modes:
+        services = Services()
+        services.repository = repository
+        services.jwt_signer = JwtSignatureProvider(
+            private_key=private_key,
+            executor_type=executor_type,
+            max_workers=args.max_workers,
+        )
+        try:
+            # aquece o pool (criação de threads/processos e parse da chave)
+            await services.jwt_signer.sign_async({"sub": "warm-up"})
+            results[executor_type] = await run_mode(services, tax_ids, args.requests, args.concurrency)
+        finally:
+            services.jwt_signer.close()
+
+    print(orjson.dumps(results, option=orjson.OPT_INDENT_2).decode())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=SIGNING_EXECUTORS, default=list(SIGNING_EXECUTORS))
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-workers", type=int, default=1)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--key-size", type=int, default=2048)
+    parser.add_argument("--repository-latency", type=float, default=0.005,
+                        help="latência simulada do DynamoDB, em segundos")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,172 @@
+"""
+Capacidade e latência da busca do login por CPF em cada caminho do repositório, contra o
+dynamodb-local (ou uma tabela de verdade, com --endpoint-url e credenciais):
+
+    index              Query no GSI TaxIDIndex (sempre eventualmente consistente)
+    marker             GetItem no TAXID#<cpf>, que traz a cópia do usuário
+    marker-consistent  o mesmo GetItem com ConsistentRead
+    pointer            marcador antigo, sem a cópia: GetItem no marcador e outro no usuário
+
+Semeia --users usuários pelo repositório (marcadores com a cópia) e outros tantos com o
+marcador antigo, para o caminho pointer; depois repete --lookups buscas de CPFs
+cadastrados e de CPFs que não existem em cada caminho, sem cache de usuários. O
+relatório traz chamadas, RCU e latência por busca, e o custo on-demand por milhão de
+logins. O dynamodb-local atualiza o GSI na hora; na AWS a Query ainda pode não ver um
+cadastro recente, o que só o GetItem consistente garante.
+
+    docker compose up -d dynamodb
+    python -m benchmarks.tax_id_lookup --users 500 --lookups 2000
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+import orjson
+
+from benchmarks.common import DEFAULT_ENDPOINT_URL, configure_local_credentials, ensure_users_table, summarize_latencies
+from source.helpers.metrics import REQUEST_DYNAMODB_USAGE, DynamoDBUsage
+from source.helpers.repository import AsyncDatabaseRepository, tax_id_marker_key
+from source.models.user import User
+
+# caminho -> (tax_id_lookup, consistent_tax_id_reads, CPFs usados)
+STRATEGIES = {
+    "index": ("index", False, "copied"),
+    "marker": ("marker", False, "copied"),
+    "marker-consistent": ("marker", True, "copied"),
+    "pointer": ("marker", False, "pointer"),
+}
+
+
+def new_repository(args, lookup: str = "index", consistent: bool = False) -> AsyncDatabaseRepository:
+    # check_tax_id_index=False: o cenário depois do backfill, em que um CPF sem marcador não existe
+    return AsyncDatabaseRepository(
+        table_name=args.table_name,
+        endpoint_url=args.endpoint_url,
+        max_pool_connections=args.concurrency,
+        check_tax_id_index=False,
+        return_consumed_capacity=True,
+        tax_id_lookup=lookup,
+        consistent_tax_id_reads=consistent,
+    )
+
+
+async def seed(repository: AsyncDatabaseRepository, count: int, concurrency: int) -> dict:
+    prefix = uuid.uuid4().hex[:3]
+    tax_ids = {
+        "copied": [f"{prefix}0{index:07d}" for index in range(count)],
+        "pointer": [f"{prefix}1{index:07d}" for index in range(count)],
+    }
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def create(tax_id: str, pointer: bool):
+        user = User.create_costumer(tax_id=tax_id, email=f"{tax_id}@bench.local", name="Bench User")
+        async with semaphore:
+            if not pointer:
+                await repository.create_user(user.model_dump())
+                return
+            # marcador como era gravado antes da cópia do usuário
+            async with repository.get_table() as table:
+                await table.put_item(Item=user.model_dump())
+                await table.put_item(Item={"id": tax_id_marker_key(tax_id), "user_id": user.id})
+
+    await asyncio.gather(
+        *(create(tax_id, pointer=False) for tax_id in tax_ids["copied"]),
+        *(create(tax_id, pointer=True) for tax_id in tax_ids["pointer"]),
+    )
+    return tax_ids
+
+
+def read_path(repository: AsyncDatabaseRepository):
+    # A leitura de cada caminho, sem o single-flight: CPFs repetidos ao mesmo tempo seriam uma chamada só.
+    if repository.tax_id_lookup == "marker":
+        return repository._get_user_by_tax_id_marker
+    return repository._query_user_by_tax_id
+
+
+async def measure(repository: AsyncDatabaseRepository, tax_ids: list, concurrency: int) -> dict:
+    read = read_path(repository)
+    usage = DynamoDBUsage()
+    # as tasks do gather herdam o contexto: todas somam no mesmo DynamoDBUsage
+    token = REQUEST_DYNAMODB_USAGE.set(usage)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    missing = 0
+
+    async def lookup(tax_id: str):
+        nonlocal missing
+        async with semaphore:
+            started = time.perf_counter()
+            user = await read(tax_id)
+            latencies.append(time.perf_counter() - started)
+            missing += user is None
+
+    try:
+        await asyncio.gather(*(lookup(tax_id) for tax_id in tax_ids))
+    finally:
+        REQUEST_DYNAMODB_USAGE.reset(token)
+    count = len(tax_ids)
+    return {
+        "lookups": count,
+        "not_found": missing,
+        "calls_per_lookup": usage.calls / count if count else 0.0,
+        "read_units_per_lookup": usage.read_units / count if count else 0.0,
+        "latency": summarize_latencies(latencies),
+    }
+
+
+def cost_per_million(result: dict, read_price_per_million: float) -> float:
+    return result["read_units_per_lookup"] * read_price_per_million
+
+
+async def main(args):
+    configure_local_credentials()
+    seeder = new_repository(args)
+    await ensure_users_table(seeder)
+    await seeder.open()
+    try:
+        tax_ids = await seed(seeder, args.users, args.concurrency)
+    finally:
+        await seeder.close()
+
+    unknown = [str(uuid.uuid4().int)[:11] for _ in range(args.lookups)]
+    report = {"users": args.users, "strategies": {}}
+    for name in args.strategies:
+        lookup, consistent, group = STRATEGIES[name]
+        repository = new_repository(args, lookup, consistent)
+        await repository.open()
+        try:
+            found = await measure(repository, random.choices(tax_ids[group], k=args.lookups), args.concurrency)
+            absent = await measure(repository, unknown, args.concurrency)
+        finally:
+            await repository.close()
+        report["strategies"][name] = {
+            "found": {**found, "usd_per_million": cost_per_million(found, args.read_price_per_million)},
+            "unknown": {**absent, "usd_per_million": cost_per_million(absent, args.read_price_per_million)},
+        }
+
+    baseline = report["strategies"].get("index")
+    if baseline is not None and baseline["found"]["read_units_per_lookup"]:
+        report["read_units_relative_to_index"] = {
+            name: result["found"]["read_units_per_lookup"] / baseline["found"]["read_units_per_lookup"]
+            for name, result in report["strategies"].items()
+        }
+    # ReturnConsumedCapacity vazio (alguns emuladores) deixa as RCU em zero: só as chamadas contam
+    report["capacity_reported"] = any(
+        result["found"]["read_units_per_lookup"] for result in report["strategies"].values()
+    )
+    print(orjson.dumps(report, option=orjson.OPT_INDENT_2).decode())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint-url", default=DEFAULT_ENDPOINT_URL)
+    parser.add_argument("--table-name", default="bench-auth-service-users")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--strategies", nargs="+", choices=list(STRATEGIES), default=list(STRATEGIES))
+    # preço on-demand da us-east-1, em USD por milhão de unidades de leitura
+    parser.add_argument("--read-price-per-million", type=float, default=0.125)
+    asyncio.run(main(parser.parse_args()))
@@ -5,7 +5,7 @@ resource "aws_lb_target_group" "service_tg" {
   target_type = "ip"
   vpc_id      = data.aws_vpc.existing.id
   health_check {
-    path                = "/health"
+    path                = "/ready"
     protocol            = "HTTP"
     matcher             = "200"
     port                = 8080
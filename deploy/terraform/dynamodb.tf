@@ -26,13 +26,18 @@ resource "aws_dynamodb_table" "users" {
   }
 }
 
+# Ids estáveis: com uuid() o item era recriado a cada apply e o marcador TAXID# perderia a referência.
+resource "random_uuid" "anonymous_user" {}
+
+resource "random_uuid" "employee_user" {}
+
 resource "aws_dynamodb_table_item" "create_anonymous_user" {
   hash_key   = "id"
   table_name = "${local.project_name}-users"
 
   item = <<ITEM
     {
-      "id": {"S": "${uuid()}"},
+      "id": {"S": "${random_uuid.anonymous_user.result}"},
       "tax_id": {"S": "00000000000"},
       "email": {"S": "anonymous@anonymous.com"},
       "name": {"S": "Anonymous User"},
@@ -49,7 +54,7 @@ resource "aws_dynamodb_table_item" "create_employee_user" {
 
   item = <<ITEM
     {
-      "id": {"S": "${uuid()}"},
+      "id": {"S": "${random_uuid.employee_user.result}"},
       "tax_id": {"S": "11111111111"},
       "email": {"S": "employee@employee.com"},
       "name": {"S": "Default Employee"},
@@ -59,3 +64,32 @@ resource "aws_dynamodb_table_item" "create_employee_user" {
 
   depends_on = [aws_dynamodb_table.users]
 }
+
+# Marcadores de unicidade do tax_id (ver AsyncDatabaseRepository.create_user)
+resource "aws_dynamodb_table_item" "anonymous_user_tax_id" {
+  hash_key   = "id"
+  table_name = "${local.project_name}-users"
+
+  item = <<ITEM
+    {
+      "id": {"S": "TAXID#00000000000"},
+      "user_id": {"S": "${random_uuid.anonymous_user.result}"}
+    }
+  ITEM
+
+  depends_on = [aws_dynamodb_table.users]
+}
+
+resource "aws_dynamodb_table_item" "employee_user_tax_id" {
+  hash_key   = "id"
+  table_name = "${local.project_name}-users"
+
+  item = <<ITEM
+    {
+      "id": {"S": "TAXID#11111111111"},
+      "user_id": {"S": "${random_uuid.employee_user.result}"}
+    }
+  ITEM
+
+  depends_on = [aws_dynamodb_table.users]
+}
@@ -0,0 +1,4 @@
+import time
+
+# Início do carregamento da aplicação: o relatório de startup mede os imports a partir daqui.
+IMPORT_STARTED = time.perf_counter()
@@ -0,0 +1,55 @@
+import argparse
+import asyncio
+
+import orjson
+
+from source.configs.services import Services
+from source.configs.settings import Settings
+from source.helpers.repository import AsyncDatabaseRepository
+
+DESCRIPTION = """
+Cria o item TAXID#<cpf> para usuários cadastrados antes da escrita condicional, e
+completa com a cópia do usuário os marcadores gravados antes dela ("migrated").
+Idempotente: marcadores completos do mesmo usuário são mantidos. CPFs que já
+pertencem a outro usuário (duplicados antigos) são listados em "conflicts" para
+limpeza manual. Depois de rodar sem conflitos, o cadastro pode deixar de consultar
+o GSI (DYNAMODB_CHECK_TAX_ID_INDEX=false) e o login pode usar o GetItem no marcador
+(DYNAMODB_TAX_ID_LOOKUP=marker).
+
+    python -m source.cli.backfill_tax_id_markers
+    python -m source.cli.backfill_tax_id_markers --table-name fase4-auth-service-users --dry-run
+"""
+
+
+async def backfill(repository: AsyncDatabaseRepository, dry_run: bool = False) -> dict:
+    result = {"users": 0, "created": 0, "migrated": 0, "existing": 0, "conflicts": []}
+    async for user in repository.scan_users():
+        result["users"] += 1
+        if dry_run:
+            continue
+        status, owner = await repository.ensure_tax_id_marker(user)
+        if status == "conflict":
+            result["conflicts"].append({"tax_id": user["tax_id"], "user_id": user["id"], "marker_user_id": owner})
+        else:
+            result[status] += 1
+    return result
+
+
+async def main(args):
+    settings = Settings.new()
+    if args.table_name:
+        settings.application_table_name = args.table_name
+    repository = Services.new_repository(settings)
+    await repository.open()
+    try:
+        result = await backfill(repository, dry_run=args.dry_run)
+    finally:
+        await repository.close()
+    print(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=DESCRIPTION, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--table-name", help="padrão: APPLICATION_TABLE_NAME")
+    parser.add_argument("--dry-run", action="store_true", help="só conta os usuários, sem gravar")
+    asyncio.run(main(parser.parse_args()))
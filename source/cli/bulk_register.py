@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import sys
+from typing import BinaryIO, TextIO
+
+import orjson
+
+from source.configs.services import Services
+from source.configs.settings import Settings
+from source.helpers.records import RECORD_FORMATS, read_blocks, read_records
+from source.helpers.repository import AsyncDatabaseRepository
+from source.schemas.response.auth import BulkRegisterSummary
+from source.usecase.bulk_register import BulkRegisterUseCase
+
+DESCRIPTION = """
+Cadastra usuários em lote a partir de um arquivo JSONL (um objeto com tax_id, email e
+name por linha) ou CSV (cabeçalho tax_id,email,name). O arquivo é lido em blocos e os
+usuários são gravados com BatchWriteItem, 25 itens por chamada, com --writers chamadas
+simultâneas; a memória não cresce com o tamanho do arquivo.
+
+CPFs já cadastrados ou repetidos no arquivo são rejeitados, assim como linhas inválidas:
+cada rejeição vai como uma linha JSON para --rejected (padrão: stderr) e o resumo sai no
+fim. Rodar de novo o mesmo arquivo é seguro: o que já foi gravado volta como duplicado.
+
+BatchWriteItem não tem escrita condicional: um cadastro pelo POST /auth do mesmo CPF,
+entre a conferência e a gravação do bloco, não é detectado. Rode a importação antes de
+liberar o cadastro desses usuários.
+
+    python -m source.cli.bulk_register clientes.jsonl
+    python -m source.cli.bulk_register clientes.csv --rejected rejeitados.jsonl --writers 8
+    gunzip -c clientes.jsonl.gz | python -m source.cli.bulk_register - --format jsonl
+"""
+
+
+async def bulk_register(
+        repository: AsyncDatabaseRepository,
+        source: BinaryIO,
+        record_format: str,
+        rejected: TextIO,
+        chunk_size: int = 500,
+        writers: int = 4,
+) -> dict:
+    use_case = BulkRegisterUseCase(repository=repository, chunk_size=chunk_size, writers=writers)
+    summary = None
+    async for event in use_case.execute(read_records(read_blocks(source), record_format)):
+        if isinstance(event, BulkRegisterSummary):
+            summary = event
+            continue
+        rejected.write(event.model_dump_json(exclude_none=True) + "\n")
+    return summary.model_dump(exclude={"status"})
+
+
+def input_format(args) -> str:
+    if args.format:
+        return args.format
+    return "csv" if args.input.lower().endswith(".csv") else "jsonl"
+
+
+async def main(args):
+    settings = Settings.new()
+    if args.table_name:
+        settings.application_table_name = args.table_name
+    repository = Services.new_repository(settings)
+    source = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    rejected = open(args.rejected, "w") if args.rejected else sys.stderr
+    await repository.open()
+    try:
+        result = await bulk_register(
+            repository,
+            source,
+            input_format(args),
+            rejected,
+            chunk_size=args.chunk_size or settings.bulk_register_chunk_size,
+            writers=args.writers or settings.bulk_register_writers,
+        )
+    finally:
+        await repository.close()
+        if source is not sys.stdin.buffer:
+            source.close()
+        if rejected is not sys.stderr:
+            rejected.close()
+    print(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=DESCRIPTION, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help='arquivo JSONL ou CSV, ou "-" para a entrada padrão')
+    parser.add_argument("--format", choices=RECORD_FORMATS, help="padrão: pela extensão do arquivo")
+    parser.add_argument("--rejected", help="arquivo para as linhas rejeitadas (padrão: stderr)")
+    parser.add_argument("--table-name", help="padrão: APPLICATION_TABLE_NAME")
+    parser.add_argument("--chunk-size", type=int, help="padrão: BULK_REGISTER_CHUNK_SIZE")
+    parser.add_argument("--writers", type=int, help="padrão: BULK_REGISTER_WRITERS")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,160 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import BinaryIO, Optional
+
+import orjson
+
+from source.configs.services import Services
+from source.configs.settings import Settings
+from source.helpers.repository import AsyncDatabaseRepository
+from source.usecase.export import ExportUsersUseCase, ndjson_items
+
+DESCRIPTION = """
+Exporta os usuários da tabela para um arquivo NDJSON (um usuário por linha), com um
+Scan paralelo de --total-segments segmentos. --read-capacity limita as RCU por segundo
+somadas de todos os segmentos, para a exportação não disputar capacidade com os logins.
+A memória fica em algumas páginas, qualquer que seja o tamanho da tabela.
+
+A cada página gravada, o checkpoint (padrão: <saída>.checkpoint.json) guarda a
+LastEvaluatedKey de cada segmento e o tamanho do arquivo naquele ponto. Com --resume,
+o arquivo é truncado nesse tamanho e cada segmento continua de onde parou: nenhuma
+linha sai repetida nem falta.
+
+    python -m source.cli.export_users usuarios.ndjson --total-segments 8 --read-capacity 200
+    python -m source.cli.export_users usuarios.ndjson --resume
+    python -m source.cli.export_users - | gzip > usuarios.ndjson.gz
+"""
+
+
+class ExportCheckpoint:
+
+    def __init__(self, path: Optional[str], total_segments: int, state: Optional[dict] = None):
+        self.path = path
+        self.state = state or {
+            "total_segments": total_segments,
+            "offset": 0,
+            "items": 0,
+            "segments": {str(segment): {"done": False, "last_key": None} for segment in range(total_segments)},
+        }
+
+    @classmethod
+    def load(cls, path: str) -> "ExportCheckpoint":
+        with open(path, "rb") as file:
+            state = orjson.loads(file.read())
+        return cls(path, state["total_segments"], state)
+
+    @property
+    def total_segments(self) -> int:
+        return self.state["total_segments"]
+
+    @property
+    def pending_segments(self) -> list:
+        return [int(segment) for segment, progress in self.state["segments"].items() if not progress["done"]]
+
+    @property
+    def start_keys(self) -> dict:
+        return {
+            int(segment): progress["last_key"]
+            for segment, progress in self.state["segments"].items()
+            if progress["last_key"] is not None
+        }
+
+    def advance(self, segment: int, last_key: Optional[dict], offset: int, items: int):
+        self.state["segments"][str(segment)] = {"done": last_key is None, "last_key": last_key}
+        self.state["offset"] = offset
+        self.state["items"] += items
+        self.save()
+
+    def save(self):
+        if self.path is None:
+            return
+        # Escrita atômica: uma interrupção no meio não deixa um checkpoint pela metade.
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(orjson.dumps(self.state, option=orjson.OPT_INDENT_2))
+        os.replace(temporary, self.path)
+
+
+async def export(
+        repository: AsyncDatabaseRepository,
+        output: BinaryIO,
+        checkpoint: ExportCheckpoint,
+        page_size: int = 500,
+        read_capacity: float = 0,
+) -> dict:
+    use_case = ExportUsersUseCase(
+        repository=repository,
+        total_segments=checkpoint.total_segments,
+        page_size=page_size,
+        read_capacity_units_per_second=read_capacity,
+        start_keys=checkpoint.start_keys,
+        segments=checkpoint.pending_segments,
+    )
+    result = {"items": 0, "scanned": 0, "read_units": 0.0, "pages": 0}
+    started = time.perf_counter()
+    async for segment, page in use_case.execute():
+        # As linhas da página vão para o arquivo antes do checkpoint andar: depois de uma
+        # interrupção, o que passou do offset salvo é descartado e lido de novo.
+        output.write(ndjson_items(page.items))
+        output.flush()
+        checkpoint.advance(segment, page.last_key, output.tell() if output.seekable() else 0, len(page.items))
+        result["items"] += len(page.items)
+        result["scanned"] += page.scanned
+        result["read_units"] += page.consumed_units
+        result["pages"] += 1
+    result["seconds"] = time.perf_counter() - started
+    result["budget_wait_seconds"] = use_case.budget.waited if use_case.budget is not None else 0.0
+    result["total_items"] = checkpoint.state["items"]
+    return result
+
+
+def open_output(args) -> tuple[BinaryIO, ExportCheckpoint]:
+    if args.output == "-":
+        if args.resume:
+            raise SystemExit("--resume needs an output file")
+        return sys.stdout.buffer, ExportCheckpoint(None, args.total_segments)
+
+    checkpoint_path = args.checkpoint or f"{args.output}.checkpoint.json"
+    if not args.resume:
+        checkpoint = ExportCheckpoint(checkpoint_path, args.total_segments)
+        checkpoint.save()
+        return open(args.output, "wb"), checkpoint
+
+    checkpoint = ExportCheckpoint.load(checkpoint_path)
+    output = open(args.output, "r+b")
+    output.truncate(checkpoint.state["offset"])
+    output.seek(0, os.SEEK_END)
+    return output, checkpoint
+
+
+async def main(args):
+    settings = Settings.new()
+    if args.table_name:
+        settings.application_table_name = args.table_name
+    repository = Services.new_repository(settings)
+    output, checkpoint = open_output(args)
+    read_capacity = settings.export_read_capacity_units_per_second if args.read_capacity is None else args.read_capacity
+    await repository.open()
+    try:
+        result = await export(repository, output, checkpoint, page_size=args.page_size, read_capacity=read_capacity)
+    finally:
+        await repository.close()
+        if output is not sys.stdout.buffer:
+            output.close()
+    print(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=DESCRIPTION, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output", help='arquivo NDJSON, ou "-" para a saída padrão (sem checkpoint)')
+    parser.add_argument("--total-segments", type=int, default=4, help="ignorado com --resume, que usa o do checkpoint")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--read-capacity", type=float,
+                        help="RCU por segundo somadas dos segmentos (padrão: EXPORT_READ_CAPACITY_UNITS_PER_SECOND)")
+    parser.add_argument("--checkpoint", help="padrão: <saída>.checkpoint.json")
+    parser.add_argument("--resume", action="store_true", help="continua a partir do checkpoint")
+    parser.add_argument("--table-name", help="padrão: APPLICATION_TABLE_NAME")
+    asyncio.run(main(parser.parse_args()))
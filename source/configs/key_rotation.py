@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import random
+from typing import Awaitable, Callable, Optional
+
+from source.configs.secrets import Secrets
+from source.configs.services import Services
+from source.configs.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class KeyRotationTask:
+
+    def __init__(
+            self,
+            settings: Settings,
+            services: Services,
+            secrets: Secrets,
+            fetch_secrets: Optional[Callable[[Settings], Awaitable[Secrets]]] = None,
+    ):
+        self.settings = settings
+        self.services = services
+        self.secrets = secrets
+        self.fetch_secrets = fetch_secrets or Secrets.new
+        self.interval = settings.jwt_key_refresh_interval_seconds
+        self.jitter = settings.jwt_key_refresh_jitter
+        self.rotations = 0
+        self.failures = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def next_delay(self) -> float:
+        # O jitter espalha as consultas ao Secrets Manager entre workers e tasks do ECS.
+        return self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def refresh(self) -> bool:
+        secrets = await self.fetch_secrets(self.settings)
+        if secrets == self.secrets:
+            return False
+
+        jwt_signer = self.services.jwt_signer
+        # O parse das chaves roda fora do event loop; a assinatura segue com o conjunto atual até a troca.
+        key_set = await asyncio.to_thread(
+            jwt_signer.new_key_set,
+            secrets.jwt_signing_key,
+            secrets.jwt_verification_keys,
+        )
+        jwt_signer.load_keys(key_set)
+        if self.services.token_verifier is not None and self.services.token_verifier.cache is not None:
+            self.services.token_verifier.cache.clear()
+
+        self.secrets = secrets
+        self.rotations += 1
+        logger.info("JWT keys reloaded, signing with kid %s", key_set.kid)
+        return True
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.next_delay())
+            try:
+                await self.refresh()
+            except Exception:
+                self.failures += 1
+                logger.exception("Failed to refresh JWT keys from Secrets Manager, keeping current keys")
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self.run(), name="jwt-key-rotation")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from source.configs.settings import Settings
+from source.helpers.metrics import LOOP_BLOCKS, LOOP_LAG_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitorTask:
+
+    def __init__(self, settings: Settings):
+        self.interval = settings.loop_monitor_interval_seconds
+        self.threshold = settings.loop_block_threshold_seconds
+        self.report_interval = settings.loop_block_report_interval_seconds
+        self.reports = 0
+        self.suppressed = 0
+        self._deadline: Optional[float] = None
+        self._reported_deadline: Optional[float] = None
+        self._next_report = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._stopped = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def run(self):
+        while True:
+            # O sleep deveria acordar no prazo: o que passar disso é tempo em que o loop ficou ocupado.
+            self._deadline = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - self._deadline)
+            LOOP_LAG_SECONDS.observe(lag)
+            if self.threshold > 0 and lag >= self.threshold:
+                LOOP_BLOCKS.inc()
+
+    def watch(self):
+        # Thread separada: enquanto o loop está travado, é a única que ainda consegue ver a pilha dele.
+        while not self._stopped.wait(self.threshold / 2):
+            deadline = self._deadline
+            if deadline is None or deadline == self._reported_deadline:
+                continue
+            overdue = time.perf_counter() - deadline
+            if overdue < self.threshold:
+                continue
+            self._reported_deadline = deadline
+            self.report(overdue)
+
+    def report(self, overdue: float):
+        now = time.monotonic()
+        if now < self._next_report:
+            self.suppressed += 1
+            return
+        self._next_report = now + self.report_interval
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else "  <unavailable>\n"
+        task = asyncio.current_task(self._loop)
+        logger.warning(
+            "Event loop blocked for at least %.0f ms in task %s (%d reports suppressed), stack:\n%s",
+            overdue * 1000,
+            task.get_name() if task is not None else None,
+            self.suppressed,
+            stack.rstrip("\n"),
+        )
+        self.reports += 1
+        self.suppressed = 0
+
+    def start(self):
+        if self.interval <= 0 or self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._task = asyncio.create_task(self.run(), name="loop-monitor")
+        if self.threshold > 0:
+            self._stopped.clear()
+            self._watchdog = threading.Thread(target=self.watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self):
+        if self._watchdog is not None:
+            self._stopped.set()
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+import orjson
+
+from source.configs.services import Services
+from source.configs.settings import Settings
+from source.helpers import metrics
+from source.helpers.process import is_alive
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsTask:
+
+    def __init__(self, settings: Settings, services: Services, registry: metrics.MetricsRegistry = metrics.REGISTRY):
+        self.services = services
+        self.registry = registry
+        self.multiprocess_dir = Path(settings.metrics_multiprocess_dir) if settings.metrics_multiprocess_dir else None
+        self.flush_interval = settings.metrics_flush_interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def collect(self):
+        # Os caches já contam hits e misses; aqui os totais só são copiados para o registro.
+        caches = {
+            "user": self.services.repository.user_cache if self.services.repository else None,
+            "token": self.services.jwt_signer.token_cache if self.services.jwt_signer else None,
+            "introspection": self.services.token_verifier.cache if self.services.token_verifier else None,
+        }
+        for name, cache in caches.items():
+            if cache is None:
+                continue
+            metrics.CACHE_REQUESTS.set(cache.stats.hits, name, "hit")
+            metrics.CACHE_REQUESTS.set(cache.stats.misses, name, "miss")
+            metrics.CACHE_EVICTIONS.set(cache.stats.evictions, name)
+            metrics.CACHE_ENTRIES.set(len(cache), name)
+        if self.services.repository is not None:
+            metrics.COALESCED_LOOKUPS.set(self.services.repository.user_lookups.coalesced)
+            self.collect_tax_id_filter(self.services.repository.tax_id_filter)
+
+    @staticmethod
+    def collect_tax_id_filter(tax_id_filter):
+        if tax_id_filter is None:
+            return
+        stats = tax_id_filter.stats
+        metrics.TAX_ID_FILTER_LOOKUPS.set(stats.rejected, "rejected")
+        metrics.TAX_ID_FILTER_LOOKUPS.set(stats.passed, "passed")
+        metrics.TAX_ID_FILTER_LOOKUPS.set(stats.false_positives, "false_positive")
+        metrics.TAX_ID_FILTER_REBUILDS.set(stats.rebuilds, "success")
+        metrics.TAX_ID_FILTER_REBUILDS.set(stats.failures, "failure")
+        metrics.TAX_ID_FILTER_BYTES.set(tax_id_filter.size_bytes)
+        ready = tax_id_filter.ready
+        current = tax_id_filter.current
+        metrics.TAX_ID_FILTER_READY.set(1 if ready else 0)
+        metrics.TAX_ID_FILTER_ITEMS.set(len(current) if ready else 0)
+        metrics.TAX_ID_FILTER_ESTIMATED_FALSE_POSITIVE_RATE.set(current.estimated_false_positive_rate() if ready else 0)
+
+    @property
+    def snapshot_path(self) -> Optional[Path]:
+        if self.multiprocess_dir is None:
+            return None
+        return self.multiprocess_dir / f"{os.getpid()}.json"
+
+    def write_snapshot(self):
+        self.collect()
+        self.multiprocess_dir.mkdir(parents=True, exist_ok=True)
+        # Escreve em um temporário e renomeia: quem lê nunca vê um JSON pela metade.
+        temporary = self.snapshot_path.with_suffix(".tmp")
+        temporary.write_bytes(orjson.dumps(self.registry.snapshot()))
+        os.replace(temporary, self.snapshot_path)
+
+    def worker_snapshots(self) -> list[dict]:
+        snapshots = []
+        for path in self.multiprocess_dir.glob("*.json"):
+            # snapshots de workers que já morreram são descartados (o Prometheus trata como reset)
+            if not path.stem.isdigit() or not is_alive(int(path.stem)):
+                continue
+            try:
+                snapshots.append(orjson.loads(path.read_bytes()))
+            except (OSError, orjson.JSONDecodeError):
+                logger.warning("Skipping unreadable metrics snapshot %s", path)
+        return snapshots
+
+    def render(self) -> str:
+        # Com --workers N o scrape cai em um worker qualquer: ele grava o próprio snapshot
+        # e soma o dos outros, que cada worker regrava a cada metrics_flush_interval_seconds.
+        if self.multiprocess_dir is None:
+            self.collect()
+            return metrics.render(self.registry.snapshot())
+        self.write_snapshot()
+        return metrics.render(metrics.merge_snapshots(self.worker_snapshots()))
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                self.write_snapshot()
+            except OSError:
+                logger.exception("Failed to write metrics snapshot to %s", self.multiprocess_dir)
+
+    def start(self):
+        if self.multiprocess_dir is not None and self.flush_interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self.run(), name="metrics-flush")
+
+    async def stop(self):
+        if self.snapshot_path is not None:
+            self.snapshot_path.unlink(missing_ok=True)
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import os
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+import orjson
+
+from source.configs.settings import Settings
+from source.helpers import profiling
+from source.helpers.process import is_alive
+
+logger = logging.getLogger(__name__)
+
+DUMP_SUFFIXES = {"cprofile": ".pstats", "stacks": ".collapsed"}
+
+
+class ProfilingTask:
+
+    def __init__(self, settings: Settings, profiler: profiling.RequestProfiler = profiling.PROFILER):
+        self.profiler = profiler
+        self.profiler.stack_interval = settings.profiling_stack_interval_seconds
+        self.max_duration = settings.profiling_max_duration_seconds
+        self.directory = Path(settings.profiling_dir) if settings.profiling_dir else None
+        self.poll_interval = settings.profiling_poll_interval_seconds
+        self.mode: Optional[str] = None
+        self._control: Optional[bytes] = None
+        self._written: Optional[tuple] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def control_path(self) -> Optional[Path]:
+        return None if self.directory is None else self.directory / "control.json"
+
+    def dump_path(self, pid: int, mode: str) -> Path:
+        return self.directory / f"{pid}{DUMP_SUFFIXES[mode]}"
+
+    def start_session(self, mode: str, sample_every: int, duration: float) -> profiling.ProfilingSession:
+        now = time.time()
+        session = profiling.ProfilingSession(
+            mode=mode,
+            sample_every=max(1, sample_every),
+            started_at=now,
+            until=now + min(duration, self.max_duration),
+        )
+        self.apply(session)
+        self.publish({"session": session.as_dict()})
+        return session
+
+    def stop_session(self):
+        self.profiler.stop()
+        self.publish({"session": None})
+
+    def apply(self, session: Optional[profiling.ProfilingSession]):
+        # um control.json de uma sessão já vencida (por exemplo, de antes de um restart) é ignorado
+        if session is None or session.until <= time.time():
+            self.profiler.stop()
+            return
+        self.profiler.start(session)
+        self.mode = session.mode
+        # resultados de uma sessão anterior deste worker não se misturam com a nova
+        self.remove_dumps()
+
+    def remove_dumps(self):
+        self._written = None
+        if self.directory is None:
+            return
+        for suffix in DUMP_SUFFIXES.values():
+            self.directory.joinpath(f"{os.getpid()}{suffix}").unlink(missing_ok=True)
+
+    def publish(self, control: dict):
+        # Com --workers N, o POST cai em um worker só: os outros leem o mesmo comando no próximo poll.
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        data = orjson.dumps(control)
+        temporary = self.control_path.with_suffix(".tmp")
+        temporary.write_bytes(data)
+        os.replace(temporary, self.control_path)
+        self._control = data
+
+    def poll(self):
+        try:
+            data = self.control_path.read_bytes()
+        except FileNotFoundError:
+            data = None
+        if data is not None and data != self._control:
+            self._control = data
+            session = orjson.loads(data)["session"]
+            self.apply(None if session is None else profiling.ProfilingSession(**session))
+        # também encerra sessões vencidas em workers sem tráfego
+        self.profiler.expire()
+        self.write_dump()
+
+    def write_dump(self):
+        # só regrava quando chegaram amostras novas desde a última escrita
+        version = (self.mode, self.profiler.sampled, sum(self.profiler.stacks.values()))
+        if self.mode is None or version == self._written:
+            return
+        data = self.profiler.dump(self.mode)
+        path = self.dump_path(os.getpid(), self.mode)
+        temporary = path.with_suffix(".tmp")
+        temporary.write_bytes(data)
+        os.replace(temporary, path)
+        self._written = version
+
+    def download(self, mode: str) -> bytes:
+        if self.directory is None:
+            return self.profiler.dump(mode)
+        self.write_dump()
+        dumps = []
+        for path in self.directory.glob(f"*{DUMP_SUFFIXES[mode]}"):
+            if path.stem.isdigit() and is_alive(int(path.stem)):
+                dumps.append(path.read_bytes())
+        if mode == "cprofile":
+            return profiling.dump_stats(profiling.merge_stats(profiling.load_stats(data) for data in dumps))
+        return profiling.dump_stacks(sum((profiling.load_stacks(data) for data in dumps), Counter()))
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                self.poll()
+            except (OSError, ValueError):
+                logger.exception("Failed to sync profiling session with %s", self.directory)
+
+    def start(self):
+        if self.directory is not None and self._task is None:
+            self._task = asyncio.create_task(self.run(), name="profiling-sync")
+
+    async def stop(self):
+        self.profiler.stop()
+        self.remove_dumps()
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
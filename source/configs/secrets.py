@@ -1,16 +1,40 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Optional
 
 from source.configs.settings import Settings
-from source.helpers.aws import get_aws_secrets
+from source.helpers.aws import SecretsCache, get_aws_secrets
+from source.helpers.jwt import JwtKeyMaterial
 
 
 @dataclass
 class Secrets:
     jwt_private_key: str
+    jwt_key_id: Optional[str] = None
+    jwt_verification_keys: list[JwtKeyMaterial] = field(default_factory=list)
+    # Token dos endpoints /admin; sem ele, esses endpoints respondem 404
+    admin_token: Optional[str] = None
+
+    @property
+    def jwt_signing_key(self) -> JwtKeyMaterial:
+        return JwtKeyMaterial(key=self.jwt_private_key, kid=self.jwt_key_id)
 
     @classmethod
-    async def new(cls, settings: Settings):
-        secrets = await get_aws_secrets(settings.application_secret_name)
+    def from_dict(cls, secrets: dict):
+        # JWT_VERIFICATION_KEYS: chaves anteriores (PEM privado ou público) ainda aceitas na verificação
         return cls(
             jwt_private_key=secrets["JWT_PRIVATE_KEY"],
+            jwt_key_id=secrets.get("JWT_KEY_ID"),
+            jwt_verification_keys=[
+                JwtKeyMaterial(key=key["key"], kid=key.get("kid"), algorithm=key.get("alg"))
+                for key in secrets.get("JWT_VERIFICATION_KEYS") or []
+            ],
+            admin_token=secrets.get("ADMIN_TOKEN"),
         )
+
+    @classmethod
+    async def new(cls, settings: Settings, secrets_cache: Optional[SecretsCache] = None):
+        if secrets_cache is None:
+            secrets = await get_aws_secrets(settings.application_secret_name)
+        else:
+            secrets = await secrets_cache.get(settings.application_secret_name)
+        return cls.from_dict(secrets)
@@ -2,17 +2,94 @@ import typing
 
 from source.configs.secrets import Secrets
 from source.configs.settings import Settings
-from source.helpers.jwt import JwtSignatureProvider
+from source.helpers.bloom import TaxIdFilter
+from source.helpers.cache import TTLCache
+from source.helpers.jwt import CachedTokenVerifier, JwtSignatureProvider
 from source.helpers.repository import AsyncDatabaseRepository
 
 
 class Services:
     jwt_signer: typing.Optional[JwtSignatureProvider] = None
     repository: typing.Optional[AsyncDatabaseRepository] = None
+    token_verifier: typing.Optional[CachedTokenVerifier] = None
 
     @classmethod
-    def new(cls, settings: Settings, secrets: Secrets):
+    def new(
+            cls,
+            settings: Settings,
+            secrets: Secrets,
+            jwt_signer: typing.Optional[JwtSignatureProvider] = None,
+            repository: typing.Optional[AsyncDatabaseRepository] = None,
+    ):
         instance = cls()
-        instance.jwt_signer = JwtSignatureProvider(private_key=secrets.jwt_private_key)
-        instance.repository = AsyncDatabaseRepository(table_name=settings.application_table_name)
+        instance.jwt_signer = jwt_signer or cls.new_jwt_signer(settings, secrets)
+        instance.token_verifier = CachedTokenVerifier(
+            jwt_signer=instance.jwt_signer,
+            cache=cls.new_introspection_cache(settings),
+        )
+        instance.repository = repository or cls.new_repository(settings)
         return instance
+
+    @classmethod
+    def new_jwt_signer(cls, settings: Settings, secrets: Secrets) -> JwtSignatureProvider:
+        return JwtSignatureProvider(
+            private_key=secrets.jwt_private_key,
+            algorithm=settings.jwt_algorithm,
+            kid=secrets.jwt_key_id,
+            verification_keys=secrets.jwt_verification_keys,
+            executor_type=settings.jwt_signing_executor,
+            max_workers=settings.jwt_signing_max_workers,
+            expires_in=settings.jwt_expiration_seconds,
+            include_iat=settings.jwt_include_iat,
+            include_nbf=settings.jwt_include_nbf,
+            not_before_skew=settings.jwt_not_before_skew_seconds,
+            token_cache=cls.new_token_cache(settings),
+            reuse_min_remaining_ratio=settings.jwt_token_reuse_min_remaining_ratio,
+            jwks_max_age=settings.jwks_max_age_seconds,
+        )
+
+    @classmethod
+    def new_repository(cls, settings: Settings, session=None) -> AsyncDatabaseRepository:
+        return AsyncDatabaseRepository(
+            table_name=settings.application_table_name,
+            endpoint_url=settings.dynamodb_endpoint_url,
+            max_pool_connections=settings.dynamodb_max_pool_connections,
+            keepalive_timeout=settings.dynamodb_keepalive_timeout,
+            tcp_keepalive=settings.dynamodb_tcp_keepalive,
+            user_cache=cls.new_user_cache(settings),
+            session=session,
+            check_tax_id_index=settings.dynamodb_check_tax_id_index,
+            return_consumed_capacity=settings.dynamodb_return_consumed_capacity,
+            tax_id_filter=cls.new_tax_id_filter(settings),
+            tax_id_lookup=settings.dynamodb_tax_id_lookup,
+            consistent_tax_id_reads=settings.dynamodb_consistent_tax_id_reads,
+        )
+
+    @staticmethod
+    def new_tax_id_filter(settings: Settings) -> typing.Optional[TaxIdFilter]:
+        if not settings.tax_id_filter_enabled:
+            return None
+        interval = settings.tax_id_filter_rebuild_interval_seconds
+        return TaxIdFilter(
+            capacity=settings.tax_id_filter_expected_items,
+            error_rate=settings.tax_id_filter_false_positive_rate,
+            max_age=3 * interval if interval > 0 else None,
+        )
+
+    @staticmethod
+    def new_user_cache(settings: Settings) -> typing.Optional[TTLCache]:
+        if settings.user_cache_max_size <= 0 or settings.user_cache_ttl_seconds <= 0:
+            return None
+        return TTLCache(max_size=settings.user_cache_max_size, ttl=settings.user_cache_ttl_seconds)
+
+    @staticmethod
+    def new_token_cache(settings: Settings) -> typing.Optional[TTLCache]:
+        if settings.jwt_token_cache_max_size <= 0 or settings.jwt_expiration_seconds <= 0:
+            return None
+        return TTLCache(max_size=settings.jwt_token_cache_max_size, ttl=settings.jwt_expiration_seconds)
+
+    @staticmethod
+    def new_introspection_cache(settings: Settings) -> typing.Optional[TTLCache]:
+        if settings.introspection_cache_max_size <= 0 or settings.introspection_cache_ttl_seconds <= 0:
+            return None
+        return TTLCache(max_size=settings.introspection_cache_max_size, ttl=settings.introspection_cache_ttl_seconds)
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic.v1 import BaseSettings
 
 from source.__version__ import __version__
@@ -11,6 +13,84 @@ class Settings(BaseSettings):
     application_secret_name: str = "fase4-auth-service-secrets"
     application_table_name: str = "fase4-auth-service-users"
 
+    secrets_cache_ttl_seconds: float = 60.0
+
+    dynamodb_endpoint_url: Optional[str] = None
+    dynamodb_max_pool_connections: int = 10
+    dynamodb_keepalive_timeout: float = 60.0
+    dynamodb_tcp_keepalive: bool = True
+    # Desligar depois de rodar python -m source.cli.backfill_tax_id_markers
+    dynamodb_check_tax_id_index: bool = True
+    # Pede ReturnConsumedCapacity em cada chamada e exporta as unidades em /metrics
+    dynamodb_return_consumed_capacity: bool = False
+    # "marker": login com GetItem no TAXID#<cpf>, que guarda uma cópia do usuário; "index": Query no GSI.
+    # Use "marker" depois do backfill, com DYNAMODB_CHECK_TAX_ID_INDEX=false.
+    dynamodb_tax_id_lookup: str = "index"
+    # Leitura fortemente consistente nesse GetItem (1 RCU em vez de 0.5); o GSI é sempre eventual
+    dynamodb_consistent_tax_id_reads: bool = False
+
+    user_cache_max_size: int = 10000
+    user_cache_ttl_seconds: float = 300.0
+
+    warmup_dynamodb_connections: int = 4
+    warmup_tax_ids: list[str] = []
+    warmup_retry_seconds: float = 5.0
+    warmup_readiness_dir: Optional[str] = None
+    warmup_expected_workers: int = 1
+
+    # Com --workers N, diretório compartilhado onde cada worker grava seu snapshot para o /metrics somar
+    metrics_multiprocess_dir: Optional[str] = None
+    metrics_flush_interval_seconds: float = 5.0
+
+    # 0 desliga o monitor; acima do limite, a pilha do loop vai para o log (no máximo uma por intervalo)
+    loop_monitor_interval_seconds: float = 0.1
+    loop_block_threshold_seconds: float = 0.1
+    loop_block_report_interval_seconds: float = 60.0
+
+    # Com --workers N, diretório compartilhado para ligar o profiling em todos os workers e somar os resultados
+    profiling_dir: Optional[str] = None
+    profiling_poll_interval_seconds: float = 1.0
+    profiling_max_duration_seconds: float = 300.0
+    profiling_stack_interval_seconds: float = 0.005
+
+    jwt_algorithm: Optional[str] = None
+    jwt_signing_executor: str = "thread"
+    jwt_signing_max_workers: int = 1
+    jwt_expiration_seconds: int = 3600
+    jwt_include_iat: bool = True
+    jwt_include_nbf: bool = True
+    jwt_not_before_skew_seconds: int = 0
+    jwt_token_cache_max_size: int = 10000
+    jwt_token_reuse_min_remaining_ratio: float = 0.5
+    jwks_max_age_seconds: int = 300
+    jwt_key_refresh_interval_seconds: float = 300.0
+    jwt_key_refresh_jitter: float = 0.2
+
+    introspection_cache_max_size: int = 10000
+    introspection_cache_ttl_seconds: float = 300.0
+    introspection_batch_max_size: int = 100
+
+    auth_batch_max_size: int = 100
+    # Consultas simultâneas ao GSI por lote; com o backfill feito, o lote usa BatchGetItem
+    auth_batch_lookup_concurrency: int = 16
+
+    # Linhas validadas e conferidas por vez no cadastro em lote, e chamadas BatchWriteItem simultâneas
+    bulk_register_chunk_size: int = 500
+    bulk_register_writers: int = 4
+
+    # RCU por segundo da exportação (Scan paralelo), somadas de todos os segmentos; 0 não limita
+    export_read_capacity_units_per_second: float = 0
+
+    # Filtro de Bloom dos CPFs cadastrados, montado com um Scan paralelo: CPF que ele não conhece
+    # leva 404 sem consulta ao DynamoDB. Cadastros de outros processos só entram no próximo rebuild.
+    tax_id_filter_enabled: bool = False
+    tax_id_filter_expected_items: int = 1000000
+    tax_id_filter_false_positive_rate: float = 0.01
+    # 0 monta o filtro só na subida; sem rebuild por 3 intervalos (Scan falhando), o filtro sai de uso
+    tax_id_filter_rebuild_interval_seconds: float = 300.0
+    tax_id_filter_scan_segments: int = 4
+    tax_id_filter_read_capacity_units_per_second: float = 0
+
     __map_profile_to_short__ = {
         "development": "dev",
         "staging": "stg",
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Optional
+
+from source.configs.services import Services
+from source.configs.settings import Settings
+from source.usecase.export import ExportUsersUseCase
+
+logger = logging.getLogger(__name__)
+
+REBUILD_JITTER = 0.2
+
+
+class TaxIdFilterTask:
+
+    def __init__(self, settings: Settings, services: Services, page_size: int = 1000):
+        self.services = services
+        self.filter = services.repository.tax_id_filter if services.repository else None
+        self.interval = settings.tax_id_filter_rebuild_interval_seconds
+        self.total_segments = settings.tax_id_filter_scan_segments
+        self.read_capacity = settings.tax_id_filter_read_capacity_units_per_second
+        self.page_size = page_size
+        self._task: Optional[asyncio.Task] = None
+
+    def next_delay(self) -> float:
+        # Cada worker refaz o filtro com um Scan da tabela inteira: o jitter evita que todos leiam juntos.
+        return self.interval * random.uniform(1 - REBUILD_JITTER, 1 + REBUILD_JITTER)
+
+    async def rebuild(self) -> int:
+        # O filtro atual segue respondendo até a troca; os cadastros desse meio-tempo entram nos dois.
+        bloom = self.filter.begin_build()
+        use_case = ExportUsersUseCase(
+            repository=self.services.repository,
+            total_segments=self.total_segments,
+            page_size=self.page_size,
+            read_capacity_units_per_second=self.read_capacity,
+        )
+        started = time.perf_counter()
+        try:
+            async for _, page in use_case.execute():
+                for item in page.items:
+                    if "tax_id" in item:
+                        bloom.add(item["tax_id"])
+        except BaseException:
+            self.filter.abort_build()
+            raise
+        self.filter.finish_build()
+        logger.info(
+            "Tax id filter rebuilt with %d tax ids (%d bytes) in %.1fs",
+            len(bloom), bloom.size_bytes, time.perf_counter() - started,
+        )
+        return len(bloom)
+
+    async def run(self):
+        while True:
+            try:
+                await self.rebuild()
+            except Exception:
+                self.filter.stats.failures += 1
+                logger.exception("Failed to rebuild the tax id filter, keeping the current one")
+            if self.interval <= 0:
+                return
+            await asyncio.sleep(self.next_delay())
+
+    def start(self):
+        # Sem bloquear a subida: até o primeiro Scan terminar, todo CPF vai ao DynamoDB.
+        if self.filter is not None and self._task is None:
+            self._task = asyncio.create_task(self.run(), name="tax-id-filter")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
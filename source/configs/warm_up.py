@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+from source.configs.services import Services
+from source.configs.settings import Settings
+from source.helpers.process import is_alive
+from source.helpers.startup import StartupReport
+
+logger = logging.getLogger(__name__)
+
+MIN_RETRY_SECONDS = 0.5
+
+
+class WarmUpTask:
+
+    def __init__(self, settings: Settings, services: Services):
+        self.services = services
+        self.connections = settings.warmup_dynamodb_connections
+        self.tax_ids = settings.warmup_tax_ids
+        # Mesmo configurado com 0, o retry nunca vira um loop ocupado contra o DynamoDB.
+        self.retry_seconds = max(MIN_RETRY_SECONDS, settings.warmup_retry_seconds)
+        self.readiness_dir = Path(settings.warmup_readiness_dir) if settings.warmup_readiness_dir else None
+        self.expected_workers = settings.warmup_expected_workers
+        self.ready = False
+        self.attempts = 0
+        self.report: Optional[StartupReport] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def open_connections(self):
+        # Requisições simultâneas fazem o pool abrir várias conexões (TCP + TLS) antes do tráfego real.
+        await asyncio.gather(*(self.services.repository.ping() for _ in range(self.connections)))
+
+    async def sign_and_verify(self):
+        # Passa pelo executor configurado: cria a thread (ou o processo) e usa a chave uma primeira vez.
+        jwt_signer = self.services.jwt_signer
+        token = await jwt_signer.sign_async({"sub": "warm-up"})
+        await jwt_signer.verify_async(token)
+
+    async def preload_users(self):
+        semaphore = asyncio.Semaphore(max(1, self.connections))
+
+        async def preload(tax_id: str):
+            async with semaphore:
+                await self.services.repository.find_user_by_tax_id(tax_id)
+
+        await asyncio.gather(*(preload(tax_id) for tax_id in self.tax_ids))
+
+    async def warm_up(self):
+        report = StartupReport(name="Warm-up")
+
+        async def timed(name, step):
+            with report.step(name):
+                await step()
+
+        await asyncio.gather(
+            timed("dynamodb_connections", self.open_connections),
+            timed("sign_verify", self.sign_and_verify),
+            timed("preload_users", self.preload_users),
+        )
+        report.finish()
+        self.report = report
+        self.mark_ready()
+
+    @property
+    def marker(self) -> Optional[Path]:
+        if self.readiness_dir is None:
+            return None
+        return self.readiness_dir / str(os.getpid())
+
+    def mark_ready(self):
+        self.ready = True
+        if self.marker is not None:
+            self.readiness_dir.mkdir(parents=True, exist_ok=True)
+            self.marker.touch()
+
+    def ready_workers(self) -> int:
+        if self.readiness_dir is None or not self.readiness_dir.is_dir():
+            return int(self.ready)
+        count = 0
+        for path in self.readiness_dir.iterdir():
+            # marcadores de workers que já morreram (reiniciados pelo uvicorn) não contam
+            if path.name.isdigit() and is_alive(int(path.name)):
+                count += 1
+        return count
+
+    def is_ready(self) -> bool:
+        # Com --workers N, cada worker aquece no seu próprio lifespan e o ALB cai em qualquer um:
+        # /ready só fica verde quando os N workers deixaram o marcador no diretório compartilhado.
+        if not self.ready:
+            return False
+        if self.readiness_dir is None or self.expected_workers <= 1:
+            return True
+        return self.ready_workers() >= self.expected_workers
+
+    async def run(self):
+        while not self.ready:
+            self.attempts += 1
+            try:
+                await self.warm_up()
+            except Exception:
+                logger.exception("Warm-up attempt %d failed, retrying in %.1fs", self.attempts, self.retry_seconds)
+                await asyncio.sleep(self.retry_seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(), name="warm-up")
+
+    async def stop(self):
+        if self.marker is not None:
+            self.marker.unlink(missing_ok=True)
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
@@ -0,0 +1,14 @@
+import hmac
+from typing import Annotated, Optional
+
+from fastapi import Header, HTTPException, status
+
+from source.depends.app import DependsSecrets
+
+
+def require_admin_token(secrets: DependsSecrets, x_admin_token: Annotated[Optional[str], Header()] = None):
+    # Sem ADMIN_TOKEN no segredo, os endpoints de administração nem aparecem.
+    if not secrets.admin_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), secrets.admin_token.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid admin token")
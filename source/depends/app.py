@@ -3,9 +3,12 @@ from typing import Annotated, TypeAlias
 from fastapi.params import Depends
 from fastapi.requests import Request
 
+from source.configs.metrics import MetricsTask
+from source.configs.profiling import ProfilingTask
 from source.configs.secrets import Secrets
 from source.configs.services import Services
 from source.configs.settings import Settings
+from source.configs.warm_up import WarmUpTask
 
 
 def get_settings(request: Request):
@@ -33,3 +36,30 @@ def get_services(request: Request):
 
 
 DependsServices: TypeAlias = Annotated[Services, Depends(get_services)]
+
+
+def get_warm_up(request: Request):
+    if not hasattr(request.state, 'warm_up'):
+        raise RuntimeError('State warm_up has not been set in app.lifespan')
+    return request.state.warm_up
+
+
+DependsWarmUp: TypeAlias = Annotated[WarmUpTask, Depends(get_warm_up)]
+
+
+def get_metrics(request: Request):
+    if not hasattr(request.state, 'metrics'):
+        raise RuntimeError('State metrics has not been set in app.lifespan')
+    return request.state.metrics
+
+
+DependsMetrics: TypeAlias = Annotated[MetricsTask, Depends(get_metrics)]
+
+
+def get_profiling(request: Request):
+    if not hasattr(request.state, 'profiling'):
+        raise RuntimeError('State profiling has not been set in app.lifespan')
+    return request.state.profiling
+
+
+DependsProfiling: TypeAlias = Annotated[ProfilingTask, Depends(get_profiling)]
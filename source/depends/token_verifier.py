@@ -0,0 +1,15 @@
+from typing import Annotated, TypeAlias
+
+from fastapi import Depends
+
+from source.depends.app import DependsServices
+from source.helpers.jwt import CachedTokenVerifier
+
+
+def get_token_verifier(services: DependsServices):
+    if not services.token_verifier:
+        raise RuntimeError('Token Verifier has not been initialized in app.lifespan')
+    return services.token_verifier
+
+
+DependsTokenVerifier: TypeAlias = Annotated[CachedTokenVerifier, Depends(get_token_verifier)]
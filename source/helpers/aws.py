@@ -1,6 +1,17 @@
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
 import aioboto3
 import orjson
 
+from source.helpers.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
 
 async def get_aws_secrets(secret_name: str) -> dict:
     session = aioboto3.Session()
@@ -8,3 +19,109 @@ async def get_aws_secrets(secret_name: str) -> dict:
         get_secret_value_response = await client.get_secret_value(SecretId=secret_name)
         secret = get_secret_value_response['SecretString']
         return orjson.loads(secret)
+
+
+@dataclass
+class CachedSecret:
+    value: Any
+    version_id: Optional[str]
+    expires_at: float
+
+
+class SecretsCache:
+
+    def __init__(
+            self,
+            ttl: float = 60.0,
+            error_retry_seconds: float = 5.0,
+            version_stage: str = "AWSCURRENT",
+            region_name: Optional[str] = None,
+            endpoint_url: Optional[str] = None,
+            session: Optional[aioboto3.Session] = None,
+            clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.error_retry_seconds = error_retry_seconds
+        self.version_stage = version_stage
+        self.region_name = region_name
+        self.endpoint_url = endpoint_url
+        self.clock = clock
+        self.session = session or aioboto3.Session()
+        self.hits = 0
+        self.fetches = 0
+        self.parses = 0
+        self.stale_served = 0
+        self.refreshes = SingleFlight()
+        self._entries: dict[str, CachedSecret] = {}
+        self._client = None
+        self._client_lock = asyncio.Lock()
+        self._exit_stack: Optional[AsyncExitStack] = None
+
+    async def client(self):
+        # Um único client por processo: evita recriar sessão, credenciais e pool HTTP a cada leitura.
+        if self._client is not None:
+            return self._client
+        async with self._client_lock:
+            if self._client is None:
+                exit_stack = AsyncExitStack()
+                try:
+                    self._client = await exit_stack.enter_async_context(self.session.client(
+                        "secretsmanager",
+                        region_name=self.region_name,
+                        endpoint_url=self.endpoint_url,
+                    ))
+                except BaseException:
+                    await exit_stack.aclose()
+                    raise
+                self._exit_stack = exit_stack
+        return self._client
+
+    async def close(self):
+        if self._exit_stack is None:
+            return
+        exit_stack, self._exit_stack, self._client = self._exit_stack, None, None
+        await exit_stack.aclose()
+
+    def invalidate(self, secret_name: str):
+        entry = self._entries.get(secret_name)
+        if entry is not None:
+            # mantém o valor e a versão: a próxima leitura consulta o Secrets Manager, mas só re-parseia se mudou
+            entry.expires_at = 0.0
+
+    async def get(self, secret_name: str) -> Any:
+        entry = self._entries.get(secret_name)
+        if entry is not None and entry.expires_at > self.clock():
+            self.hits += 1
+            return entry.value
+
+        try:
+            return await self.refreshes.do(secret_name, lambda: self._refresh(secret_name))
+        except Exception:
+            if entry is None:
+                raise
+            # Secrets Manager indisponível: segue com o último valor conhecido e tenta de novo em breve.
+            entry.expires_at = self.clock() + self.error_retry_seconds
+            self.stale_served += 1
+            logger.warning("Failed to refresh secret %s, serving cached version %s",
+                           secret_name, entry.version_id, exc_info=True)
+            return entry.value
+
+    async def _refresh(self, secret_name: str) -> Any:
+        client = await self.client()
+        response = await client.get_secret_value(SecretId=secret_name, VersionStage=self.version_stage)
+        self.fetches += 1
+
+        version_id = response.get("VersionId")
+        entry = self._entries.get(secret_name)
+        if entry is not None and version_id is not None and entry.version_id == version_id:
+            entry.expires_at = self.clock() + self.ttl
+            return entry.value
+
+        value = orjson.loads(response["SecretString"])
+        self.parses += 1
+        self._entries[secret_name] = CachedSecret(
+            value=value,
+            version_id=version_id,
+            expires_at=self.clock() + self.ttl,
+        )
+        return value
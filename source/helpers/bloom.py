@@ -0,0 +1,136 @@
+import hashlib
+import math
+import time
+from dataclasses import dataclass, asdict
+from typing import Callable, Optional
+
+
+class BloomFilter:
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        if capacity <= 0:
+            raise ValueError("capacity must be greater than zero")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        # Tamanho ótimo para capacity itens: m = -n ln p / (ln 2)² bits e k = (m / n) ln 2 hashes.
+        # Com 1% são ~9,6 bits (1,2 byte) por CPF: um milhão de CPFs cabem em 1,2 MB.
+        self.bit_count = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.bit_count / capacity * math.log(2)))
+        self.bits = bytearray((self.bit_count + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        # Hashing duplo (Kirsch-Mitzenmacher): um único blake2b de 128 bits gera as k posições.
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + index * second) % self.bit_count for index in range(self.hash_count))
+
+    def add(self, key: str):
+        changed = False
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                changed = True
+        # Um CPF adicionado de novo não muda nenhum bit: count fica perto do número de CPFs distintos.
+        if changed:
+            self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.bits)
+
+    def estimated_false_positive_rate(self) -> float:
+        # (1 - e^(-kn/m))^k: passa de error_rate quando a tabela cresce além de capacity.
+        return (1 - math.exp(-self.hash_count * self.count / self.bit_count)) ** self.hash_count
+
+
+@dataclass
+class TaxIdFilterStats:
+    rejected: int = 0
+    passed: int = 0
+    false_positives: int = 0
+    rebuilds: int = 0
+    failures: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class TaxIdFilter:
+
+    def __init__(
+            self,
+            capacity: int,
+            error_rate: float = 0.01,
+            max_age: Optional[float] = None,
+            clock: Callable[[], float] = time.monotonic,
+    ):
+        if capacity <= 0:
+            raise ValueError("capacity must be greater than zero")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.max_age = max_age
+        self.clock = clock
+        self.stats = TaxIdFilterStats()
+        self.current: Optional[BloomFilter] = None
+        self.built_at: Optional[float] = None
+        self._building: Optional[BloomFilter] = None
+
+    @property
+    def ready(self) -> bool:
+        # Um filtro que não é refeito há max_age (o Scan vem falhando) deixa de ser usado:
+        # cadastros de outros processos não chegam até ele, e um "não" poderia estar errado.
+        if self.current is None:
+            return False
+        return self.max_age is None or self.clock() - self.built_at <= self.max_age
+
+    @property
+    def size_bytes(self) -> int:
+        # Durante o rebuild os dois filtros ficam em memória.
+        return sum(bloom.size_bytes for bloom in (self.current, self._building) if bloom is not None)
+
+    def check(self, tax_id: str) -> Optional[bool]:
+        # None: filtro fora de uso, o DynamoDB decide. False: o CPF com certeza não está cadastrado.
+        if not self.ready:
+            return None
+        if tax_id in self.current:
+            self.stats.passed += 1
+            return True
+        self.stats.rejected += 1
+        return False
+
+    def record_false_positive(self):
+        self.stats.false_positives += 1
+
+    def add(self, tax_id: str):
+        # Vai também para o filtro em construção: um cadastro feito durante o Scan, em uma
+        # parte da tabela que o segmento já leu, não some na troca.
+        for bloom in (self.current, self._building):
+            if bloom is not None:
+                bloom.add(tax_id)
+
+    def begin_build(self) -> BloomFilter:
+        # Com a tabela maior que a capacidade configurada, o próximo filtro cresce junto (25% de folga).
+        previous = len(self.current) if self.current is not None else 0
+        self._building = BloomFilter(max(self.capacity, math.ceil(previous * 1.25)), self.error_rate)
+        return self._building
+
+    def finish_build(self):
+        self.current, self._building = self._building, None
+        self.built_at = self.clock()
+        self.stats.rebuilds += 1
+
+    def abort_build(self):
+        self._building = None
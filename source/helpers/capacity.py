@@ -0,0 +1,34 @@
+import asyncio
+import time
+from typing import Callable
+
+
+class CapacityBudget:
+
+    def __init__(self, units_per_second: float, clock: Callable[[], float] = time.monotonic):
+        if units_per_second <= 0:
+            raise ValueError("units_per_second must be greater than zero")
+        self.rate = units_per_second
+        self.clock = clock
+        self.tokens = units_per_second
+        self.updated = clock()
+        self.waited = 0.0
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def wait(self):
+        # O consumo de uma chamada só é conhecido depois dela: o saldo pode ficar negativo, e a
+        # próxima chamada espera até ele voltar a zero. Na média, a vazão fica dentro do orçamento.
+        self._refill()
+        while self.tokens < 0:
+            delay = -self.tokens / self.rate
+            self.waited += delay
+            await asyncio.sleep(delay)
+            self._refill()
+
+    def consume(self, units: float):
+        self._refill()
+        self.tokens -= units
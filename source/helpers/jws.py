@@ -0,0 +1,105 @@
+import binascii
+import json
+from typing import Optional
+
+import orjson
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, padding, rsa
+from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature
+
+_URLSAFE = bytes.maketrans(b"+/", b"-_")
+
+
+def base64url_encode(data: bytes) -> bytes:
+    return binascii.b2a_base64(data, newline=False).translate(_URLSAFE).rstrip(b"=")
+
+
+def encode_json(value: dict) -> bytes:
+    # Mesmo formato do jwcrypto (json.dumps com sort_keys e ensure_ascii) para gerar tokens idênticos.
+    try:
+        encoded = orjson.dumps(value, option=orjson.OPT_SORT_KEYS)
+    except TypeError:
+        encoded = None
+    if encoded is not None and encoded.isascii():
+        return encoded
+    return json.dumps(value, separators=(",", ":"), sort_keys=True).encode()
+
+
+class JwsSigner:
+    algorithm: str
+    key_type: type
+
+    def __init__(self, private_key, header: Optional[dict] = None):
+        if not isinstance(private_key, self.key_type):
+            raise ValueError(f"Algorithm '{self.algorithm}' cannot be used with a {type(private_key).__name__}")
+        self.private_key = private_key
+        self.header = {**(header or {}), "alg": self.algorithm}
+        self.signing_input_prefix = base64url_encode(encode_json(self.header)) + b"."
+
+    def sign_bytes(self, signing_input: bytes) -> bytes:
+        raise NotImplementedError
+
+    def sign(self, claims: dict) -> str:
+        signing_input = self.signing_input_prefix + base64url_encode(encode_json(claims))
+        signature = self.sign_bytes(signing_input)
+        return b".".join((signing_input, base64url_encode(signature))).decode("ascii")
+
+
+class RS256Signer(JwsSigner):
+    algorithm = "RS256"
+    key_type = rsa.RSAPrivateKey
+
+    def sign_bytes(self, signing_input: bytes) -> bytes:
+        return self.private_key.sign(signing_input, padding.PKCS1v15(), hashes.SHA256())
+
+
+class PS256Signer(JwsSigner):
+    algorithm = "PS256"
+    key_type = rsa.RSAPrivateKey
+    _padding = padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=hashes.SHA256.digest_size)
+
+    def sign_bytes(self, signing_input: bytes) -> bytes:
+        return self.private_key.sign(signing_input, self._padding, hashes.SHA256())
+
+
+class ES256Signer(JwsSigner):
+    algorithm = "ES256"
+    key_type = ec.EllipticCurvePrivateKey
+
+    def __init__(self, private_key, header: Optional[dict] = None):
+        super().__init__(private_key, header)
+        if not isinstance(private_key.curve, ec.SECP256R1):
+            raise ValueError(f"Algorithm 'ES256' requires a P-256 key, got {private_key.curve.name}")
+
+    def sign_bytes(self, signing_input: bytes) -> bytes:
+        # JWS usa r || s com tamanho fixo, não a assinatura DER do cryptography
+        r, s = decode_dss_signature(self.private_key.sign(signing_input, ec.ECDSA(hashes.SHA256())))
+        return r.to_bytes(32, "big") + s.to_bytes(32, "big")
+
+
+class EdDSASigner(JwsSigner):
+    algorithm = "EdDSA"
+    key_type = ed25519.Ed25519PrivateKey
+
+    def sign_bytes(self, signing_input: bytes) -> bytes:
+        return self.private_key.sign(signing_input)
+
+
+SIGNERS = {signer.algorithm: signer for signer in (RS256Signer, PS256Signer, ES256Signer, EdDSASigner)}
+
+
+def default_algorithm(key) -> str:
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return RS256Signer.algorithm
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)):
+        return ES256Signer.algorithm
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return EdDSASigner.algorithm
+    raise ValueError(f"Unsupported key type {type(key).__name__}")
+
+
+def new_jws_signer(private_key, algorithm: Optional[str] = None, header: Optional[dict] = None) -> JwsSigner:
+    algorithm = algorithm or default_algorithm(private_key)
+    if algorithm not in SIGNERS:
+        raise ValueError(f"Invalid algorithm '{algorithm}'. Must be one of: {list(SIGNERS)}")
+    return SIGNERS[algorithm](private_key, header=header)
@@ -1,16 +1,362 @@
+import asyncio
+import functools
+import hashlib
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Callable, Optional, Sequence
+
+import orjson
+from cryptography.hazmat.primitives import serialization
 from jwcrypto import jwt, jwk
+from jwcrypto.common import JWException
+
+from source.helpers.cache import TTLCache
+from source.helpers.jws import JwsSigner, default_algorithm, new_jws_signer
+from source.helpers.metrics import JWT_SIGN_SECONDS
+
+SIGNING_EXECUTORS = ("inline", "thread", "process")
+
+
+def sign_with_jwcrypto(private_key: jwk.JWK, payload: dict, algorithm: str = "RS256", kid: Optional[str] = None) -> str:
+    header = {"alg": algorithm}
+    if kid is not None:
+        header["kid"] = kid
+    token = jwt.JWT(header=header, claims=payload)
+    token.make_signed_token(private_key)
+    return token.serialize()
+
+
+def load_jwk(pem: str, kid: Optional[str] = None) -> jwk.JWK:
+    key = jwk.JWK()
+    key.import_from_pem(pem.encode())
+    key["kid"] = kid or key.thumbprint()
+    return key
+
+
+def load_signing_key(
+        pem: str,
+        kid: Optional[str] = None,
+        algorithm: Optional[str] = None,
+) -> tuple[jwk.JWK, JwsSigner]:
+    # O PEM é parseado e validado uma única vez (~50 ms para RSA 2048): o signer usa a chave do
+    # cryptography direto, em vez de get_op_key("sign"), que reconstruiria e validaria a chave de novo.
+    op_key = serialization.load_pem_private_key(pem.encode(), password=None)
+    private_key = jwk.JWK.from_pyca(op_key)
+    private_key["kid"] = kid or private_key.thumbprint()
+    return private_key, new_jws_signer(op_key, algorithm=algorithm, header={"kid": private_key["kid"]})
+
+
+@functools.lru_cache(maxsize=4)
+def _load_signer(private_key: str, algorithm: str, kid: str) -> JwsSigner:
+    return load_signing_key(private_key, kid=kid, algorithm=algorithm)[1]
+
+
+def _sign_in_process(private_key: str, algorithm: str, kid: str, payload: dict) -> str:
+    # Executado no processo do pool: a chave é parseada uma vez por processo e por PEM.
+    return _load_signer(private_key, algorithm, kid).sign(payload)
+
+
+@functools.lru_cache(maxsize=4)
+def _load_verification_keys(keys: str) -> jwk.JWKSet:
+    return jwk.JWKSet.from_json(keys)
+
+
+def _verify_in_process(keys: str, algorithms: tuple, token: str) -> str:
+    # Só as chaves públicas vão para o processo do pool; o JWKSet é reconstruído uma vez por conjunto.
+    return jwt.JWT(jwt=token, key=_load_verification_keys(keys), algs=list(algorithms)).claims
+
+
+def public_jwk(private_key: jwk.JWK, algorithm: str, kid: str) -> dict:
+    return {**private_key.export_public(as_dict=True), "kid": kid, "alg": algorithm, "use": "sig"}
+
+
+@dataclass(frozen=True)
+class JwksDocument:
+    body: bytes
+    etag: str
+    headers: dict
+
+    @classmethod
+    def from_keys(cls, keys: list, max_age: int) -> "JwksDocument":
+        # Serializado uma única vez: a rota só devolve os bytes prontos.
+        body = orjson.dumps({"keys": keys})
+        etag = f'"{hashlib.sha256(body).hexdigest()}"'
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+        return cls(body=body, etag=etag, headers=headers)
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        if not if_none_match:
+            return False
+        for candidate in if_none_match.split(","):
+            candidate = candidate.strip()
+            if candidate == "*" or candidate.removeprefix("W/") == self.etag:
+                return True
+        return False
+
+
+@dataclass(frozen=True)
+class JwtKeyMaterial:
+    key: str
+    kid: Optional[str] = None
+    algorithm: Optional[str] = None
+
+
+class JwtKeySet:
+
+    def __init__(
+            self,
+            signing_key: JwtKeyMaterial,
+            verification_keys: Sequence[JwtKeyMaterial] = (),
+            jwks_max_age: int = 300,
+    ):
+        self.signing_key_pem = signing_key.key
+        self.private_key, self.signer = load_signing_key(
+            signing_key.key,
+            kid=signing_key.kid,
+            algorithm=signing_key.algorithm,
+        )
+
+        # A chave de assinatura vem sempre primeiro no JWKS; as antigas seguem a ordem do secret.
+        ordered = [self.private_key]
+        self.algorithms = {self.kid: self.algorithm}
+        for material in verification_keys:
+            key = load_jwk(material.key, kid=material.kid)
+            if key["kid"] in self.algorithms:
+                continue
+            self.algorithms[key["kid"]] = material.algorithm or default_algorithm(key.get_op_key("verify"))
+            ordered.append(key)
+
+        self.keys = jwk.JWKSet()
+        for key in ordered:
+            self.keys.add(key)
+        self.verification_algorithms = tuple(sorted(set(self.algorithms.values())))
+        self.public_keys = self.keys.export(private_keys=False)
+        self.jwks = JwksDocument.from_keys(
+            [public_jwk(key, algorithm=self.algorithms[key["kid"]], kid=key["kid"]) for key in ordered],
+            max_age=jwks_max_age,
+        )
+
+    @property
+    def algorithm(self) -> str:
+        return self.signer.algorithm
+
+    @property
+    def kid(self) -> str:
+        return self.signer.header["kid"]
+
+    def verify(self, token_str: str) -> str:
+        token = jwt.JWT(jwt=token_str, key=self.keys, algs=list(self.verification_algorithms))
+        return token.claims
 
 
 class JwtSignatureProvider:
 
-    def __init__(self, private_key: str):
-        self.private_key = jwk.JWK.from_pem(private_key.encode())
+    def __init__(
+            self,
+            private_key: str,
+            algorithm: Optional[str] = None,
+            kid: Optional[str] = None,
+            verification_keys: Sequence[JwtKeyMaterial] = (),
+            executor_type: str = "inline",
+            max_workers: int = 1,
+            expires_in: int = 3600,
+            include_iat: bool = True,
+            include_nbf: bool = True,
+            not_before_skew: int = 0,
+            token_cache: Optional[TTLCache] = None,
+            reuse_min_remaining_ratio: float = 0.5,
+            jwks_max_age: int = 300,
+            clock: Callable[[], float] = time.time,
+    ):
+        if executor_type not in SIGNING_EXECUTORS:
+            raise ValueError(f"Invalid executor_type '{executor_type}'. Must be one of: {list(SIGNING_EXECUTORS)}")
+        self.algorithm_override = algorithm
+        self.jwks_max_age = jwks_max_age
+        self.key_set = self.new_key_set(
+            JwtKeyMaterial(key=private_key, kid=kid),
+            verification_keys=verification_keys,
+        )
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.expires_in = expires_in
+        self.include_iat = include_iat
+        self.include_nbf = include_nbf
+        self.not_before_skew = not_before_skew
+        self.token_cache = token_cache
+        self.reuse_min_remaining_ratio = reuse_min_remaining_ratio
+        self.clock = clock
+        self._executor: Optional[Executor] = None
+
+    @property
+    def reuse_window(self) -> float:
+        # Um token é reaproveitado enquanto ainda lhe resta mais que a fração configurada da validade.
+        if self.expires_in <= 0:
+            return 0.0
+        return self.expires_in * max(0.0, 1.0 - self.reuse_min_remaining_ratio)
+
+    @property
+    def executor(self) -> Optional[Executor]:
+        if self._executor is None and self.executor_type == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="jwt-signer")
+        elif self._executor is None and self.executor_type == "process":
+            # multiprocessing só é importado no modo process, fora do startup dos demais modos
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("forkserver"),
+            )
+        return self._executor
+
+    def new_key_set(
+            self,
+            signing_key: JwtKeyMaterial,
+            verification_keys: Sequence[JwtKeyMaterial] = (),
+    ) -> JwtKeySet:
+        if signing_key.algorithm is None and self.algorithm_override is not None:
+            signing_key = replace(signing_key, algorithm=self.algorithm_override)
+        return JwtKeySet(signing_key, verification_keys=verification_keys, jwks_max_age=self.jwks_max_age)
+
+    def load_keys(self, key_set: JwtKeySet):
+        # Troca atômica: quem já pegou a referência antiga termina de assinar com ela.
+        self.key_set = key_set
+        if self.token_cache is not None:
+            self.token_cache.clear()
+
+    @property
+    def private_key(self) -> jwk.JWK:
+        return self.key_set.private_key
+
+    @property
+    def signer(self) -> JwsSigner:
+        return self.key_set.signer
+
+    @property
+    def algorithm(self) -> str:
+        return self.key_set.algorithm
+
+    @property
+    def kid(self) -> str:
+        return self.key_set.kid
+
+    @property
+    def jwks(self) -> JwksDocument:
+        return self.key_set.jwks
 
     def sign(self, payload: dict) -> str:
-        token = jwt.JWT(header={"alg": "RS256"}, claims=payload)
-        token.make_signed_token(self.private_key)
-        return token.serialize()
+        return self.key_set.signer.sign(payload)
 
-    def verify(self, token_str: str) -> dict:
-        token = jwt.JWT(jwt=token_str, key=self.private_key)
-        return token.claims
+    async def sign_async(self, payload: dict) -> str:
+        return await self._sign_with(self.key_set, payload)
+
+    async def _sign_with(self, key_set: JwtKeySet, payload: dict) -> str:
+        with JWT_SIGN_SECONDS.time(self.executor_type):
+            return await self._sign_in_executor(key_set, payload)
+
+    async def _sign_in_executor(self, key_set: JwtKeySet, payload: dict) -> str:
+        if self.executor_type == "inline":
+            return key_set.signer.sign(payload)
+
+        loop = asyncio.get_running_loop()
+        if self.executor_type == "process":
+            return await loop.run_in_executor(
+                self.executor, _sign_in_process, key_set.signing_key_pem, key_set.algorithm, key_set.kid, payload
+            )
+        return await loop.run_in_executor(self.executor, key_set.signer.sign, payload)
+
+    def time_claims(self, now: int) -> dict:
+        claims = {}
+        if self.include_iat:
+            claims["iat"] = now
+        if self.include_nbf:
+            claims["nbf"] = now - self.not_before_skew
+        if self.expires_in > 0:
+            claims["exp"] = now + self.expires_in
+        return claims
+
+    async def issue(self, claims: dict) -> str:
+        cache_key = claims.get("sub")
+        use_cache = self.token_cache is not None and cache_key is not None and self.reuse_window > 0
+
+        if use_cache:
+            cached = self.token_cache.get(cache_key)
+            # Se o registro do usuário mudou, as claims mudam e o token antigo é descartado.
+            if cached is not None and cached[0] == claims:
+                return cached[1]
+
+        payload = {**claims, **self.time_claims(int(self.clock()))}
+        key_set = self.key_set
+        token = await self._sign_with(key_set, payload)
+
+        # Se load_keys() trocou as chaves durante a assinatura, o token (com o kid antigo) não vai
+        # para o cache: a chave antiga pode nem estar mais entre as de verificação.
+        if use_cache and self.key_set is key_set:
+            self.token_cache.set(cache_key, (dict(claims), token), ttl=self.reuse_window)
+        return token
+
+    def invalidate(self, subject: str):
+        if self.token_cache is not None:
+            self.token_cache.invalidate(subject)
+
+    def verify(self, token_str: str) -> str:
+        return self.key_set.verify(token_str)
+
+    async def verify_async(self, token_str: str) -> str:
+        # Mesmo executor da assinatura: a verificação RSA não roda no event loop.
+        key_set = self.key_set
+        if self.executor_type == "inline":
+            return key_set.verify(token_str)
+
+        loop = asyncio.get_running_loop()
+        if self.executor_type == "process":
+            return await loop.run_in_executor(
+                self.executor, _verify_in_process, key_set.public_keys, key_set.verification_algorithms, token_str
+            )
+        return await loop.run_in_executor(self.executor, key_set.verify, token_str)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+class CachedTokenVerifier:
+
+    def __init__(
+            self,
+            jwt_signer: JwtSignatureProvider,
+            cache: Optional[TTLCache] = None,
+            clock: Callable[[], float] = time.time,
+    ):
+        self.jwt_signer = jwt_signer
+        self.cache = cache
+        self.clock = clock
+
+    async def introspect(self, token: str) -> Optional[dict]:
+        digest = hashlib.sha256(token.encode()).digest()
+        now = self.clock()
+
+        if self.cache is not None:
+            claims = self.cache.get(digest)
+            if claims is not None and self._is_current(claims, now):
+                return claims
+
+        try:
+            claims = orjson.loads(await self.jwt_signer.verify_async(token))
+        except (JWException, ValueError):
+            return None
+        # O jwcrypto aceita 60 s de tolerância em exp/nbf: aplica a mesma regra estrita do cache.
+        if not self._is_current(claims, now):
+            return None
+
+        if self.cache is not None:
+            ttl = self.cache.ttl
+            if "exp" in claims:
+                ttl = min(ttl, claims["exp"] - now)
+            self.cache.set(digest, claims, ttl=ttl)
+        return claims
+
+    @staticmethod
+    def _is_current(claims: dict, now: float) -> bool:
+        return claims.get("exp", now + 1) > now and claims.get("nbf", now) <= now
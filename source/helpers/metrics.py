@@ -0,0 +1,360 @@
+import bisect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterable, Optional, Sequence
+
+# Latências de um serviço que responde em milissegundos: 0,5 ms a 5 s.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# Os instrumentos não têm lock: cada worker registra tudo no próprio event loop (uma thread só),
+# então somar em uma lista ou dict custa o mesmo que um contador local. Quem roda em executor
+# (assinatura, verificação) é medido por quem espera o resultado, de volta no loop.
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: dict[tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self._series[labels] = self._series.get(labels, 0.0) + amount
+
+    def set(self, value: float, *labels: str):
+        # Para totais mantidos em outro lugar (CacheStats, SingleFlight), copiados na coleta.
+        self._series[labels] = float(value)
+
+    def value(self, *labels: str) -> float:
+        return self._series.get(labels, 0.0)
+
+    def snapshot(self) -> dict:
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "series": [[list(labels), value] for labels, value in self._series.items()],
+        }
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Sequence[str] = (),
+            buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # por série: contagem de cada bucket (não acumulada), o bucket +Inf e, no fim, a soma
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def snapshot(self) -> dict:
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "buckets": list(self.buckets),
+            "series": [[list(labels), list(values)] for labels, values in self._series.items()],
+        }
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self._metrics: dict[str, Counter | Gauge | Histogram] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Sequence[str] = (),
+            buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str):
+        return self._metrics[name]
+
+    def snapshot(self) -> dict:
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+
+def merge_snapshots(snapshots: Iterable[dict]) -> dict:
+    # Soma série a série: é assim que os N workers do uvicorn viram um único /metrics.
+    merged: dict[str, dict] = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, "series": {}})
+            for labels, values in metric["series"]:
+                key = tuple(labels)
+                current = target["series"].get(key)
+                if current is None:
+                    target["series"][key] = values
+                elif metric["type"] == "histogram":
+                    target["series"][key] = [a + b for a, b in zip(current, values)]
+                else:
+                    target["series"][key] = current + values
+    for metric in merged.values():
+        metric["series"] = [[list(labels), values] for labels, values in metric["series"].items()]
+    return merged
+
+
+def render(snapshot: dict) -> str:
+    lines = []
+    for name, metric in snapshot.items():
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        labelnames = metric["labelnames"]
+        for labels, values in metric["series"]:
+            pairs = list(zip(labelnames, labels))
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_labels(pairs)} {_number(values)}")
+                continue
+            cumulative = 0
+            for bound, count in zip([*metric["buckets"], "+Inf"], values[:-1]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels([*pairs, ('le', _number(bound))])} {cumulative}")
+            lines.append(f"{name}_sum{_labels(pairs)} {_number(values[-1])}")
+            lines.append(f"{name}_count{_labels(pairs)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def _labels(pairs) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value) -> str:
+    if isinstance(value, str):
+        return value
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+@dataclass
+class DynamoDBUsage:
+    calls: int = 0
+    read_units: float = 0.0
+    write_units: float = 0.0
+
+
+# Chamadas e capacidade do DynamoDB da requisição HTTP em andamento. Uma consulta compartilhada
+# pelo single-flight conta só para a requisição que a iniciou (a task herda o contexto dela).
+REQUEST_DYNAMODB_USAGE: ContextVar[Optional[DynamoDBUsage]] = ContextVar("request_dynamodb_usage", default=None)
+
+DYNAMODB_WRITE_OPERATIONS = frozenset({"put_item", "transact_write", "batch_write"})
+
+
+def record_dynamodb_call(operation: str, response: Optional[dict] = None):
+    # ConsumedCapacity só vem quando o repositório pede ReturnConsumedCapacity; sem isso, conta só a chamada.
+    units = consumed_units(response.get("ConsumedCapacity")) if response else 0.0
+    capacity = "write" if operation in DYNAMODB_WRITE_OPERATIONS else "read"
+    if units:
+        DYNAMODB_CAPACITY.inc(operation, capacity, amount=units)
+    usage = REQUEST_DYNAMODB_USAGE.get()
+    if usage is None:
+        return
+    usage.calls += 1
+    if capacity == "write":
+        usage.write_units += units
+    else:
+        usage.read_units += units
+
+
+def consumed_units(consumed) -> float:
+    # TransactWriteItems e BatchWriteItem devolvem uma lista, uma entrada por tabela
+    if not consumed:
+        return 0.0
+    if isinstance(consumed, list):
+        return sum(float(item.get("CapacityUnits", 0)) for item in consumed)
+    return float(consumed.get("CapacityUnits", 0))
+
+
+class MetricsMiddleware:
+    # ASGI puro: não passa pelo BaseHTTPMiddleware do Starlette, que cria tasks e filas por requisição.
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        usage = DynamoDBUsage()
+        token = REQUEST_DYNAMODB_USAGE.set(usage)
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # O path do template (/auth), não o da URL: cardinalidade fixa mesmo com scanners batendo no ALB.
+            route = getattr(scope.get("route"), "path", "unmatched")
+            labels = (scope["method"], route, str(status_code))
+            REQUEST_SECONDS.observe(time.perf_counter() - started, *labels)
+            RESPONSES.inc(*labels)
+            REQUEST_DYNAMODB_USAGE.reset(token)
+            if usage.calls:
+                REQUEST_DYNAMODB_CALLS.inc(*labels, amount=usage.calls)
+            if usage.read_units:
+                REQUEST_DYNAMODB_CAPACITY.inc(*labels, "read", amount=usage.read_units)
+            if usage.write_units:
+                REQUEST_DYNAMODB_CAPACITY.inc(*labels, "write", amount=usage.write_units)
+
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "auth_request_duration_seconds",
+    "Tempo total da requisição HTTP, do primeiro byte recebido ao último enviado",
+    ("method", "route", "status"),
+)
+RESPONSES = REGISTRY.counter(
+    "auth_http_responses_total",
+    "Respostas HTTP por rota e status (404 = CPF não cadastrado, 409 = CPF duplicado)",
+    ("method", "route", "status"),
+)
+DYNAMODB_SECONDS = REGISTRY.histogram(
+    "auth_dynamodb_duration_seconds",
+    "Tempo de cada chamada ao DynamoDB",
+    ("operation",),
+)
+DYNAMODB_CAPACITY = REGISTRY.counter(
+    "auth_dynamodb_consumed_capacity_units_total",
+    "Unidades de capacidade consumidas (ReturnConsumedCapacity) por operação",
+    ("operation", "capacity"),
+)
+REQUEST_DYNAMODB_CALLS = REGISTRY.counter(
+    "auth_request_dynamodb_calls_total",
+    "Chamadas ao DynamoDB feitas pelas requisições HTTP, por rota e status",
+    ("method", "route", "status"),
+)
+REQUEST_DYNAMODB_CAPACITY = REGISTRY.counter(
+    "auth_request_dynamodb_capacity_units_total",
+    "Unidades de capacidade do DynamoDB consumidas pelas requisições HTTP, por rota e status",
+    ("method", "route", "status", "capacity"),
+)
+JWT_SIGN_SECONDS = REGISTRY.histogram(
+    "auth_jwt_sign_duration_seconds",
+    "Tempo da assinatura do JWT, incluindo a espera pelo executor",
+    ("executor",),
+)
+SERIALIZATION_SECONDS = REGISTRY.histogram(
+    "auth_response_serialization_seconds",
+    "Tempo de serialização do corpo da resposta em JSON",
+    ("method", "route"),
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005),
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "auth_cache_requests_total",
+    "Consultas aos caches em memória por resultado (hit, miss)",
+    ("cache", "result"),
+)
+CACHE_EVICTIONS = REGISTRY.counter(
+    "auth_cache_evictions_total",
+    "Entradas removidas dos caches em memória por limite de tamanho",
+    ("cache",),
+)
+CACHE_ENTRIES = REGISTRY.gauge(
+    "auth_cache_entries",
+    "Entradas atualmente nos caches em memória (soma dos workers)",
+    ("cache",),
+)
+LOOP_LAG_SECONDS = REGISTRY.histogram(
+    "auth_event_loop_lag_seconds",
+    "Atraso do event loop para acordar um sleep: tempo em que outro código segurou o loop",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+LOOP_BLOCKS = REGISTRY.counter(
+    "auth_event_loop_blocks_total",
+    "Vezes em que o atraso do event loop passou de loop_block_threshold_seconds",
+)
+COALESCED_LOOKUPS = REGISTRY.counter(
+    "auth_user_lookups_coalesced_total",
+    "Buscas de usuário por CPF atendidas por uma consulta já em andamento (single-flight)",
+)
+TAX_ID_FILTER_LOOKUPS = REGISTRY.counter(
+    "auth_tax_id_filter_lookups_total",
+    "Consultas ao filtro de CPFs: rejected (404 sem DynamoDB), passed e false_positive (passou e não existia)",
+    ("result",),
+)
+TAX_ID_FILTER_REBUILDS = REGISTRY.counter(
+    "auth_tax_id_filter_rebuilds_total",
+    "Montagens do filtro de CPFs com Scan paralelo por resultado (success, failure)",
+    ("result",),
+)
+TAX_ID_FILTER_READY = REGISTRY.gauge(
+    "auth_tax_id_filter_ready",
+    "Workers com o filtro de CPFs em uso (montado e não vencido)",
+)
+TAX_ID_FILTER_ITEMS = REGISTRY.gauge(
+    "auth_tax_id_filter_items",
+    "CPFs no filtro em uso (soma dos workers)",
+)
+TAX_ID_FILTER_BYTES = REGISTRY.gauge(
+    "auth_tax_id_filter_bytes",
+    "Memória dos filtros de CPFs, incluindo o que está sendo montado (soma dos workers)",
+)
+TAX_ID_FILTER_ESTIMATED_FALSE_POSITIVE_RATE = REGISTRY.gauge(
+    "auth_tax_id_filter_estimated_false_positive_rate",
+    "Taxa de falsos positivos estimada pelo preenchimento do filtro (soma dos workers: dividir pelo _ready)",
+)
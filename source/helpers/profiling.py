@@ -0,0 +1,196 @@
+import cProfile
+import marshal
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Callable, Iterable, Optional
+
+PROFILE_MODES = ("cprofile", "stacks")
+
+
+@dataclass
+class ProfilingSession:
+    mode: str
+    sample_every: int
+    started_at: float
+    until: float
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class StackSampler:
+    # Amostra a pilha da thread do event loop a cada intervalo, no formato "collapsed" dos flame graphs.
+
+    def __init__(self, thread_id: int, interval: float, stacks: Counter):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = stacks
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self.run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+
+def collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class RequestProfiler:
+
+    def __init__(self, stack_interval: float = 0.005, clock: Callable[[], float] = time.time):
+        self.stack_interval = stack_interval
+        self.clock = clock
+        self.session: Optional[ProfilingSession] = None
+        self.requests = 0
+        self.sampled = 0
+        self.skipped = 0
+        self.stats: dict = {}
+        self.stacks: Counter = Counter()
+        self._profiling = False
+        self._sampler: Optional[StackSampler] = None
+
+    @property
+    def enabled(self) -> bool:
+        # Quando nada está ligado, é a única checagem no caminho de cada requisição.
+        return self.session is not None and not self.expire()
+
+    def expire(self) -> bool:
+        if self.session is not None and self.clock() >= self.session.until:
+            self.stop()
+            return True
+        return False
+
+    def start(self, session: ProfilingSession):
+        if session.mode not in PROFILE_MODES:
+            raise ValueError(f"Invalid profiling mode '{session.mode}'. Must be one of: {list(PROFILE_MODES)}")
+        self.stop()
+        self.reset()
+        self.session = session
+        if session.mode == "stacks":
+            # chamado no event loop: a thread amostrada é a do loop
+            self._sampler = StackSampler(threading.get_ident(), self.stack_interval, self.stacks)
+            self._sampler.start()
+
+    def stop(self):
+        # Encerra a coleta, mas mantém o resultado disponível para download.
+        self.session = None
+        if self._sampler is not None:
+            sampler, self._sampler = self._sampler, None
+            sampler.stop()
+
+    def reset(self):
+        self.requests = 0
+        self.sampled = 0
+        self.skipped = 0
+        self.stats = {}
+        self.stacks = Counter()
+
+    def should_profile(self) -> bool:
+        if self.session.mode != "cprofile":
+            return False
+        self.requests += 1
+        if self.requests % self.session.sample_every:
+            return False
+        if self._profiling:
+            # Um cProfile por thread: enquanto uma requisição é perfilada, as outras amostras são puladas.
+            self.skipped += 1
+            return False
+        return True
+
+    @contextmanager
+    def profile(self):
+        # O profiler fica ligado enquanto a requisição espera I/O, então também registra
+        # o que outras corrotinas executaram no loop nesse meio-tempo.
+        self._profiling = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            self._profiling = False
+            self.sampled += 1
+            self.stats = merge_stats([self.stats, pstats.Stats(profiler).stats])
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "session": None if self.session is None else self.session.as_dict(),
+            "requests": self.requests,
+            "sampled": self.sampled,
+            "skipped": self.skipped,
+            "stack_samples": sum(self.stacks.values()),
+        }
+
+    def dump(self, mode: str) -> bytes:
+        if mode == "cprofile":
+            return dump_stats(self.stats)
+        return dump_stacks(self.stacks)
+
+
+def merge_stats(stats: Iterable[dict]) -> dict:
+    # Mesma soma de pstats.Stats.add, sem precisar de um objeto Stats (ou arquivo) por worker.
+    merged: dict = {}
+    for item in stats:
+        for func, stat in item.items():
+            merged[func] = pstats.add_func_stats(merged[func], stat) if func in merged else stat
+    return merged
+
+
+def dump_stats(stats: dict) -> bytes:
+    # Mesmo formato de pstats.Stats.dump_stats: abre com pstats.Stats(arquivo) ou snakeviz.
+    return marshal.dumps(stats)
+
+
+def load_stats(data: bytes) -> dict:
+    return marshal.loads(data)
+
+
+def dump_stacks(stacks: Counter) -> bytes:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common()).encode()
+
+
+def load_stacks(data: bytes) -> Counter:
+    stacks = Counter()
+    for line in data.decode().splitlines():
+        stack, _, count = line.rpartition(" ")
+        stacks[stack] += int(count)
+    return stacks
+
+
+class ProfilingMiddleware:
+
+    def __init__(self, app, profiler: Optional[RequestProfiler] = None):
+        self.app = app
+        self.profiler = profiler or PROFILER
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.enabled or not self.profiler.should_profile():
+            await self.app(scope, receive, send)
+            return
+        with self.profiler.profile():
+            await self.app(scope, receive, send)
+
+
+PROFILER = RequestProfiler()
@@ -0,0 +1,65 @@
+import codecs
+import csv
+from typing import AsyncIterator, BinaryIO, Optional
+
+import orjson
+from pydantic import BaseModel
+
+from source.helpers.metrics import SERIALIZATION_SECONDS
+
+RECORD_FORMATS = ("jsonl", "csv")
+
+
+async def read_blocks(source: BinaryIO, block_size: int = 1 << 16) -> AsyncIterator[bytes]:
+    while block := source.read(block_size):
+        yield block
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    # Só o pedaço de linha que sobra no fim de cada bloco fica em memória, nunca a entrada inteira.
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+async def read_records(chunks: AsyncIterator[bytes], record_format: str) -> AsyncIterator[tuple[int, Optional[dict]]]:
+    # (número da linha, registro); uma linha malformada sai como None, para a validação rejeitá-la
+    # sem interromper o restante. No CSV, a primeira linha é o cabeçalho e cada registro ocupa uma linha.
+    if record_format not in RECORD_FORMATS:
+        raise ValueError(f"Invalid record format '{record_format}'. Must be one of: {list(RECORD_FORMATS)}")
+    header = None
+    number = 0
+    async for line in iter_lines(chunks):
+        number += 1
+        if number == 1:
+            line = line.removeprefix(codecs.BOM_UTF8)
+        line = line.strip()
+        if not line:
+            continue
+        if record_format == "jsonl":
+            try:
+                yield number, orjson.loads(line)
+            except orjson.JSONDecodeError:
+                yield number, None
+            continue
+
+        try:
+            values = next(csv.reader([line.decode()]))
+        except (UnicodeDecodeError, csv.Error):
+            values = None
+        if header is None:
+            header = [value.strip() for value in values or []]
+            continue
+        yield number, dict(zip(header, values)) if values is not None and len(values) == len(header) else None
+
+
+async def ndjson_lines(items: AsyncIterator[BaseModel], method: str, route: str) -> AsyncIterator[bytes]:
+    async for item in items:
+        with SERIALIZATION_SECONDS.time(method, route):
+            line = item.model_dump_json(exclude_none=True)
+        yield line.encode() + b"\n"
@@ -1,30 +1,442 @@
-from contextlib import asynccontextmanager
+import asyncio
+import random
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass
+from typing import Optional, Sequence
 
 import aioboto3
+from aiobotocore.config import AioConfig
 from boto3.dynamodb.conditions import Key
 
+from source.helpers.bloom import TaxIdFilter
+from source.helpers.cache import TTLCache
+from source.helpers.metrics import DYNAMODB_SECONDS, consumed_units, record_dynamodb_call
+from source.helpers.singleflight import SingleFlight
+
+TAX_ID_MARKER_PREFIX = "TAXID#"
+PING_KEY = "PING#warm-up"
+TAX_ID_LOOKUPS = ("index", "marker")
+BATCH_GET_MAX_KEYS = 100
+BATCH_WRITE_MAX_ITEMS = 25
+BATCH_MAX_ATTEMPTS = 8
+BATCH_RETRY_BASE_DELAY = 0.05
+BATCH_RETRY_MAX_DELAY = 2.0
+
+
+@dataclass
+class ScanPage:
+    items: list
+    last_key: Optional[dict]
+    consumed_units: float
+    scanned: int
+
+
+class UserAlreadyExistsError(Exception):
+    def __init__(self, tax_id: str):
+        super().__init__(f"User with tax_id {tax_id} already exists")
+        self.tax_id = tax_id
+
+
+def tax_id_marker_key(tax_id: str) -> str:
+    return f"{TAX_ID_MARKER_PREFIX}{tax_id}"
+
+
+def tax_id_marker(user_data: dict) -> dict:
+    # A cópia do usuário deixa o login em um GetItem só. Fica em um mapa, e não nos atributos do
+    # item, para o marcador não ter tax_id e não entrar no GSI. Usuários não são alterados depois
+    # do cadastro; se um dia forem, a cópia precisa mudar na mesma transação.
+    return {"id": tax_id_marker_key(user_data["tax_id"]), "user_id": user_data["id"], "user_data": user_data}
+
+
+def backoff_delay(attempt: int) -> float:
+    # Exponencial com jitter completo, como o SDK faz com o throttling.
+    return random.uniform(0, min(BATCH_RETRY_MAX_DELAY, BATCH_RETRY_BASE_DELAY * 2 ** attempt))
+
 
 class AsyncDatabaseRepository:
-    def __init__(self, table_name, region_name='us-east-1'):
+    def __init__(
+            self,
+            table_name,
+            region_name='us-east-1',
+            endpoint_url: Optional[str] = None,
+            max_pool_connections: int = 10,
+            keepalive_timeout: float = 60.0,
+            tcp_keepalive: bool = True,
+            user_cache: Optional[TTLCache] = None,
+            session: Optional[aioboto3.Session] = None,
+            check_tax_id_index: bool = True,
+            return_consumed_capacity: bool = False,
+            tax_id_filter: Optional[TaxIdFilter] = None,
+            tax_id_lookup: str = "index",
+            consistent_tax_id_reads: bool = False,
+    ):
+        if tax_id_lookup not in TAX_ID_LOOKUPS:
+            raise ValueError(f"tax_id_lookup must be one of {TAX_ID_LOOKUPS}")
         self.table_name = table_name
         self.region_name = region_name
-        self.session = aioboto3.Session()
+        self.endpoint_url = endpoint_url
+        self.config = AioConfig(
+            max_pool_connections=max_pool_connections,
+            tcp_keepalive=tcp_keepalive,
+            connector_args={"keepalive_timeout": keepalive_timeout},
+        )
+        self.user_cache = user_cache
+        self.check_tax_id_index = check_tax_id_index
+        self.tax_id_filter = tax_id_filter
+        self.tax_id_lookup = tax_id_lookup
+        self.consistent_tax_id_reads = consistent_tax_id_reads
+        # Repassado a cada chamada: a capacidade consumida vai para as métricas por operação e por rota.
+        self.capacity = {"ReturnConsumedCapacity": "TOTAL"} if return_consumed_capacity else {}
+        self.user_lookups = SingleFlight()
+        self.session = session or aioboto3.Session()
+        self._exit_stack: Optional[AsyncExitStack] = None
+        self._table = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._table is not None
+
+    def resource(self):
+        return self.session.resource(
+            'dynamodb',
+            region_name=self.region_name,
+            endpoint_url=self.endpoint_url,
+            config=self.config,
+        )
+
+    async def open(self):
+        if self.is_open:
+            return
+        exit_stack = AsyncExitStack()
+        try:
+            dynamodb = await exit_stack.enter_async_context(self.resource())
+            self._table = await dynamodb.Table(self.table_name)
+        except BaseException:
+            await exit_stack.aclose()
+            raise
+        self._exit_stack = exit_stack
+
+    async def close(self):
+        if self._exit_stack is None:
+            return
+        exit_stack, self._exit_stack, self._table = self._exit_stack, None, None
+        await exit_stack.aclose()
 
     @asynccontextmanager
     async def get_table(self):
-        async with self.session.resource('dynamodb', region_name=self.region_name) as dynamodb:
+        if self._table is not None:
+            yield self._table
+            return
+        # Sem open() (scripts e testes): cria um resource de vida curta.
+        async with self.resource() as dynamodb:
             table = await dynamodb.Table(self.table_name)
             yield table
 
+    async def ping(self):
+        # GetItem de uma chave que não existe: 0.5 RCU, só para abrir (ou validar) uma conexão do pool.
+        async with self.get_table() as table:
+            with DYNAMODB_SECONDS.time("ping"):
+                response = await table.get_item(Key={"id": PING_KEY}, ProjectionExpression="id", **self.capacity)
+            record_dynamodb_call("ping", response)
+
     async def find_user_by_tax_id(self, tax_id: str):
+        # CPF que o filtro não conhece não está cadastrado: 404 sem ir ao DynamoDB.
+        verdict = self.tax_id_filter.check(tax_id) if self.tax_id_filter is not None else None
+        if verdict is False:
+            return None
+        if self.user_cache is None:
+            user = await self._load_user_by_tax_id(tax_id)
+        else:
+            user = await self.user_cache.get_or_load(tax_id, self._load_user_by_tax_id)
+        if verdict and user is None:
+            self.tax_id_filter.record_false_positive()
+        return user
+
+    async def _load_user_by_tax_id(self, tax_id: str):
+        # Logins simultâneos do mesmo CPF compartilham uma única consulta ao DynamoDB.
+        if self.tax_id_lookup == "marker":
+            return await self.user_lookups.do(tax_id, lambda: self._get_user_by_tax_id_marker(tax_id))
+        return await self.user_lookups.do(tax_id, lambda: self._query_user_by_tax_id(tax_id))
+
+    async def _get_user_by_tax_id_marker(self, tax_id: str):
+        # GetItem pela chave: 0.5 RCU (1 com leitura consistente) e, consistente, já vê um cadastro
+        # que acabou de ser feito, o que o GSI não garante.
         async with self.get_table() as table:
-            response = await table.query(
-                IndexName='TaxIDIndex',  # nome do GSI
-                KeyConditionExpression=Key('tax_id').eq(tax_id)
+            marker = await self._get_item(table, tax_id_marker_key(tax_id))
+            if marker is None:
+                # Sem o backfill, um usuário antigo pode não ter marcador: o GSI ainda decide.
+                return await self._query_user_by_tax_id(tax_id) if self.check_tax_id_index else None
+            if "user_data" in marker:
+                return marker["user_data"]
+            # Marcador anterior à cópia do usuário (o backfill completa): segue o ponteiro.
+            return await self._get_item(table, marker["user_id"])
+
+    async def _get_item(self, table, key: str) -> Optional[dict]:
+        with DYNAMODB_SECONDS.time("get_item"):
+            response = await table.get_item(
+                Key={"id": key},
+                ConsistentRead=self.consistent_tax_id_reads,
+                **self.capacity,
             )
+        record_dynamodb_call("get_item", response)
+        return response.get("Item")
+
+    async def _query_user_by_tax_id(self, tax_id: str):
+        async with self.get_table() as table:
+            with DYNAMODB_SECONDS.time("query"):
+                response = await table.query(
+                    IndexName='TaxIDIndex',  # nome do GSI
+                    KeyConditionExpression=Key('tax_id').eq(tax_id),
+                    **self.capacity,
+                )
+            record_dynamodb_call("query", response)
             items = response.get('Items', [])
             return items[0] if items else None
 
+    async def find_users_by_tax_ids(
+            self,
+            tax_ids: Sequence[str],
+            concurrency: int = 16,
+            consistent_read: bool = False,
+    ) -> dict:
+        # Devolve {tax_id: usuário ou None}; CPFs repetidos são buscados uma vez só. consistent_read
+        # só vale para os marcadores: o GSI é sempre eventualmente consistente.
+        users = {}
+        pending = []
+        passed = set()
+        # Quem pede leitura consistente (o cadastro em lote, antes de gravar sem condição) não
+        # pode confiar no filtro, que só vê cadastros de outros processos no próximo rebuild.
+        tax_id_filter = None if consistent_read else self.tax_id_filter
+        for tax_id in dict.fromkeys(tax_ids):
+            verdict = tax_id_filter.check(tax_id) if tax_id_filter is not None else None
+            if verdict is False:
+                users[tax_id] = None
+                continue
+            if verdict:
+                passed.add(tax_id)
+            cached = self.user_cache.get(tax_id) if self.user_cache is not None else None
+            if cached is not None:
+                users[tax_id] = cached
+            else:
+                pending.append(tax_id)
+        if not pending:
+            return users
+
+        if self.check_tax_id_index:
+            # Sem o backfill nem todo usuário tem o TAXID#<cpf>: cada CPF vai ao GSI, com concorrência limitada.
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def load(tax_id: str):
+                async with semaphore:
+                    return await self._load_user_by_tax_id(tax_id)
+
+            loaded = dict(zip(pending, await asyncio.gather(*(load(tax_id) for tax_id in pending))))
+        else:
+            loaded = await self._batch_get_users_by_tax_id(pending, consistent_read=consistent_read)
+
+        for tax_id, user in loaded.items():
+            if user is not None and self.user_cache is not None:
+                self.user_cache.set(tax_id, user)
+            elif user is None and tax_id in passed:
+                tax_id_filter.record_false_positive()
+            users[tax_id] = user
+        return users
+
+    async def _batch_get_users_by_tax_id(self, tax_ids: list, consistent_read: bool = False) -> dict:
+        # Um BatchGetItem por até 100 CPFs nos marcadores TAXID#<cpf>, que trazem a cópia do usuário;
+        # só marcadores sem a cópia (antes do backfill) precisam de um segundo, pelos ids.
+        # Sem marcador o CPF não está cadastrado (com o backfill feito, todo usuário tem o seu).
+        markers = await self._batch_get_items(
+            [{"id": tax_id_marker_key(tax_id)} for tax_id in tax_ids],
+            projection="id, user_id, user_data",
+            consistent_read=consistent_read,
+        )
+        users = {}
+        owners = {}
+        for marker in markers:
+            tax_id = marker["id"].removeprefix(TAX_ID_MARKER_PREFIX)
+            if "user_data" in marker:
+                users[tax_id] = marker["user_data"]
+            else:
+                owners[tax_id] = marker["user_id"]
+        pointed = await self._batch_get_items([{"id": user_id} for user_id in dict.fromkeys(owners.values())])
+        by_id = {user["id"]: user for user in pointed}
+        for tax_id, user_id in owners.items():
+            users[tax_id] = by_id.get(user_id)
+        return {tax_id: users.get(tax_id) for tax_id in tax_ids}
+
+    async def _batch_get_items(
+            self,
+            keys: list,
+            projection: Optional[str] = None,
+            consistent_read: bool = False,
+    ) -> list:
+        if not keys:
+            return []
+        async with self.get_table() as table:
+            chunks = [keys[start:start + BATCH_GET_MAX_KEYS] for start in range(0, len(keys), BATCH_GET_MAX_KEYS)]
+            client = table.meta.client
+            pages = await asyncio.gather(
+                *(self._batch_get_chunk(client, chunk, projection, consistent_read) for chunk in chunks)
+            )
+        return [item for page in pages for item in page]
+
+    async def _batch_get_chunk(
+            self,
+            client,
+            keys: list,
+            projection: Optional[str],
+            consistent_read: bool = False,
+    ) -> list:
+        request = {"Keys": keys, "ConsistentRead": consistent_read}
+        if projection is not None:
+            request["ProjectionExpression"] = projection
+        items = []
+        for attempt in range(BATCH_MAX_ATTEMPTS):
+            with DYNAMODB_SECONDS.time("batch_get"):
+                response = await client.batch_get_item(RequestItems={self.table_name: request}, **self.capacity)
+            record_dynamodb_call("batch_get", response)
+            items.extend(response.get("Responses", {}).get(self.table_name, []))
+            # Chaves não processadas (throttling ou resposta acima de 16 MB) voltam com backoff.
+            request = response.get("UnprocessedKeys", {}).get(self.table_name)
+            if not request:
+                return items
+            await asyncio.sleep(backoff_delay(attempt))
+        raise RuntimeError(
+            f"BatchGetItem left {len(request['Keys'])} keys unprocessed after {BATCH_MAX_ATTEMPTS} attempts"
+        )
+
+    async def batch_write_users(self, users: Sequence[dict], writers: int = 4):
+        # BatchWriteItem não aceita condição: quem chama confere antes se os CPFs estão livres
+        # (find_users_by_tax_ids). Cada usuário vai junto com o seu TAXID#<cpf>, 25 itens por chamada.
+        items = []
+        for user_data in users:
+            items.append({"PutRequest": {"Item": tax_id_marker(user_data)}})
+            items.append({"PutRequest": {"Item": user_data}})
+        groups = [items[start:start + BATCH_WRITE_MAX_ITEMS] for start in range(0, len(items), BATCH_WRITE_MAX_ITEMS)]
+        if not groups:
+            return
+        semaphore = asyncio.Semaphore(writers)
+        async with self.get_table() as table:
+            client = table.meta.client
+
+            async def write(group: list):
+                async with semaphore:
+                    await self._batch_write_group(client, group)
+
+            await asyncio.gather(*(write(group) for group in groups))
+        if self.tax_id_filter is not None:
+            for user_data in users:
+                self.tax_id_filter.add(user_data["tax_id"])
+
+    async def _batch_write_group(self, client, items: list):
+        for attempt in range(BATCH_MAX_ATTEMPTS):
+            with DYNAMODB_SECONDS.time("batch_write"):
+                response = await client.batch_write_item(RequestItems={self.table_name: items}, **self.capacity)
+            record_dynamodb_call("batch_write", response)
+            items = response.get("UnprocessedItems", {}).get(self.table_name)
+            if not items:
+                return
+            await asyncio.sleep(backoff_delay(attempt))
+        raise RuntimeError(
+            f"BatchWriteItem left {len(items)} items unprocessed after {BATCH_MAX_ATTEMPTS} attempts"
+        )
+
     async def create_user(self, user_data: dict):
+        # Usuários anteriores ao item TAXID#<cpf> só aparecem no GSI: enquanto o backfill
+        # (python -m source.cli.backfill_tax_id_markers) não rodar, o CPF também é conferido ali.
+        if self.check_tax_id_index and await self._query_user_by_tax_id(user_data["tax_id"]) is not None:
+            raise UserAlreadyExistsError(user_data["tax_id"])
+
+        # O item TAXID#<cpf> garante a unicidade do tax_id: ele e o usuário são gravados
+        # na mesma transação, e a condição falha se o CPF já tiver sido cadastrado.
+        marker = tax_id_marker(user_data)
+        async with self.get_table() as table:
+            client = table.meta.client
+            try:
+                with DYNAMODB_SECONDS.time("transact_write"):
+                    response = await client.transact_write_items(TransactItems=[
+                        {"Put": {
+                            "TableName": self.table_name,
+                            "Item": marker,
+                            "ConditionExpression": "attribute_not_exists(id)",
+                        }},
+                        {"Put": {
+                            "TableName": self.table_name,
+                            "Item": user_data,
+                            "ConditionExpression": "attribute_not_exists(id)",
+                        }},
+                    ], **self.capacity)
+            except client.exceptions.TransactionCanceledException as error:
+                record_dynamodb_call("transact_write", error.response)
+                reasons = error.response.get("CancellationReasons", [])
+                if reasons and reasons[0].get("Code") == "ConditionalCheckFailed":
+                    raise UserAlreadyExistsError(user_data["tax_id"]) from error
+                raise
+            record_dynamodb_call("transact_write", response)
+        if self.user_cache is not None:
+            self.user_cache.set(user_data["tax_id"], user_data)
+        if self.tax_id_filter is not None:
+            self.tax_id_filter.add(user_data["tax_id"])
+
+    async def scan_users(self, page_size: int = 500):
+        async for page in self.scan_pages(page_size=page_size):
+            for item in page.items:
+                yield item
+
+    async def scan_pages(
+            self,
+            page_size: int = 500,
+            segment: Optional[int] = None,
+            total_segments: Optional[int] = None,
+            start_key: Optional[dict] = None,
+    ):
+        # Uma página por vez, só com os usuários (sem TAXID#<cpf> e PING#), junto com a chave para
+        # continuar dali e a capacidade que ela consumiu.
+        kwargs = {"Limit": page_size, **self.capacity, "ReturnConsumedCapacity": "TOTAL"}
+        if total_segments is not None:
+            kwargs.update(Segment=segment, TotalSegments=total_segments)
+        if start_key is not None:
+            kwargs["ExclusiveStartKey"] = start_key
+        async with self.get_table() as table:
+            while True:
+                with DYNAMODB_SECONDS.time("scan"):
+                    response = await table.scan(**kwargs)
+                record_dynamodb_call("scan", response)
+                last_key = response.get("LastEvaluatedKey")
+                yield ScanPage(
+                    items=[
+                        item for item in response.get("Items", [])
+                        if not item["id"].startswith((TAX_ID_MARKER_PREFIX, PING_KEY))
+                    ],
+                    last_key=last_key,
+                    consumed_units=consumed_units(response.get("ConsumedCapacity")),
+                    scanned=response.get("ScannedCount", 0),
+                )
+                if last_key is None:
+                    return
+                kwargs["ExclusiveStartKey"] = last_key
+
+    async def ensure_tax_id_marker(self, user_data: dict) -> tuple[str, str]:
+        # Devolve (situação, user_id do dono do CPF). created: o marcador não existia; migrated: era
+        # deste usuário, mas sem a cópia; existing: já estava completo; conflict: é de outro usuário.
+        marker = tax_id_marker(user_data)
         async with self.get_table() as table:
-            await table.put_item(Item=user_data)
+            client = table.meta.client
+            try:
+                response = await table.put_item(
+                    Item=marker,
+                    ConditionExpression="attribute_not_exists(id) OR (user_id = :user_id "
+                                        "AND attribute_not_exists(user_data))",
+                    ExpressionAttributeValues={":user_id": user_data["id"]},
+                    ReturnValues="ALL_OLD",
+                    **self.capacity,
+                )
+                record_dynamodb_call("put_item", response)
+                return ("migrated" if response.get("Attributes") else "created"), user_data["id"]
+            except client.exceptions.ConditionalCheckFailedException as error:
+                record_dynamodb_call("put_item", error.response)
+                response = await table.get_item(Key={"id": marker["id"]}, ConsistentRead=True, **self.capacity)
+                record_dynamodb_call("get_item", response)
+                owner = response["Item"]["user_id"]
+                return ("existing" if owner == user_data["id"] else "conflict"), owner
@@ -0,0 +1,40 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+
+    def __init__(self):
+        self.calls = 0
+        self.executions = 0
+        self._in_flight: dict[Hashable, asyncio.Task] = {}
+
+    @property
+    def coalesced(self) -> int:
+        return self.calls - self.executions
+
+    @property
+    def coalescing_ratio(self) -> float:
+        return self.coalesced / self.calls if self.calls else 0.0
+
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            # A chamada roda em uma task própria: se quem a iniciou for cancelado,
+            # os demais continuam esperando o mesmo resultado.
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.executions += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # marca a exceção como lida mesmo que todos os chamadores tenham sido cancelados
+            task.exception()
@@ -0,0 +1,50 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+# Mesmo logger do uvicorn, para o relatório sair junto de "Application startup complete".
+logger = logging.getLogger("uvicorn.error")
+
+
+class StartupReport:
+
+    def __init__(
+            self,
+            name: str = "Startup",
+            started: Optional[float] = None,
+            clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.name = name
+        self.clock = clock
+        self.started = clock() if started is None else started
+        self.steps: dict[str, float] = {}
+        self.total: Optional[float] = None
+
+    def record(self, name: str, seconds: float):
+        self.steps[name] = seconds
+
+    @contextmanager
+    def step(self, name: str):
+        started = self.clock()
+        try:
+            yield
+        finally:
+            self.steps[name] = self.clock() - started
+
+    def finish(self) -> dict:
+        self.total = self.clock() - self.started
+        logger.info(
+            "%s completed in %.1f ms (%s)",
+            self.name,
+            self.total * 1000,
+            ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in self.steps.items()),
+        )
+        return self.as_dict()
+
+    def as_dict(self) -> dict:
+        # Passos que rodam em paralelo se sobrepõem: a soma pode passar do total.
+        return {
+            "total_ms": None if self.total is None else round(self.total * 1000, 1),
+            "steps_ms": {name: round(seconds * 1000, 1) for name, seconds in self.steps.items()},
+        }
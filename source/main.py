@@ -1,29 +1,109 @@
+import asyncio
+import functools
+import time
 from contextlib import asynccontextmanager
 
+import aioboto3
 from fastapi import FastAPI
 
+from source import IMPORT_STARTED
+from source.configs.key_rotation import KeyRotationTask
+from source.configs.loop_monitor import LoopMonitorTask
+from source.configs.metrics import MetricsTask
+from source.configs.profiling import ProfilingTask
 from source.configs.secrets import Secrets
 from source.configs.services import Services
 from source.configs.settings import Settings
-from source.routes import auth, root
+from source.configs.tax_id_filter import TaxIdFilterTask
+from source.configs.warm_up import WarmUpTask
+from source.helpers.aws import SecretsCache
+from source.helpers.metrics import MetricsMiddleware
+from source.helpers.profiling import ProfilingMiddleware
+from source.helpers.startup import StartupReport
+from source.routes import admin, auth, root
 
 
 @asynccontextmanager
 async def app_lifespan(_app: FastAPI):
+    startup = StartupReport(started=IMPORT_STARTED)
+    startup.record("import", IMPORT_FINISHED - IMPORT_STARTED)
+
     settings = Settings.new()
-    secrets = await Secrets.new(settings=settings)
-    services = Services.new(settings=settings, secrets=secrets)
+    # Secrets Manager e DynamoDB compartilham a sessão: credenciais e endpoints são resolvidos uma vez.
+    session = aioboto3.Session()
+    secrets_cache = SecretsCache(ttl=settings.secrets_cache_ttl_seconds, session=session)
+    repository = Services.new_repository(settings, session=session)
+
+    async def load_keys():
+        with startup.step("secret_fetch"):
+            secrets = await Secrets.new(settings=settings, secrets_cache=secrets_cache)
+        with startup.step("key_parse"):
+            jwt_signer = await asyncio.to_thread(Services.new_jwt_signer, settings, secrets)
+        return secrets, jwt_signer
+
+    async def open_repository():
+        with startup.step("repository_open"):
+            await repository.open()
 
-    yield {
-        "settings": settings,
-        "secrets": secrets,
-        "services": services,
-    }
+    # Busca do segredo + parse da chave e abertura do DynamoDB não dependem um do outro.
+    keys, opened = await asyncio.gather(load_keys(), open_repository(), return_exceptions=True)
+    for result in (keys, opened):
+        if isinstance(result, BaseException):
+            await repository.close()
+            await secrets_cache.close()
+            raise result
+
+    secrets, jwt_signer = keys
+    services = Services.new(settings=settings, secrets=secrets, jwt_signer=jwt_signer, repository=repository)
+    key_rotation = KeyRotationTask(
+        settings=settings,
+        services=services,
+        secrets=secrets,
+        fetch_secrets=functools.partial(Secrets.new, secrets_cache=secrets_cache),
+    )
+    key_rotation.start()
+    warm_up = WarmUpTask(settings=settings, services=services)
+    warm_up.start()
+    tax_id_filter = TaxIdFilterTask(settings=settings, services=services)
+    tax_id_filter.start()
+    metrics = MetricsTask(settings=settings, services=services)
+    metrics.start()
+    profiling = ProfilingTask(settings=settings)
+    profiling.start()
+    loop_monitor = LoopMonitorTask(settings=settings)
+    loop_monitor.start()
+    startup.finish()
+
+    try:
+        yield {
+            "settings": settings,
+            "secrets": secrets,
+            "services": services,
+            "warm_up": warm_up,
+            "metrics": metrics,
+            "profiling": profiling,
+        }
+    finally:
+        await loop_monitor.stop()
+        await profiling.stop()
+        await metrics.stop()
+        await tax_id_filter.stop()
+        await warm_up.stop()
+        await key_rotation.stop()
+        services.jwt_signer.close()
+        await services.repository.close()
+        await secrets_cache.close()
 
 
 app = FastAPI(lifespan=app_lifespan, docs_url="/auth/docs", redoc_url="/auth/redoc", openapi_url="/auth/openapi.json")
+# A última adicionada é a mais externa: a latência medida inclui o custo do profiling ligado.
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.include_router(root.router)
 app.include_router(auth.router)
+app.include_router(admin.router)
+
+IMPORT_FINISHED = time.perf_counter()
 
 if __name__ == '__main__':
     import uvicorn
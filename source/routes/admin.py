@@ -0,0 +1,112 @@
+import tempfile
+from typing import Annotated, Literal, Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from source.depends.admin import require_admin_token
+from source.depends.app import DependsProfiling, DependsSettings
+from source.depends.repository import DependsRepository
+from source.helpers.records import ndjson_lines, read_blocks, read_records
+from source.schemas.request.admin import ProfilingRequestBody
+from source.usecase.bulk_register import BulkRegisterUseCase
+from source.usecase.export import ExportUsersUseCase, ndjson_items
+
+router = APIRouter(
+    prefix="/admin",
+    include_in_schema=False,
+    dependencies=[Depends(require_admin_token)],
+)
+
+DOWNLOADS = {
+    "cprofile": ("application/octet-stream", "profile.pstats"),
+    "stacks": ("text/plain; charset=utf-8", "profile.collapsed"),
+}
+
+
+# As rotas são async de propósito: o amostrador de pilhas acompanha a thread que chama start(), a do event loop.
+@router.post("/profiling")
+async def start_profiling(body: ProfilingRequestBody, profiling: DependsProfiling):
+    session = profiling.start_session(mode=body.mode, sample_every=body.sample_every, duration=body.duration_seconds)
+    return session.as_dict()
+
+
+@router.get("/profiling")
+async def profiling_status(profiling: DependsProfiling):
+    return profiling.profiler.status()
+
+
+@router.delete("/profiling")
+async def stop_profiling(profiling: DependsProfiling):
+    profiling.stop_session()
+    return profiling.profiler.status()
+
+
+@router.get("/profiling/profile")
+async def download_profile(profiling: DependsProfiling, mode: Literal["cprofile", "stacks"] = "cprofile"):
+    media_type, filename = DOWNLOADS[mode]
+    return Response(
+        content=profiling.download(mode),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/users/bulk")
+async def bulk_register(
+        request: Request,
+        repo: DependsRepository,
+        settings: DependsSettings,
+        format: Literal["jsonl", "csv"] = "jsonl",
+):
+    # O corpo vai primeiro para um arquivo temporário (em memória só até 1 MB): abaixo do ASGI 2.4, a
+    # StreamingResponse lê receive() em paralelo para detectar a desconexão e consumiria o corpo
+    # ainda não lido. A resposta traz uma linha por registro rejeitado e o resumo na última linha.
+    spool = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+    async for chunk in request.stream():
+        spool.write(chunk)
+    spool.seek(0)
+
+    use_case = BulkRegisterUseCase(
+        repository=repo,
+        chunk_size=settings.bulk_register_chunk_size,
+        writers=settings.bulk_register_writers,
+        lookup_concurrency=settings.auth_batch_lookup_concurrency,
+    )
+    events = use_case.execute(read_records(read_blocks(spool), format))
+    return StreamingResponse(
+        ndjson_lines(events, "POST", "/admin/users/bulk"),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(spool.close),
+    )
+
+
+@router.get("/users/export")
+async def export_users(
+        repo: DependsRepository,
+        settings: DependsSettings,
+        total_segments: Annotated[int, Query(ge=1, le=64)] = 4,
+        page_size: Annotated[int, Query(ge=1, le=1000)] = 500,
+        read_capacity: Annotated[Optional[float], Query(ge=0)] = None,
+):
+    # Sem checkpoint: para retomar uma exportação grande, use python -m source.cli.export_users.
+    use_case = ExportUsersUseCase(
+        repository=repo,
+        total_segments=total_segments,
+        page_size=page_size,
+        read_capacity_units_per_second=(
+            settings.export_read_capacity_units_per_second if read_capacity is None else read_capacity
+        ),
+    )
+
+    async def lines():
+        async for _, page in use_case.execute():
+            if page.items:
+                yield ndjson_items(page.items)
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="users.ndjson"'},
+    )
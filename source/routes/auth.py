@@ -1,23 +1,93 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 
+from source.depends.app import DependsSettings
 from source.depends.jwt_signer import DependsJwtSigner
 from source.depends.repository import DependsRepository
-from source.schemas.request.auth import AuthRequestQuery, AuthCreateRequestBody
-from source.schemas.response.auth import AuthResponse, RegisterResponse
+from source.depends.token_verifier import DependsTokenVerifier
+from source.helpers.metrics import SERIALIZATION_SECONDS
+from source.helpers.records import ndjson_lines
+from source.schemas.request.auth import (
+    AuthBatchRequestBody,
+    AuthRequestQuery,
+    AuthCreateRequestBody,
+    IntrospectBatchRequestBody,
+    IntrospectRequestBody,
+)
+from source.schemas.response.auth import (
+    AuthBatchItem,
+    AuthResponse,
+    IntrospectBatchResponse,
+    IntrospectResponse,
+    RegisterResponse,
+)
 from source.usecase.auth import AuthUseCase, RegisterUseCase
+from source.usecase.introspect import IntrospectUseCase
 
 router = APIRouter(
     tags=["auth"]
 )
 
 
+def json_response(model: BaseModel, method: str, route: str, status_code: int = status.HTTP_200_OK) -> Response:
+    # O use case já devolve o modelo validado: serializar aqui evita a segunda validação do
+    # response_model e deixa o tempo de serialização medido por rota.
+    with SERIALIZATION_SECONDS.time(method, route):
+        body = model.model_dump_json()
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+
 @router.get("/auth", response_model=AuthResponse)
 async def auth(q: AuthRequestQuery, repo: DependsRepository, jwt_signer: DependsJwtSigner):
     use_case = AuthUseCase(repository=repo, jwt_signer=jwt_signer)
-    return await use_case.execute(tax_id=q.tax_id)
+    return json_response(await use_case.execute(tax_id=q.tax_id), "GET", "/auth")
+
+
+@router.post("/auth/batch", response_model=AuthBatchItem, response_class=StreamingResponse)
+async def auth_batch(
+        body: AuthBatchRequestBody,
+        repo: DependsRepository,
+        jwt_signer: DependsJwtSigner,
+        settings: DependsSettings,
+):
+    # Uma linha JSON por CPF, na ordem do pedido, com status 200 (e o token) ou 404 em cada item.
+    use_case = AuthUseCase(
+        repository=repo,
+        jwt_signer=jwt_signer,
+        batch_max_size=settings.auth_batch_max_size,
+        batch_concurrency=settings.auth_batch_lookup_concurrency,
+    )
+    items = await use_case.execute_batch(tax_ids=body.tax_ids)
+    return StreamingResponse(ndjson_lines(items, "POST", "/auth/batch"), media_type="application/x-ndjson")
 
 
 @router.post("/auth", response_model=RegisterResponse, status_code=201)
-async def register(body: AuthCreateRequestBody, repo: DependsRepository):
-    use_case = RegisterUseCase(repository=repo)
-    return await use_case.execute(tax_id=body.tax_id, email=body.email, name=body.name)
+async def register(body: AuthCreateRequestBody, repo: DependsRepository, jwt_signer: DependsJwtSigner):
+    use_case = RegisterUseCase(repository=repo, jwt_signer=jwt_signer)
+    response = await use_case.execute(tax_id=body.tax_id, email=body.email, name=body.name)
+    return json_response(response, "POST", "/auth", status_code=status.HTTP_201_CREATED)
+
+
+@router.get("/auth/.well-known/jwks.json")
+async def jwks(request: Request, jwt_signer: DependsJwtSigner):
+    document = jwt_signer.jwks
+    if document.matches(request.headers.get("if-none-match")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=document.headers)
+    return Response(content=document.body, media_type="application/json", headers=document.headers)
+
+
+@router.post("/auth/introspect", response_model=IntrospectResponse, response_model_exclude_none=True)
+async def introspect(body: IntrospectRequestBody, token_verifier: DependsTokenVerifier):
+    use_case = IntrospectUseCase(token_verifier=token_verifier)
+    return await use_case.execute(token=body.token)
+
+
+@router.post("/auth/introspect/batch", response_model=IntrospectBatchResponse, response_model_exclude_none=True)
+async def introspect_batch(
+        body: IntrospectBatchRequestBody,
+        token_verifier: DependsTokenVerifier,
+        settings: DependsSettings,
+):
+    use_case = IntrospectUseCase(token_verifier=token_verifier, batch_max_size=settings.introspection_batch_max_size)
+    return await use_case.execute_batch(tokens=body.tokens)
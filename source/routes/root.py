@@ -1,4 +1,8 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response, status
+from fastapi.responses import JSONResponse
+
+from source.depends.app import DependsMetrics, DependsWarmUp
+from source.helpers.metrics import CONTENT_TYPE
 
 router = APIRouter(
     include_in_schema=False,
@@ -13,3 +17,20 @@ def root():
 @router.get("/health")
 def health():
     return {"message": "Auth Service is healthy"}
+
+
+@router.get("/ready")
+def ready(warm_up: DependsWarmUp):
+    # O ALB só manda tráfego depois do warm-up; /health continua sendo só liveness.
+    if not warm_up.is_ready():
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"message": "Auth Service is warming up"},
+        )
+    return {"message": "Auth Service is ready"}
+
+
+@router.get("/metrics")
+async def metrics(metrics_task: DependsMetrics):
+    # No event loop, não no threadpool: o snapshot percorre os mesmos dicts em que as requisições registram.
+    return Response(content=metrics_task.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,13 @@
+from typing import Annotated, Literal, TypeAlias
+
+from fastapi import Body
+from pydantic import BaseModel, Field
+
+
+class ProfilingRequest(BaseModel):
+    mode: Literal["cprofile", "stacks"] = Field("cprofile", description="cProfile em 1 de cada N requisições ou amostragem de pilhas do event loop")
+    sample_every: int = Field(100, ge=1, description="Perfila 1 de cada N requisições (modo cprofile)")
+    duration_seconds: float = Field(60.0, gt=0, description="Duração da coleta, limitada por PROFILING_MAX_DURATION_SECONDS")
+
+
+ProfilingRequestBody: TypeAlias = Annotated[ProfilingRequest, Body(...)]
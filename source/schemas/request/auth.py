@@ -11,6 +11,13 @@ class AuthRequest(BaseModel):
 AuthRequestQuery: TypeAlias = Annotated[AuthRequest, Query(...)]
 
 
+class AuthBatchRequest(BaseModel):
+    tax_ids: list[str] = Body(..., description="CPFs dos usuários")
+
+
+AuthBatchRequestBody: TypeAlias = Annotated[AuthBatchRequest, Body(...)]
+
+
 class AuthCreateRequest(BaseModel):
     tax_id: str = Body(..., description="CPF do usuário")
     email: str = Body(..., description="Email do usuário")
@@ -18,3 +25,17 @@ class AuthCreateRequest(BaseModel):
 
 
 AuthCreateRequestBody: TypeAlias = Annotated[AuthCreateRequest, Body(...)]
+
+
+class IntrospectRequest(BaseModel):
+    token: str = Body(..., description="JWT a ser validado")
+
+
+IntrospectRequestBody: TypeAlias = Annotated[IntrospectRequest, Body(...)]
+
+
+class IntrospectBatchRequest(BaseModel):
+    tokens: list[str] = Body(..., description="Lista de JWTs a serem validados")
+
+
+IntrospectBatchRequestBody: TypeAlias = Annotated[IntrospectBatchRequest, Body(...)]
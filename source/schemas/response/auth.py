@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic import BaseModel
 
 
@@ -8,9 +10,50 @@ class AuthResponse(BaseModel):
     email: str
 
 
+class AuthBatchItem(BaseModel):
+    tax_id: str
+    status: int
+    token: Optional[str] = None
+    user_id: Optional[str] = None
+    name: Optional[str] = None
+    email: Optional[str] = None
+    detail: Optional[str] = None
+
+
 class RegisterResponse(BaseModel):
     user_id: str
     tax_id: str
     email: str
     name: str
     message: str = "User registered successfully"
+
+
+class IntrospectResponse(BaseModel):
+    active: bool
+    sub: Optional[str] = None
+    tax_id: Optional[str] = None
+    email: Optional[str] = None
+    name: Optional[str] = None
+    user_type: Optional[str] = None
+    iat: Optional[int] = None
+    nbf: Optional[int] = None
+    exp: Optional[int] = None
+
+
+class IntrospectBatchResponse(BaseModel):
+    results: list[IntrospectResponse]
+
+
+class BulkRegisterRejection(BaseModel):
+    line: int
+    status: Literal["invalid", "duplicate"]
+    tax_id: Optional[str] = None
+    detail: str
+
+
+class BulkRegisterSummary(BaseModel):
+    status: Literal["completed"] = "completed"
+    rows: int = 0
+    created: int = 0
+    duplicates: int = 0
+    invalid: int = 0
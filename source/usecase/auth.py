@@ -1,16 +1,27 @@
+import asyncio
+from typing import AsyncIterator, Optional
+
 from fastapi import HTTPException, status
 
 from source.helpers.jwt import JwtSignatureProvider
-from source.helpers.repository import AsyncDatabaseRepository
+from source.helpers.repository import AsyncDatabaseRepository, UserAlreadyExistsError
 from source.models.user import User
-from source.schemas.response.auth import AuthResponse, RegisterResponse
+from source.schemas.response.auth import AuthBatchItem, AuthResponse, RegisterResponse
 
 
 class AuthUseCase:
 
-    def __init__(self, repository: AsyncDatabaseRepository, jwt_signer: JwtSignatureProvider):
+    def __init__(
+            self,
+            repository: AsyncDatabaseRepository,
+            jwt_signer: JwtSignatureProvider,
+            batch_max_size: int = 100,
+            batch_concurrency: int = 16,
+    ):
         self.repository = repository
         self.jwt_signer = jwt_signer
+        self.batch_max_size = batch_max_size
+        self.batch_concurrency = batch_concurrency
 
     async def execute(self, tax_id: str) -> AuthResponse:
         user_data = await self.repository.find_user_by_tax_id(tax_id)
@@ -21,6 +32,9 @@ class AuthUseCase:
                 detail=f"User with tax_id {tax_id} not found"
             )
 
+        return await self.issue(user_data)
+
+    async def issue(self, user_data: dict) -> AuthResponse:
         payload = {
             "sub": user_data["id"],
             "tax_id": user_data["tax_id"],
@@ -29,7 +43,7 @@ class AuthUseCase:
             "user_type": user_data["user_type"]
         }
 
-        token = self.jwt_signer.sign(payload)
+        token = await self.jwt_signer.issue(payload)
 
         return AuthResponse(
             token=token,
@@ -38,24 +52,57 @@ class AuthUseCase:
             email=user_data["email"]
         )
 
+    async def execute_batch(self, tax_ids: list[str]) -> AsyncIterator[AuthBatchItem]:
+        if len(tax_ids) > self.batch_max_size:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {self.batch_max_size} tax_ids can be authenticated per request"
+            )
+        # As buscas terminam antes da resposta começar: uma falha do DynamoDB ainda vira um 5xx normal.
+        users = await self.repository.find_users_by_tax_ids(tax_ids, concurrency=self.batch_concurrency)
+        return self._issue_batch(tax_ids, users)
+
+    async def _issue_batch(self, tax_ids: list[str], users: dict) -> AsyncIterator[AuthBatchItem]:
+        # Todas as assinaturas entram de uma vez na fila do executor do signer; os itens saem na
+        # ordem do pedido, cada um assim que o seu token fica pronto.
+        tokens = {tax_id: asyncio.ensure_future(self.issue(user)) for tax_id, user in users.items() if user}
+        try:
+            for tax_id in tax_ids:
+                if tax_id not in tokens:
+                    yield AuthBatchItem(
+                        tax_id=tax_id,
+                        status=status.HTTP_404_NOT_FOUND,
+                        detail=f"User with tax_id {tax_id} not found",
+                    )
+                    continue
+                response = await tokens[tax_id]
+                yield AuthBatchItem(tax_id=tax_id, status=status.HTTP_200_OK, **response.model_dump())
+        finally:
+            # Cliente desconectado no meio da resposta: as assinaturas que faltam são descartadas.
+            for task in tokens.values():
+                task.cancel()
+
 
 class RegisterUseCase:
 
-    def __init__(self, repository: AsyncDatabaseRepository):
+    def __init__(self, repository: AsyncDatabaseRepository, jwt_signer: Optional[JwtSignatureProvider] = None):
         self.repository = repository
+        self.jwt_signer = jwt_signer
 
     async def execute(self, tax_id: str, email: str, name: str) -> RegisterResponse:
-        existing_user = await self.repository.find_user_by_tax_id(tax_id)
+        user = User.create_costumer(tax_id=tax_id, email=email, name=name)
 
-        if existing_user:
+        try:
+            await self.repository.create_user(user.model_dump())
+        except UserAlreadyExistsError:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail=f"User with tax_id {tax_id} already exists"
             )
-
-        user = User.create_costumer(tax_id=tax_id, email=email, name=name)
-
-        await self.repository.create_user(user.model_dump())
+        # create_user já substituiu a entrada do cache de usuários; o token reaproveitado por sub
+        # também é descartado, para nenhum login devolver claims de um registro anterior.
+        if self.jwt_signer is not None:
+            self.jwt_signer.invalidate(user.id)
 
         return RegisterResponse(
             user_id=user.id,
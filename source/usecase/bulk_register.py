@@ -0,0 +1,100 @@
+from collections import deque
+from typing import AsyncIterator, Optional, Union
+
+from pydantic import ValidationError
+
+from source.helpers.repository import AsyncDatabaseRepository
+from source.models.user import User
+from source.schemas.request.auth import AuthCreateRequest
+from source.schemas.response.auth import BulkRegisterRejection, BulkRegisterSummary
+
+
+def describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, item['loc'])) or 'row'}: {item['msg']}" for item in error.errors(include_url=False)
+    )
+
+
+class BulkRegisterUseCase:
+
+    def __init__(
+            self,
+            repository: AsyncDatabaseRepository,
+            chunk_size: int = 500,
+            writers: int = 4,
+            lookup_concurrency: int = 16,
+            recent_chunks: int = 4,
+    ):
+        self.repository = repository
+        self.chunk_size = chunk_size
+        self.writers = writers
+        self.lookup_concurrency = lookup_concurrency
+        # Os CPFs dos últimos blocos gravados: o GSI pode ainda não mostrar o que acabou de ser escrito.
+        self.recent = deque(maxlen=recent_chunks)
+
+    async def execute(
+            self,
+            records: AsyncIterator[tuple[int, Optional[dict]]],
+    ) -> AsyncIterator[Union[BulkRegisterRejection, BulkRegisterSummary]]:
+        # Um item por linha rejeitada e o resumo no fim. Só um bloco de chunk_size linhas fica em
+        # memória, qualquer que seja o tamanho da entrada; rodar de novo a mesma entrada é seguro,
+        # o que já foi gravado volta como duplicado.
+        summary = BulkRegisterSummary()
+        chunk = []
+        async for line, record in records:
+            summary.rows += 1
+            try:
+                request = AuthCreateRequest.model_validate(record)
+            except ValidationError as error:
+                summary.invalid += 1
+                yield BulkRegisterRejection(line=line, status="invalid", detail=describe(error))
+                continue
+            chunk.append((line, request))
+            if len(chunk) >= self.chunk_size:
+                async for rejection in self.register_chunk(chunk, summary):
+                    yield rejection
+                chunk = []
+        if chunk:
+            async for rejection in self.register_chunk(chunk, summary):
+                yield rejection
+        yield summary
+
+    async def register_chunk(self, chunk: list, summary: BulkRegisterSummary) -> AsyncIterator[BulkRegisterRejection]:
+        pending = {}
+        for line, request in chunk:
+            tax_id = request.tax_id
+            if tax_id in pending:
+                detail = f"tax_id repeated from line {pending[tax_id][0]}"
+            elif any(tax_id in recent for recent in self.recent):
+                detail = f"User with tax_id {tax_id} already exists"
+            else:
+                pending[tax_id] = (line, request)
+                continue
+            summary.duplicates += 1
+            yield BulkRegisterRejection(line=line, status="duplicate", tax_id=tax_id, detail=detail)
+
+        # BatchWriteItem não tem condição: os CPFs são conferidos antes (marcadores com leitura
+        # consistente ou GSI). Os blocos são gravados um depois do outro, então um CPF repetido
+        # em um bloco posterior já encontra o marcador do anterior.
+        existing = await self.repository.find_users_by_tax_ids(
+            list(pending),
+            concurrency=self.lookup_concurrency,
+            consistent_read=True,
+        )
+        users = []
+        for tax_id, (line, request) in pending.items():
+            if existing.get(tax_id) is not None:
+                summary.duplicates += 1
+                yield BulkRegisterRejection(
+                    line=line,
+                    status="duplicate",
+                    tax_id=tax_id,
+                    detail=f"User with tax_id {tax_id} already exists",
+                )
+                continue
+            users.append(User.create_costumer(tax_id=tax_id, email=request.email, name=request.name).model_dump())
+
+        # Usuários novos não têm token nem entrada no cache de usuários (CPFs ausentes não são guardados).
+        await self.repository.batch_write_users(users, writers=self.writers)
+        summary.created += len(users)
+        self.recent.append({user["tax_id"] for user in users})
@@ -0,0 +1,89 @@
+import asyncio
+from decimal import Decimal
+from typing import AsyncIterator, Optional
+
+import orjson
+
+from source.helpers.capacity import CapacityBudget
+from source.helpers.repository import AsyncDatabaseRepository, ScanPage
+
+_DONE = object()
+
+
+def json_default(value):
+    # Números do DynamoDB chegam como Decimal e conjuntos como set.
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def ndjson_items(items: list) -> bytes:
+    return b"".join(orjson.dumps(item, default=json_default) + b"\n" for item in items)
+
+
+class ExportUsersUseCase:
+
+    def __init__(
+            self,
+            repository: AsyncDatabaseRepository,
+            total_segments: int = 4,
+            page_size: int = 500,
+            read_capacity_units_per_second: float = 0,
+            start_keys: Optional[dict] = None,
+            segments: Optional[list] = None,
+    ):
+        self.repository = repository
+        self.total_segments = total_segments
+        self.page_size = page_size
+        self.budget = CapacityBudget(read_capacity_units_per_second) if read_capacity_units_per_second > 0 else None
+        # Para retomar: os segmentos que faltam e a LastEvaluatedKey de onde cada um parou.
+        self.start_keys = start_keys or {}
+        self.segments = list(range(total_segments)) if segments is None else segments
+
+    async def execute(self) -> AsyncIterator[tuple[int, ScanPage]]:
+        # Os segmentos rodam em paralelo e as páginas saem na ordem em que chegam. A fila tem uma vaga
+        # por segmento: se quem consome for mais lento, os scans param, e a memória fica em
+        # algumas páginas, qualquer que seja o tamanho da tabela.
+        queue = asyncio.Queue(maxsize=max(1, len(self.segments)))
+        tasks = [asyncio.create_task(self.scan_segment(segment, queue)) for segment in self.segments]
+        running = len(tasks)
+        try:
+            while running:
+                entry = await queue.get()
+                if entry is _DONE:
+                    running -= 1
+                elif isinstance(entry, BaseException):
+                    raise entry
+                else:
+                    yield entry
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def scan_segment(self, segment: int, queue: asyncio.Queue):
+        pages = self.repository.scan_pages(
+            page_size=self.page_size,
+            segment=segment,
+            total_segments=self.total_segments,
+            start_key=self.start_keys.get(segment),
+        )
+        try:
+            while True:
+                if self.budget is not None:
+                    await self.budget.wait()
+                try:
+                    page = await anext(pages)
+                except StopAsyncIteration:
+                    break
+                if self.budget is not None:
+                    self.budget.consume(page.consumed_units)
+                await queue.put((segment, page))
+        except Exception as error:
+            await queue.put(error)
+            return
+        finally:
+            await pages.aclose()
+        await queue.put(_DONE)
@@ -0,0 +1,32 @@
+import asyncio
+
+from fastapi import HTTPException, status
+
+from source.helpers.jwt import CachedTokenVerifier
+from source.schemas.response.auth import IntrospectBatchResponse, IntrospectResponse
+
+
+class IntrospectUseCase:
+
+    def __init__(self, token_verifier: CachedTokenVerifier, batch_max_size: int = 100):
+        self.token_verifier = token_verifier
+        self.batch_max_size = batch_max_size
+
+    async def introspect(self, token: str) -> IntrospectResponse:
+        claims = await self.token_verifier.introspect(token)
+        if claims is None:
+            return IntrospectResponse(active=False)
+        return IntrospectResponse(active=True, **claims)
+
+    async def execute(self, token: str) -> IntrospectResponse:
+        return await self.introspect(token)
+
+    async def execute_batch(self, tokens: list[str]) -> IntrospectBatchResponse:
+        if len(tokens) > self.batch_max_size:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {self.batch_max_size} tokens can be introspected per request"
+            )
+        # gather mantém a ordem; as verificações fora do cache ficam na fila do executor do signer
+        results = await asyncio.gather(*(self.introspect(token) for token in tokens))
+        return IntrospectBatchResponse(results=list(results))
@@ -10,8 +10,10 @@ from fastapi import FastAPI
 from contextlib import asynccontextmanager
 
 from source.helpers.repository import AsyncDatabaseRepository
-from source.helpers.jwt import JwtSignatureProvider
+from source.helpers.cache import TTLCache
+from source.helpers.jwt import CachedTokenVerifier, JwtSignatureProvider
 from source.configs.services import Services
+from source.configs.settings import Settings
 
 
 def generate_test_rsa_key_pair():
@@ -69,22 +71,8 @@ async def repository(aws_credentials):
     class TestAsyncDatabaseRepository(AsyncDatabaseRepository):
         """Repository that uses localstack endpoint"""
 
-        @asynccontextmanager
-        async def get_table(self):
-            async with self.session.resource(
-                'dynamodb',
-                region_name=self.region_name,
-                endpoint_url=aws_credentials["endpoint_url"]
-            ) as dynamodb:
-                table = await dynamodb.Table(self.table_name)
-                yield table
-
         async def create_table_if_not_exists(self):
-            async with self.session.resource(
-                'dynamodb',
-                region_name=self.region_name,
-                endpoint_url=aws_credentials["endpoint_url"]
-            ) as dynamodb:
+            async with self.resource() as dynamodb:
                 existing_tables = []
                 async for table in dynamodb.tables.all():
                     existing_tables.append(table.name)
@@ -132,12 +120,16 @@ async def repository(aws_credentials):
 
     repo = TestAsyncDatabaseRepository(
         table_name="test-auth-service-users",
-        region_name=aws_credentials["region_name"]
+        region_name=aws_credentials["region_name"],
+        endpoint_url=aws_credentials["endpoint_url"]
     )
 
     # Create table
     await repo.create_table_if_not_exists()
 
+    # Open the pooled resource, as app_lifespan does
+    await repo.open()
+
     # Clear any existing data
     await repo.clear_table()
 
@@ -145,6 +137,7 @@ async def repository(aws_credentials):
 
     # Clean up after test
     await repo.clear_table()
+    await repo.close()
 
 
 @pytest.fixture(scope="function")
@@ -159,6 +152,10 @@ async def test_services(repository, jwt_signer):
     services = Services()
     services.jwt_signer = jwt_signer
     services.repository = repository
+    services.token_verifier = CachedTokenVerifier(
+        jwt_signer=jwt_signer,
+        cache=TTLCache(max_size=100, ttl=300)
+    )
     return services
 
 
@@ -178,11 +175,16 @@ async def test_app(test_services):
     # Override dependencies
     from source.depends.repository import get_repository
     from source.depends.jwt_signer import get_jwt_signer
-    from source.depends.app import get_services
+    from source.depends.token_verifier import get_token_verifier
+    from source.depends.app import get_services, get_settings
+
+    test_settings = Settings()
 
+    app.dependency_overrides[get_settings] = lambda: test_settings
     app.dependency_overrides[get_services] = lambda: test_services
     app.dependency_overrides[get_repository] = lambda: test_services.repository
     app.dependency_overrides[get_jwt_signer] = lambda: test_services.jwt_signer
+    app.dependency_overrides[get_token_verifier] = lambda: test_services.token_verifier
 
     yield app
 
@@ -1,3 +1,4 @@
+import orjson
 import pytest
 from httpx import AsyncClient
 
@@ -72,3 +73,45 @@ class TestAuthEndpoint:
         assert claims["email"] == user.email
         assert claims["name"] == user.name
         assert claims["user_type"] == user.user_type.value
+
+
+class TestAuthBatchEndpoint:
+    """Testes para a emissão de tokens em lote (POST /auth/batch)"""
+
+    @pytest.mark.asyncio
+    async def test_streams_one_line_per_tax_id(self, client: AsyncClient, repository, jwt_signer):
+        users = [
+            User.create_costumer(tax_id=f"1000000000{index}", email=f"user{index}@example.com", name=f"User {index}")
+            for index in range(3)
+        ]
+        for user in users:
+            await repository.create_user(user.model_dump())
+        tax_ids = [users[0].tax_id, "99999999999", users[1].tax_id, users[2].tax_id, users[0].tax_id]
+
+        response = await client.post("/auth/batch", json={"tax_ids": tax_ids})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        items = [orjson.loads(line) for line in response.text.splitlines()]
+        assert [item["tax_id"] for item in items] == tax_ids
+        assert [item["status"] for item in items] == [200, 404, 200, 200, 200]
+        assert "not found" in items[1]["detail"].lower()
+        assert "token" not in items[1]
+        assert items[2]["user_id"] == users[1].id
+        claims = orjson.loads(jwt_signer.verify(items[3]["token"]))
+        assert claims["sub"] == users[2].id
+        assert claims["tax_id"] == users[2].tax_id
+
+    @pytest.mark.asyncio
+    async def test_batch_too_large(self, client: AsyncClient):
+        response = await client.post("/auth/batch", json={"tax_ids": ["12345678900"] * 101})
+
+        assert response.status_code == 400
+        assert "at most 100" in response.json()["detail"].lower()
+
+    @pytest.mark.asyncio
+    async def test_empty_batch(self, client: AsyncClient):
+        response = await client.post("/auth/batch", json={"tax_ids": []})
+
+        assert response.status_code == 200
+        assert response.text == ""
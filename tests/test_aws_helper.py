@@ -1,7 +1,11 @@
+import asyncio
+import uuid
+import aioboto3
 import pytest
+import pytest_asyncio
 from unittest.mock import patch, AsyncMock, MagicMock
 import orjson
-from source.helpers.aws import get_aws_secrets
+from source.helpers.aws import SecretsCache, get_aws_secrets
 class TestAwsHelper:
     """Testes para o helper de AWS"""
     @pytest.mark.asyncio
@@ -81,3 +85,123 @@ class TestAwsHelper:
             await get_aws_secrets(secret_name)
             mock_session_class.assert_called_once()
             mock_session.client.assert_called_once_with("secretsmanager")
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    def __call__(self):
+        return self.now
+@pytest_asyncio.fixture
+async def secrets_manager(aws_credentials):
+    """Cria um secret no Secrets Manager de teste e o remove ao final"""
+    session = aioboto3.Session()
+    async with session.client("secretsmanager") as client:
+        name = f"test-secret-{uuid.uuid4()}"
+        await client.create_secret(Name=name, SecretString=orjson.dumps({"JWT_PRIVATE_KEY": "v1"}).decode())
+        yield client, name
+        await client.delete_secret(SecretId=name, ForceDeleteWithoutRecovery=True)
+class TestSecretsCache:
+    """Testes para o cache de secrets"""
+    @pytest.mark.asyncio
+    async def test_get_caches_parsed_value(self, secrets_manager):
+        """Testa que leituras dentro do TTL não consultam o Secrets Manager"""
+        _, name = secrets_manager
+        cache = SecretsCache(ttl=60)
+        try:
+            first = await cache.get(name)
+            second = await cache.get(name)
+            assert first == {"JWT_PRIVATE_KEY": "v1"}
+            assert second is first
+            assert cache.fetches == 1
+            assert cache.hits == 1
+        finally:
+            await cache.close()
+    @pytest.mark.asyncio
+    async def test_reparses_only_when_version_changes(self, secrets_manager):
+        """Testa que o secret só é parseado de novo quando o VersionId muda"""
+        client, name = secrets_manager
+        clock = FakeClock()
+        cache = SecretsCache(ttl=60, clock=clock)
+        try:
+            first = await cache.get(name)
+            clock.now += 61
+            assert await cache.get(name) is first
+            assert (cache.fetches, cache.parses) == (2, 1)
+            await client.put_secret_value(SecretId=name, SecretString=orjson.dumps({"JWT_PRIVATE_KEY": "v2"}).decode())
+            clock.now += 61
+            assert await cache.get(name) == {"JWT_PRIVATE_KEY": "v2"}
+            assert (cache.fetches, cache.parses) == (3, 2)
+        finally:
+            await cache.close()
+    @pytest.mark.asyncio
+    async def test_invalidate_forces_version_check(self, secrets_manager):
+        """Testa que invalidate faz a próxima leitura consultar o Secrets Manager"""
+        _, name = secrets_manager
+        cache = SecretsCache(ttl=60)
+        try:
+            await cache.get(name)
+            cache.invalidate(name)
+            await cache.get(name)
+            assert (cache.fetches, cache.parses) == (2, 1)
+        finally:
+            await cache.close()
+    @pytest.mark.asyncio
+    async def test_reuses_single_client(self):
+        """Testa que o mesmo client é usado em todas as leituras"""
+        mock_client = AsyncMock()
+        mock_client.get_secret_value.side_effect = [
+            {"SecretString": '{"a": 1}', "VersionId": "v1"},
+            {"SecretString": '{"b": 2}', "VersionId": "v1"},
+        ]
+        mock_session = MagicMock()
+        mock_session.client.return_value.__aenter__.return_value = mock_client
+        cache = SecretsCache(ttl=60)
+        cache.session = mock_session
+        await cache.get("secret-a")
+        await cache.get("secret-b")
+        await cache.close()
+        mock_session.client.assert_called_once()
+        mock_client.get_secret_value.assert_any_call(SecretId="secret-b", VersionStage="AWSCURRENT")
+    @pytest.mark.asyncio
+    async def test_concurrent_refreshes_are_coalesced(self):
+        """Testa que leituras simultâneas do mesmo secret fazem uma única chamada"""
+        async def get_secret_value(**kwargs):
+            await asyncio.sleep(0.01)
+            return {"SecretString": '{"a": 1}', "VersionId": "v1"}
+        mock_client = AsyncMock()
+        mock_client.get_secret_value.side_effect = get_secret_value
+        cache = SecretsCache(ttl=60)
+        cache._client = mock_client
+        results = await asyncio.gather(*(cache.get("secret") for _ in range(10)))
+        assert all(result == {"a": 1} for result in results)
+        assert mock_client.get_secret_value.call_count == 1
+    @pytest.mark.asyncio
+    async def test_serves_stale_value_on_error(self):
+        """Testa que o último valor é mantido quando o Secrets Manager falha"""
+        clock = FakeClock()
+        mock_client = AsyncMock()
+        mock_client.get_secret_value.side_effect = [
+            {"SecretString": '{"a": 1}', "VersionId": "v1"},
+            RuntimeError("Secrets Manager unavailable"),
+            {"SecretString": '{"a": 2}', "VersionId": "v2"},
+        ]
+        cache = SecretsCache(ttl=60, error_retry_seconds=5, clock=clock)
+        cache._client = mock_client
+        assert await cache.get("secret") == {"a": 1}
+        clock.now += 61
+        assert await cache.get("secret") == {"a": 1}
+        assert cache.stale_served == 1
+        clock.now += 1
+        # dentro da janela de retry não há nova chamada
+        assert await cache.get("secret") == {"a": 1}
+        assert mock_client.get_secret_value.call_count == 2
+        clock.now += 5
+        assert await cache.get("secret") == {"a": 2}
+    @pytest.mark.asyncio
+    async def test_raises_without_cached_value(self):
+        """Testa que o erro é propagado quando não há valor em cache"""
+        mock_client = AsyncMock()
+        mock_client.get_secret_value.side_effect = RuntimeError("Secrets Manager unavailable")
+        cache = SecretsCache(ttl=60)
+        cache._client = mock_client
+        with pytest.raises(RuntimeError):
+            await cache.get("secret")
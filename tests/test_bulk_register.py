@@ -0,0 +1,157 @@
+import io
+from unittest.mock import AsyncMock, patch
+
+import orjson
+import pytest
+from httpx import AsyncClient
+
+from source.cli.bulk_register import bulk_register
+from source.configs.secrets import Secrets
+from source.depends.app import get_secrets
+from source.helpers.records import read_records
+from source.models.user import User
+from source.routes import admin
+
+
+async def blocks(data: bytes, size: int = 7):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def jsonl(*rows) -> bytes:
+    return b"\n".join(row if isinstance(row, bytes) else orjson.dumps(row) for row in rows) + b"\n"
+
+
+def row(index: int, **overrides) -> dict:
+    return {"tax_id": f"{index:011d}", "email": f"user{index}@example.com", "name": f"User {index}", **overrides}
+
+
+class TestReadRecords:
+    """Testes para a leitura em blocos de JSONL e CSV"""
+
+    @pytest.mark.asyncio
+    async def test_jsonl_lines_split_across_blocks(self):
+        data = jsonl(row(1), b"{not json", row(2)) + b"\n"
+
+        records = [record async for record in read_records(blocks(data), "jsonl")]
+
+        assert records == [(1, row(1)), (2, None), (3, row(2))]
+
+    @pytest.mark.asyncio
+    async def test_csv_with_header_and_bom(self):
+        data = '﻿tax_id,email,name\r\n00000000001,a@example.com,"Silva, Ana"\r\n00000000002,b@example.com\r\n'
+
+        records = [record async for record in read_records(blocks(data.encode()), "csv")]
+
+        assert records == [(2, {"tax_id": "00000000001", "email": "a@example.com", "name": "Silva, Ana"}), (3, None)]
+
+    @pytest.mark.asyncio
+    async def test_unknown_format(self):
+        with pytest.raises(ValueError):
+            [record async for record in read_records(blocks(b""), "xml")]
+
+
+class TestBulkRegister:
+    """Testes para o cadastro em lote com BatchWriteItem"""
+
+    @pytest.mark.asyncio
+    async def test_registers_and_reports_rejections(self, repository, sample_user_data):
+        existing = User.create_costumer(**sample_user_data)
+        await repository.create_user(existing.model_dump())
+        data = jsonl(
+            row(1),
+            row(2, email=None),
+            row(3),
+            sample_user_data,
+            row(1, name="Again"),
+            row(4),
+            row(5),
+        )
+        rejected = io.StringIO()
+
+        # blocos de 2 linhas: a repetição da linha 5 só é vista no banco, gravada por um bloco anterior
+        result = await bulk_register(repository, io.BytesIO(data), "jsonl", rejected, chunk_size=2, writers=2)
+
+        assert result == {"rows": 7, "created": 4, "duplicates": 2, "invalid": 1}
+        rejections = [orjson.loads(line) for line in rejected.getvalue().splitlines()]
+        assert sorted((item["line"], item["status"]) for item in rejections) == [
+            (2, "invalid"), (4, "duplicate"), (5, "duplicate")
+        ]
+        assert next(item for item in rejections if item["line"] == 2)["detail"].startswith("email:")
+        for index in (1, 3, 4, 5):
+            user = await repository.find_user_by_tax_id(f"{index:011d}")
+            assert user["name"] == f"User {index}"
+            assert user["user_type"] == "customers"
+
+    @pytest.mark.asyncio
+    async def test_repeated_rows_in_the_same_chunk(self, repository):
+        rejected = io.StringIO()
+
+        result = await bulk_register(repository, io.BytesIO(jsonl(row(1), row(1))), "jsonl", rejected)
+
+        assert result["created"] == 1 and result["duplicates"] == 1
+        assert "repeated from line 1" in rejected.getvalue()
+
+    @pytest.mark.asyncio
+    async def test_rerun_is_idempotent(self, repository):
+        data = jsonl(*(row(index) for index in range(30)))
+
+        first = await bulk_register(repository, io.BytesIO(data), "jsonl", io.StringIO(), chunk_size=10)
+        repository.check_tax_id_index = False
+        second = await bulk_register(repository, io.BytesIO(data), "jsonl", io.StringIO(), chunk_size=10)
+
+        assert (first["created"], first["duplicates"]) == (30, 0)
+        assert (second["created"], second["duplicates"]) == (0, 30)
+
+    @pytest.mark.asyncio
+    async def test_unprocessed_items_are_retried(self, repository):
+        users = [User.create_costumer(**row(index)).model_dump() for index in range(2)]
+        client = AsyncMock()
+        client.batch_write_item.side_effect = [
+            {"UnprocessedItems": {repository.table_name: [{"PutRequest": {"Item": users[1]}}]}},
+            {"UnprocessedItems": {}},
+        ]
+
+        with patch("source.helpers.repository.backoff_delay", return_value=0):
+            await repository._batch_write_group(client, [{"PutRequest": {"Item": user}} for user in users])
+
+        assert client.batch_write_item.call_count == 2
+        assert client.batch_write_item.call_args_list[1].kwargs["RequestItems"] == {
+            repository.table_name: [{"PutRequest": {"Item": users[1]}}]
+        }
+
+
+class TestBulkRegisterEndpoint:
+    """Testes para o endpoint de cadastro em lote"""
+
+    @pytest.fixture
+    def admin_app(self, test_app, test_private_key):
+        test_app.include_router(admin.router)
+        test_app.dependency_overrides[get_secrets] = lambda: Secrets(
+            jwt_private_key=test_private_key,
+            admin_token="s3cret",
+        )
+        return test_app
+
+    @pytest.mark.asyncio
+    async def test_streams_rejections_and_summary(self, admin_app, client: AsyncClient, repository):
+        body = "tax_id,email,name\n00000000001,a@example.com,Ana\n00000000001,b@example.com,Bia\n"
+
+        response = await client.post(
+            "/admin/users/bulk",
+            params={"format": "csv"},
+            content=body,
+            headers={"X-Admin-Token": "s3cret"},
+        )
+
+        assert response.status_code == 200
+        lines = [orjson.loads(line) for line in response.text.splitlines()]
+        assert lines[0]["status"] == "duplicate" and lines[0]["line"] == 3
+        assert lines[-1] == {"status": "completed", "rows": 2, "created": 1, "duplicates": 1, "invalid": 0}
+        assert (await repository.find_user_by_tax_id("00000000001"))["name"] == "Ana"
+
+    @pytest.mark.asyncio
+    async def test_requires_admin_token(self, admin_app, client: AsyncClient):
+        response = await client.post("/admin/users/bulk", content=jsonl(row(1)))
+
+        assert response.status_code == 401
@@ -0,0 +1,115 @@
+import pytest
+
+from source.helpers.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    """Testes para o cache LRU com TTL"""
+
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    def test_invalid_max_size(self):
+        with pytest.raises(ValueError):
+            TTLCache(max_size=0, ttl=10)
+
+    def test_get_and_set(self, clock):
+        cache = TTLCache(max_size=2, ttl=10, clock=clock)
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.stats.hits == 1
+        assert cache.stats.misses == 1
+
+    def test_entry_expires_after_ttl(self, clock):
+        cache = TTLCache(max_size=2, ttl=10, clock=clock)
+        cache.set("a", 1)
+
+        clock.now += 10
+
+        assert cache.get("a") is None
+        assert "a" not in cache
+        assert len(cache) == 0
+        assert cache.stats.expirations == 1
+
+    def test_per_entry_ttl(self, clock):
+        cache = TTLCache(max_size=2, ttl=10, clock=clock)
+        cache.set("short", 1, ttl=1)
+        cache.set("long", 2)
+
+        clock.now += 5
+
+        assert cache.get("short") is None
+        assert cache.get("long") == 2
+
+    def test_lru_eviction(self, clock):
+        cache = TTLCache(max_size=2, ttl=10, clock=clock)
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        # "a" passa a ser o mais recente, então "b" é despejado
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        assert cache.stats.evictions == 1
+
+    def test_invalidate_and_clear(self, clock):
+        cache = TTLCache(max_size=2, ttl=10, clock=clock)
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        cache.invalidate("a")
+        assert "a" not in cache
+
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_stats_as_dict(self, clock):
+        cache = TTLCache(max_size=1, ttl=10, clock=clock)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("b")
+        cache.get("a")
+
+        assert cache.stats.as_dict() == {"hits": 1, "misses": 1, "evictions": 1, "expirations": 0}
+
+    @pytest.mark.asyncio
+    async def test_get_or_load_reads_through(self, clock):
+        cache = TTLCache(max_size=2, ttl=10, clock=clock)
+        calls = []
+
+        async def loader(key):
+            calls.append(key)
+            return {"tax_id": key}
+
+        first = await cache.get_or_load("123", loader)
+        second = await cache.get_or_load("123", loader)
+
+        assert first == second == {"tax_id": "123"}
+        assert calls == ["123"]
+
+    @pytest.mark.asyncio
+    async def test_get_or_load_does_not_cache_none(self, clock):
+        cache = TTLCache(max_size=2, ttl=10, clock=clock)
+        calls = []
+
+        async def loader(key):
+            calls.append(key)
+            return None
+
+        assert await cache.get_or_load("123", loader) is None
+        assert await cache.get_or_load("123", loader) is None
+        assert calls == ["123", "123"]
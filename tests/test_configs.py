@@ -2,6 +2,7 @@ import pytest
 from unittest.mock import patch, AsyncMock
 from source.configs.settings import Settings
 from source.configs.secrets import Secrets
+from source.helpers.jwt import JwtKeyMaterial
 class TestSettings:
     """Testes para a classe Settings"""
     def test_settings_default_values(self):
@@ -73,3 +74,34 @@ class TestSecrets:
             mock_get_secrets.return_value = mock_secrets
             await Secrets.new(settings)
             mock_get_secrets.assert_called_once_with("test-secret-name")
+    def test_secrets_from_dict_with_verification_keys(self):
+        """Testa a leitura da chave atual e das chaves antigas de verificação"""
+        secrets = Secrets.from_dict({
+            "JWT_PRIVATE_KEY": "current-key",
+            "JWT_KEY_ID": "key-2",
+            "JWT_VERIFICATION_KEYS": [
+                {"kid": "key-1", "key": "previous-key"},
+                {"key": "older-key", "alg": "PS256"},
+            ],
+        })
+        assert secrets.jwt_signing_key == JwtKeyMaterial(key="current-key", kid="key-2")
+        assert secrets.jwt_verification_keys == [
+            JwtKeyMaterial(key="previous-key", kid="key-1"),
+            JwtKeyMaterial(key="older-key", algorithm="PS256"),
+        ]
+    def test_secrets_from_dict_defaults(self):
+        """Testa que JWT_KEY_ID e JWT_VERIFICATION_KEYS são opcionais"""
+        secrets = Secrets.from_dict({"JWT_PRIVATE_KEY": "current-key"})
+        assert secrets.jwt_key_id is None
+        assert secrets.jwt_verification_keys == []
+    @pytest.mark.asyncio
+    async def test_secrets_new_with_cache(self):
+        """Testa que Secrets.new lê pelo cache de secrets quando informado"""
+        settings = Settings(application_secret_name="test-secret-name")
+        secrets_cache = AsyncMock()
+        secrets_cache.get.return_value = {"JWT_PRIVATE_KEY": "cached-key"}
+        with patch('source.configs.secrets.get_aws_secrets', new_callable=AsyncMock) as mock_get_secrets:
+            secrets = await Secrets.new(settings, secrets_cache=secrets_cache)
+            assert secrets.jwt_private_key == "cached-key"
+            secrets_cache.get.assert_called_once_with("test-secret-name")
+            mock_get_secrets.assert_not_called()
@@ -0,0 +1,172 @@
+import argparse
+import asyncio
+import io
+from unittest.mock import patch
+
+import orjson
+import pytest
+from httpx import AsyncClient
+
+from source.cli.export_users import ExportCheckpoint, export, open_output
+from source.configs.secrets import Secrets
+from source.depends.app import get_secrets
+from source.helpers.capacity import CapacityBudget
+from source.models.user import User
+from source.routes import admin
+
+
+async def create_users(repository, count: int) -> set:
+    users = [
+        User.create_costumer(tax_id=f"{index:011d}", email=f"user{index}@example.com", name=f"User {index}")
+        for index in range(count)
+    ]
+    await asyncio.gather(*(repository.create_user(user.model_dump()) for user in users))
+    return {user.id for user in users}
+
+
+def exported_ids(data: bytes) -> list:
+    return [orjson.loads(line)["id"] for line in data.splitlines()]
+
+
+class InterruptedOutput(io.BytesIO):
+    """Grava a página e falha logo depois, antes do checkpoint andar"""
+
+    def __init__(self, fail_on_write: int):
+        super().__init__()
+        self.fail_on_write = fail_on_write
+        self.writes = 0
+
+    def write(self, data: bytes) -> int:
+        written = super().write(data)
+        # páginas só com marcadores TAXID# não gravam nada e não contam
+        if not data:
+            return written
+        self.writes += 1
+        if self.writes == self.fail_on_write:
+            raise ConnectionError("interrupted")
+        return written
+
+
+class TestCapacityBudget:
+    """Testes para o orçamento de capacidade de leitura"""
+
+    @pytest.mark.asyncio
+    async def test_waits_for_debt_to_be_repaid(self):
+        now = [0.0]
+
+        async def fake_sleep(seconds):
+            now[0] += seconds
+
+        budget = CapacityBudget(100, clock=lambda: now[0])
+        budget.consume(80)
+        with patch("source.helpers.capacity.asyncio.sleep", side_effect=fake_sleep):
+            await budget.wait()
+            assert now[0] == 0.0
+
+            budget.consume(70)
+            await budget.wait()
+
+        assert now[0] == pytest.approx(0.5)
+        assert budget.waited == pytest.approx(0.5)
+
+    def test_invalid_rate(self):
+        with pytest.raises(ValueError):
+            CapacityBudget(0)
+
+
+class TestExportUsers:
+    """Testes para a exportação com Scan paralelo"""
+
+    @pytest.mark.asyncio
+    async def test_exports_every_user_once(self, repository):
+        ids = await create_users(repository, 30)
+        output = io.BytesIO()
+        checkpoint = ExportCheckpoint(None, total_segments=3)
+
+        result = await export(repository, output, checkpoint, page_size=4)
+
+        exported = exported_ids(output.getvalue())
+        assert sorted(exported) == sorted(ids)
+        assert result["items"] == 30
+        assert checkpoint.pending_segments == []
+
+    @pytest.mark.asyncio
+    async def test_resume_after_interruption(self, repository, tmp_path):
+        ids = await create_users(repository, 30)
+        path = tmp_path / "users.ndjson"
+        args = argparse.Namespace(output=str(path), checkpoint=None, total_segments=3, resume=False)
+        _, checkpoint = open_output(args)
+        interrupted = InterruptedOutput(fail_on_write=4)
+
+        with pytest.raises(ConnectionError):
+            await export(repository, interrupted, checkpoint, page_size=4)
+        # o arquivo tem a página que falhou, além do que o checkpoint registrou
+        path.write_bytes(interrupted.getvalue())
+        assert len(exported_ids(path.read_bytes())) > checkpoint.state["items"]
+
+        output, resumed = open_output(argparse.Namespace(**{**vars(args), "resume": True}))
+        with output:
+            await export(repository, output, resumed, page_size=4)
+
+        exported = exported_ids(path.read_bytes())
+        assert len(exported) == 30
+        assert set(exported) == ids
+        assert resumed.state["items"] == 30
+
+    @pytest.mark.asyncio
+    async def test_read_capacity_budget(self, repository):
+        await create_users(repository, 10)
+        checkpoint = ExportCheckpoint(None, total_segments=2)
+        now = [0.0]
+
+        async def fake_sleep(seconds):
+            now[0] += seconds
+
+        with (
+            patch("source.usecase.export.CapacityBudget", lambda rate: CapacityBudget(rate, clock=lambda: now[0])),
+            patch("source.helpers.capacity.asyncio.sleep", side_effect=fake_sleep),
+        ):
+            result = await export(repository, io.BytesIO(), checkpoint, page_size=2, read_capacity=0.5)
+
+        assert result["items"] == 10
+        # mais de 0.5 RCU consumidas: as páginas seguintes esperaram o orçamento
+        assert result["read_units"] > 0.5
+        assert now[0] > 0
+        assert result["budget_wait_seconds"] == pytest.approx(now[0])
+
+
+class TestExportEndpoint:
+    """Testes para o endpoint de exportação"""
+
+    @pytest.fixture
+    def admin_app(self, test_app, test_private_key):
+        test_app.include_router(admin.router)
+        test_app.dependency_overrides[get_secrets] = lambda: Secrets(
+            jwt_private_key=test_private_key,
+            admin_token="s3cret",
+        )
+        return test_app
+
+    @pytest.mark.asyncio
+    async def test_streams_users(self, admin_app, client: AsyncClient, repository):
+        ids = await create_users(repository, 12)
+
+        response = await client.get(
+            "/admin/users/export",
+            params={"total_segments": 2, "page_size": 5},
+            headers={"X-Admin-Token": "s3cret"},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert sorted(exported_ids(response.content)) == sorted(ids)
+
+    @pytest.mark.asyncio
+    async def test_rejects_too_many_segments(self, admin_app, client: AsyncClient):
+        response = await client.get(
+            "/admin/users/export",
+            params={"total_segments": 1000},
+            headers={"X-Admin-Token": "s3cret"},
+        )
+
+        assert response.status_code == 422
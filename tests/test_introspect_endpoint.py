@@ -0,0 +1,59 @@
+import pytest
+from httpx import AsyncClient
+
+
+class TestIntrospectEndpoint:
+
+    @pytest.mark.asyncio
+    async def test_introspect_active_token(self, client: AsyncClient, jwt_signer):
+        token = await jwt_signer.issue({"sub": "user-123", "tax_id": "12345678900", "user_type": "customers"})
+
+        response = await client.post("/auth/introspect", json={"token": token})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["active"] is True
+        assert data["sub"] == "user-123"
+        assert data["tax_id"] == "12345678900"
+        assert data["exp"] > data["iat"]
+
+    @pytest.mark.asyncio
+    async def test_introspect_invalid_token(self, client: AsyncClient):
+        response = await client.post("/auth/introspect", json={"token": "not-a-valid-jwt"})
+
+        assert response.status_code == 200
+        assert response.json() == {"active": False}
+
+    @pytest.mark.asyncio
+    async def test_introspect_missing_token(self, client: AsyncClient):
+        response = await client.post("/auth/introspect", json={})
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_introspect_uses_cache(self, client: AsyncClient, jwt_signer, test_services):
+        token = jwt_signer.sign({"sub": "user-123"})
+
+        await client.post("/auth/introspect", json={"token": token})
+        await client.post("/auth/introspect", json={"token": token})
+
+        stats = test_services.token_verifier.cache.stats
+        assert stats.misses == 1
+        assert stats.hits == 1
+
+    @pytest.mark.asyncio
+    async def test_introspect_batch(self, client: AsyncClient, jwt_signer):
+        valid = jwt_signer.sign({"sub": "user-123"})
+
+        response = await client.post("/auth/introspect/batch", json={"tokens": [valid, "invalid.token.here", valid]})
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [result["active"] for result in results] == [True, False, True]
+        assert results[0]["sub"] == "user-123"
+
+    @pytest.mark.asyncio
+    async def test_introspect_batch_too_large(self, client: AsyncClient):
+        response = await client.post("/auth/introspect/batch", json={"tokens": ["token"] * 101})
+
+        assert response.status_code == 400
+        assert "at most 100" in response.json()["detail"].lower()
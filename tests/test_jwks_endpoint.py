@@ -0,0 +1,87 @@
+import pytest
+from httpx import AsyncClient
+from jwcrypto import jwk, jwt
+
+from source.helpers.jwt import JwksDocument
+
+
+class TestJwksEndpoint:
+
+    @pytest.mark.asyncio
+    async def test_jwks_lists_signing_key(self, client: AsyncClient, jwt_signer):
+        response = await client.get("/auth/.well-known/jwks.json")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/json")
+        keys = response.json()["keys"]
+        assert len(keys) == 1
+        assert keys[0]["kid"] == jwt_signer.kid
+        assert keys[0]["alg"] == jwt_signer.algorithm
+        assert keys[0]["use"] == "sig"
+        # apenas a parte pública da chave é publicada
+        assert "d" not in keys[0]
+
+    @pytest.mark.asyncio
+    async def test_jwks_cache_headers(self, client: AsyncClient, jwt_signer):
+        response = await client.get("/auth/.well-known/jwks.json")
+
+        assert response.headers["etag"] == jwt_signer.jwks.etag
+        assert response.headers["cache-control"] == "public, max-age=300"
+
+    @pytest.mark.asyncio
+    async def test_jwks_not_modified(self, client: AsyncClient, jwt_signer):
+        response = await client.get(
+            "/auth/.well-known/jwks.json",
+            headers={"If-None-Match": jwt_signer.jwks.etag}
+        )
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == jwt_signer.jwks.etag
+
+    @pytest.mark.asyncio
+    async def test_jwks_stale_etag_returns_body(self, client: AsyncClient):
+        response = await client.get(
+            "/auth/.well-known/jwks.json",
+            headers={"If-None-Match": '"outdated"'}
+        )
+
+        assert response.status_code == 200
+        assert response.json()["keys"]
+
+    @pytest.mark.asyncio
+    async def test_consumer_verifies_token_with_jwks(self, client: AsyncClient, jwt_signer):
+        response = await client.get("/auth/.well-known/jwks.json")
+        key_set = jwk.JWKSet.from_json(response.text)
+
+        token = jwt_signer.sign({"sub": "user-123"})
+        verified = jwt.JWT(jwt=token, key=key_set, algs=[jwt_signer.algorithm])
+
+        assert verified.token.jose_header["kid"] == jwt_signer.kid
+
+
+class TestJwksDocument:
+
+    @pytest.fixture
+    def document(self):
+        return JwksDocument.from_keys([{"kty": "OKP", "kid": "key-1"}], max_age=60)
+
+    def test_body_is_serialized_once(self, document):
+        assert document.body == b'{"keys":[{"kty":"OKP","kid":"key-1"}]}'
+        assert document.headers == {"ETag": document.etag, "Cache-Control": "public, max-age=60"}
+
+    def test_etag_changes_with_keys(self, document):
+        other = JwksDocument.from_keys([{"kty": "OKP", "kid": "key-2"}], max_age=60)
+        assert other.etag != document.etag
+
+    @pytest.mark.parametrize("header, expected", [
+        (None, False),
+        ("", False),
+        ('"other"', False),
+        ("*", True),
+    ])
+    def test_matches(self, document, header, expected):
+        assert document.matches(header) is expected
+
+    def test_matches_weak_and_listed_etags(self, document):
+        assert document.matches(f'"other", W/{document.etag}') is True
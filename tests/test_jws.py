@@ -0,0 +1,144 @@
+import base64
+import json
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+from source.helpers.jws import base64url_encode, encode_json
+from source.helpers.jwt import JwtSignatureProvider, sign_with_jwcrypto
+from tests.test_jwt_helper import generate_rsa_key_pair
+
+PAYLOADS = [
+    {},
+    {"sub": "user-123"},
+    {
+        "sub": "user-123",
+        "tax_id": "12345678900",
+        "email": "test@example.com",
+        "name": "Test User",
+        "user_type": "customers",
+        "iat": 1700000000,
+        "nbf": 1700000000,
+        "exp": 4102444800,
+    },
+    {"name": "José da Silva", "description": "áéíóú ñ ç"},
+    {"is_active": True, "optional_field": None, "score": 95.5, "age": 30},
+    {"metadata": {"role": "admin", "permissions": ["read", "write"]}},
+    {"big": 2 ** 70},
+]
+
+
+@pytest.fixture(scope="module")
+def provider():
+    return JwtSignatureProvider(private_key=generate_rsa_key_pair())
+
+
+class TestBase64UrlEncode:
+    """Testes para o base64url sem padding"""
+
+    @pytest.mark.parametrize("size", range(0, 8))
+    def test_matches_standard_library(self, size):
+        data = bytes(range(250, 250 - size, -1))
+        expected = base64.urlsafe_b64encode(data).rstrip(b"=")
+        assert base64url_encode(data) == expected
+
+
+class TestEncodeJson:
+    """Testes para a serialização das claims"""
+
+    @pytest.mark.parametrize("payload", PAYLOADS)
+    def test_matches_jwcrypto_serialization(self, payload):
+        expected = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode()
+        assert encode_json(payload) == expected
+
+
+class TestRS256FastPath:
+    """Testes de compatibilidade do caminho rápido com o jwcrypto"""
+
+    @pytest.mark.parametrize("payload", PAYLOADS)
+    def test_token_is_byte_compatible(self, provider, payload):
+        assert provider.sign(payload) == sign_with_jwcrypto(provider.private_key, payload, kid=provider.kid)
+
+    @pytest.mark.parametrize("payload", PAYLOADS)
+    def test_token_passes_verify(self, provider, payload):
+        claims = json.loads(provider.verify(provider.sign(payload)))
+        assert claims == payload
+
+
+def generate_private_key_pem(private_key) -> str:
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    ).decode('utf-8')
+
+
+@pytest.fixture(scope="module")
+def private_keys():
+    return {
+        "rsa": generate_rsa_key_pair(),
+        "p256": generate_private_key_pem(ec.generate_private_key(ec.SECP256R1())),
+        "p384": generate_private_key_pem(ec.generate_private_key(ec.SECP384R1())),
+        "ed25519": generate_private_key_pem(ed25519.Ed25519PrivateKey.generate()),
+    }
+
+
+class TestSignatureAlgorithms:
+    """Testes para os algoritmos de assinatura selecionáveis"""
+
+    @pytest.mark.parametrize("key_name, expected", [("rsa", "RS256"), ("p256", "ES256"), ("ed25519", "EdDSA")])
+    def test_algorithm_from_key_material(self, private_keys, key_name, expected):
+        provider = JwtSignatureProvider(private_key=private_keys[key_name])
+        assert provider.algorithm == expected
+
+    @pytest.mark.parametrize("key_name, algorithm", [
+        ("rsa", "RS256"),
+        ("rsa", "PS256"),
+        ("p256", "ES256"),
+        ("ed25519", "EdDSA"),
+    ])
+    def test_sign_and_verify(self, private_keys, key_name, algorithm):
+        provider = JwtSignatureProvider(private_key=private_keys[key_name], algorithm=algorithm)
+        token = provider.sign(PAYLOADS[2])
+
+        header_segment = token.split(".")[0]
+        header = json.loads(base64.urlsafe_b64decode(header_segment + "=" * (-len(header_segment) % 4)))
+        assert header == {"alg": algorithm, "kid": provider.kid}
+        assert json.loads(provider.verify(token)) == PAYLOADS[2]
+
+    @pytest.mark.parametrize("key_name, algorithm", [("p256", "ES256"), ("ed25519", "EdDSA"), ("rsa", "PS256")])
+    def test_jwcrypto_tokens_verify_with_provider(self, private_keys, key_name, algorithm):
+        provider = JwtSignatureProvider(private_key=private_keys[key_name], algorithm=algorithm)
+        token = sign_with_jwcrypto(provider.private_key, PAYLOADS[1], algorithm=algorithm)
+        assert json.loads(provider.verify(token)) == PAYLOADS[1]
+
+    def test_verify_rejects_other_algorithm(self, private_keys):
+        rs256 = JwtSignatureProvider(private_key=private_keys["rsa"], algorithm="RS256")
+        ps256 = JwtSignatureProvider(private_key=private_keys["rsa"], algorithm="PS256")
+        with pytest.raises(Exception):
+            ps256.verify(rs256.sign(PAYLOADS[1]))
+
+    @pytest.mark.parametrize("key_name, algorithm", [
+        ("rsa", "ES256"),
+        ("p256", "RS256"),
+        ("ed25519", "PS256"),
+        ("p384", "ES256"),
+        ("rsa", "HS256"),
+    ])
+    def test_incompatible_algorithm(self, private_keys, key_name, algorithm):
+        with pytest.raises(ValueError):
+            JwtSignatureProvider(private_key=private_keys[key_name], algorithm=algorithm)
+
+    def test_unsupported_key_type(self, private_keys):
+        with pytest.raises(ValueError):
+            JwtSignatureProvider(private_key=private_keys["p384"])
+
+    @pytest.mark.asyncio
+    async def test_sign_async_in_process_pool(self, private_keys):
+        provider = JwtSignatureProvider(private_key=private_keys["p256"], executor_type="process")
+        try:
+            token = await provider.sign_async(PAYLOADS[1])
+            assert json.loads(provider.verify(token)) == PAYLOADS[1]
+        finally:
+            provider.close()
@@ -1,9 +1,15 @@
 import pytest
+import base64
+import hashlib
 import json
+import threading
+import time
+from unittest.mock import AsyncMock, patch
 from cryptography.hazmat.primitives.asymmetric import rsa
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.backends import default_backend
-from source.helpers.jwt import JwtSignatureProvider
+from source.helpers.cache import TTLCache
+from source.helpers.jwt import CachedTokenVerifier, JwtKeyMaterial, JwtSignatureProvider
 def generate_rsa_key_pair():
     """Generate RSA key pair for testing"""
     private_key = rsa.generate_private_key(
@@ -157,3 +163,262 @@ class TestJwtSignatureProvider:
         claims_dict = json.loads(claims)
         # All keys should be present
         assert set(claims_dict.keys()).issuperset({"sub", "email", "name", "tax_id"})
+class TestJwtSignatureProviderExecutors:
+    """Testes para a assinatura assíncrona fora do event loop"""
+    @pytest.fixture
+    def private_key(self):
+        return generate_rsa_key_pair()
+    def test_invalid_executor_type(self, private_key):
+        with pytest.raises(ValueError) as exc_info:
+            JwtSignatureProvider(private_key=private_key, executor_type="gpu")
+        assert "Invalid executor_type" in str(exc_info.value)
+    def test_inline_has_no_executor(self, private_key):
+        provider = JwtSignatureProvider(private_key=private_key)
+        assert provider.executor_type == "inline"
+        assert provider.executor is None
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("executor_type", ["inline", "thread", "process"])
+    async def test_sign_async_round_trip(self, private_key, executor_type):
+        provider = JwtSignatureProvider(private_key=private_key, executor_type=executor_type, max_workers=1)
+        try:
+            token = await provider.sign_async({"sub": "user-123", "name": "José"})
+            claims_dict = json.loads(provider.verify(token))
+            assert claims_dict["sub"] == "user-123"
+            assert claims_dict["name"] == "José"
+            # RS256 é determinístico: a assinatura no pool é igual à assinatura inline
+            assert token == provider.sign({"sub": "user-123", "name": "José"})
+        finally:
+            provider.close()
+    @pytest.mark.asyncio
+    async def test_close_shuts_down_executor(self, private_key):
+        provider = JwtSignatureProvider(private_key=private_key, executor_type="thread")
+        await provider.sign_async({"sub": "user-123"})
+        assert provider.executor is not None
+        provider.close()
+        assert provider._executor is None
+        # close() é idempotente
+        provider.close()
+class TestJwtTokenIssuance:
+    """Testes para as claims temporais e o reaproveitamento de tokens"""
+    @pytest.fixture
+    def private_key(self):
+        return generate_rsa_key_pair()
+    @pytest.fixture
+    def now(self):
+        return {"value": float(int(time.time()))}
+    @pytest.fixture
+    def issuer(self, private_key, now):
+        token_cache = TTLCache(max_size=10, ttl=3600, clock=lambda: now["value"])
+        return JwtSignatureProvider(
+            private_key=private_key,
+            expires_in=600,
+            not_before_skew=5,
+            token_cache=token_cache,
+            reuse_min_remaining_ratio=0.5,
+            clock=lambda: now["value"],
+        )
+    @pytest.mark.asyncio
+    async def test_issue_adds_time_claims(self, private_key):
+        provider = JwtSignatureProvider(private_key=private_key, expires_in=600, not_before_skew=5)
+        token = await provider.issue({"sub": "user-123"})
+        claims_dict = json.loads(provider.verify(token))
+        assert claims_dict["exp"] - claims_dict["iat"] == 600
+        assert claims_dict["iat"] - claims_dict["nbf"] == 5
+    @pytest.mark.asyncio
+    async def test_issue_time_claims_can_be_disabled(self, private_key):
+        provider = JwtSignatureProvider(private_key=private_key, expires_in=0, include_iat=False, include_nbf=False)
+        token = await provider.issue({"sub": "user-123"})
+        claims_dict = json.loads(provider.verify(token))
+        assert set(claims_dict.keys()) == {"sub"}
+    @pytest.mark.asyncio
+    async def test_expired_token_is_rejected(self, private_key):
+        provider = JwtSignatureProvider(private_key=private_key, expires_in=60, clock=lambda: 1_000_000.0)
+        token = await provider.issue({"sub": "user-123"})
+        with pytest.raises(Exception):
+            provider.verify(token)
+    @pytest.mark.asyncio
+    async def test_issue_reuses_token_within_window(self, issuer, now):
+        first = await issuer.issue({"sub": "user-123", "name": "Test User"})
+        now["value"] += 299
+        with patch.object(issuer, "sign_async", new_callable=AsyncMock) as sign_async:
+            second = await issuer.issue({"sub": "user-123", "name": "Test User"})
+        sign_async.assert_not_called()
+        assert first == second
+    @pytest.mark.asyncio
+    async def test_issue_signs_again_near_expiry(self, issuer, now):
+        first = await issuer.issue({"sub": "user-123"})
+        # restam menos de 50% dos 600s de validade
+        now["value"] += 301
+        second = await issuer.issue({"sub": "user-123"})
+        assert first != second
+        payload_segment = second.split(".")[1]
+        claims_dict = json.loads(base64.urlsafe_b64decode(payload_segment + "=" * (-len(payload_segment) % 4)))
+        assert claims_dict["iat"] == int(now["value"])
+    @pytest.mark.asyncio
+    async def test_issue_signs_again_when_user_changes(self, issuer):
+        first = await issuer.issue({"sub": "user-123", "email": "old@example.com"})
+        second = await issuer.issue({"sub": "user-123", "email": "new@example.com"})
+        assert first != second
+        assert json.loads(issuer.verify(second))["email"] == "new@example.com"
+    @pytest.mark.asyncio
+    async def test_invalidate_drops_cached_token(self, issuer, now):
+        first = await issuer.issue({"sub": "user-123"})
+        issuer.invalidate("user-123")
+        now["value"] += 1
+        second = await issuer.issue({"sub": "user-123"})
+        assert first != second
+    def test_reuse_window(self, private_key):
+        provider = JwtSignatureProvider(private_key=private_key, expires_in=600, reuse_min_remaining_ratio=0.25)
+        assert provider.reuse_window == 450
+        provider.reuse_min_remaining_ratio = 1.0
+        assert provider.reuse_window == 0
+        provider.expires_in = 0
+        assert provider.reuse_window == 0
+class TestCachedTokenVerifier:
+    """Testes para o cache de tokens verificados"""
+    @pytest.fixture
+    def private_key(self):
+        return generate_rsa_key_pair()
+    @pytest.fixture
+    def now(self):
+        return {"value": float(int(time.time()))}
+    @pytest.fixture
+    def verifier(self, private_key, now):
+        provider = JwtSignatureProvider(private_key=private_key, expires_in=60, clock=lambda: now["value"])
+        cache = TTLCache(max_size=2, ttl=300, clock=lambda: now["value"])
+        return CachedTokenVerifier(jwt_signer=provider, cache=cache, clock=lambda: now["value"])
+    @pytest.mark.asyncio
+    async def test_hit_skips_signature_verification(self, verifier):
+        token = await verifier.jwt_signer.issue({"sub": "user-123"})
+        assert (await verifier.introspect(token))["sub"] == "user-123"
+        with patch.object(verifier.jwt_signer, "verify") as verify:
+            assert (await verifier.introspect(token))["sub"] == "user-123"
+        verify.assert_not_called()
+    @pytest.mark.asyncio
+    async def test_invalid_token_returns_none(self, verifier):
+        assert await verifier.introspect("invalid.token.here") is None
+        assert await verifier.introspect("not-a-valid-jwt") is None
+        assert len(verifier.cache) == 0
+    @pytest.mark.asyncio
+    async def test_cached_entry_honors_exp(self, verifier, now):
+        token = await verifier.jwt_signer.issue({"sub": "user-123"})
+        await verifier.introspect(token)
+        # a entrada vale só até o exp do token, mesmo com TTL maior no cache
+        now["value"] += 61
+        assert verifier.cache.get(hashlib.sha256(token.encode()).digest()) is None
+    @pytest.mark.asyncio
+    async def test_expired_within_jwcrypto_leeway_is_inactive(self, verifier):
+        # expirado há 30 s: o jwcrypto aceitaria (tolerância de 60 s), o introspect não
+        now = int(time.time())
+        token = verifier.jwt_signer.sign({"sub": "user-123", "exp": now - 30})
+        assert await verifier.introspect(token) is None
+        assert len(verifier.cache) == 0
+    @pytest.mark.asyncio
+    async def test_not_yet_valid_within_jwcrypto_leeway_is_inactive(self, verifier):
+        now = int(time.time())
+        token = verifier.jwt_signer.sign({"sub": "user-123", "nbf": now + 30, "exp": now + 600})
+        assert await verifier.introspect(token) is None
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self, verifier):
+        tokens = [verifier.jwt_signer.sign({"sub": f"user-{index}"}) for index in range(3)]
+        for token in tokens:
+            await verifier.introspect(token)
+        assert len(verifier.cache) == 2
+        assert verifier.cache.stats.evictions == 1
+    @pytest.mark.asyncio
+    async def test_works_without_cache(self, private_key):
+        provider = JwtSignatureProvider(private_key=private_key)
+        verifier = CachedTokenVerifier(jwt_signer=provider)
+        assert await verifier.introspect(provider.sign({"sub": "user-123"})) == {"sub": "user-123"}
+    @pytest.mark.asyncio
+    async def test_miss_verifies_off_the_event_loop(self, private_key):
+        provider = JwtSignatureProvider(private_key=private_key, executor_type="thread")
+        verifier = CachedTokenVerifier(jwt_signer=provider)
+        verify = provider.key_set.verify
+        threads = []
+        def tracking_verify(token):
+            threads.append(threading.get_ident())
+            return verify(token)
+        try:
+            with patch.object(provider.key_set, "verify", side_effect=tracking_verify):
+                assert await verifier.introspect(provider.sign({"sub": "user-123"})) == {"sub": "user-123"}
+        finally:
+            provider.close()
+        assert threads and threads[0] != threading.get_ident()
+    @pytest.mark.asyncio
+    async def test_miss_verifies_in_process_pool(self, private_key):
+        provider = JwtSignatureProvider(private_key=private_key, executor_type="process")
+        verifier = CachedTokenVerifier(jwt_signer=provider)
+        try:
+            assert await verifier.introspect(provider.sign({"sub": "user-123"})) == {"sub": "user-123"}
+            assert await verifier.introspect("invalid.token.here") is None
+        finally:
+            provider.close()
+class TestJwtKeySet:
+    """Testes para o conjunto de chaves com kid"""
+    @pytest.fixture
+    def old_key(self):
+        return generate_rsa_key_pair()
+    @pytest.fixture
+    def new_key(self):
+        return generate_rsa_key_pair()
+    def test_kid_defaults_to_thumbprint(self, new_key):
+        provider = JwtSignatureProvider(private_key=new_key)
+        assert provider.kid == provider.private_key.thumbprint()
+    def test_verifies_tokens_from_previous_key(self, old_key, new_key):
+        old_provider = JwtSignatureProvider(private_key=old_key, kid="key-1")
+        old_token = old_provider.sign({"sub": "user-123"})
+        # a chave antiga pode ser publicada só com a parte pública
+        public_pem = old_provider.private_key.export_to_pem().decode()
+        provider = JwtSignatureProvider(
+            private_key=new_key,
+            kid="key-2",
+            verification_keys=[JwtKeyMaterial(key=public_pem, kid="key-1")],
+        )
+        assert json.loads(provider.verify(old_token))["sub"] == "user-123"
+        assert json.loads(provider.verify(provider.sign({"sub": "user-456"})))["sub"] == "user-456"
+    def test_rejects_unknown_kid(self, old_key, new_key):
+        old_provider = JwtSignatureProvider(private_key=old_key, kid="key-1")
+        provider = JwtSignatureProvider(private_key=new_key, kid="key-2")
+        with pytest.raises(Exception):
+            provider.verify(old_provider.sign({"sub": "user-123"}))
+    def test_jwks_lists_all_keys_once(self, old_key, new_key):
+        provider = JwtSignatureProvider(
+            private_key=new_key,
+            kid="key-2",
+            verification_keys=[
+                JwtKeyMaterial(key=old_key, kid="key-1"),
+                JwtKeyMaterial(key=new_key, kid="key-2"),
+            ],
+        )
+        keys = json.loads(provider.jwks.body)["keys"]
+        assert [key["kid"] for key in keys] == ["key-2", "key-1"]
+        assert all("d" not in key for key in keys)
+    @pytest.mark.asyncio
+    async def test_load_keys_swaps_atomically(self, old_key, new_key):
+        provider = JwtSignatureProvider(private_key=old_key, kid="key-1", executor_type="process")
+        try:
+            provider.load_keys(provider.new_key_set(JwtKeyMaterial(key=new_key, kid="key-2")))
+            token = await provider.sign_async({"sub": "user-123"})
+            header_segment = token.split(".")[0]
+            header = json.loads(base64.urlsafe_b64decode(header_segment + "=" * (-len(header_segment) % 4)))
+            assert header["kid"] == "key-2"
+            assert json.loads(provider.verify(token))["sub"] == "user-123"
+        finally:
+            provider.close()
+    @pytest.mark.asyncio
+    async def test_token_signed_during_rotation_is_not_cached(self, old_key, new_key):
+        provider = JwtSignatureProvider(private_key=old_key, kid="key-1", token_cache=TTLCache(max_size=10, ttl=3600))
+        sign_with = provider._sign_with
+        async def rotate_while_signing(key_set, payload):
+            token = await sign_with(key_set, payload)
+            provider.load_keys(provider.new_key_set(JwtKeyMaterial(key=new_key, kid="key-2")))
+            return token
+        with patch.object(provider, "_sign_with", side_effect=rotate_while_signing):
+            first = await provider.issue({"sub": "user-123"})
+        assert len(provider.token_cache) == 0
+        second = await provider.issue({"sub": "user-123"})
+        assert second != first
+        header_segment = second.split(".")[0]
+        header = json.loads(base64.urlsafe_b64decode(header_segment + "=" * (-len(header_segment) % 4)))
+        assert header["kid"] == "key-2"
@@ -0,0 +1,136 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from source.configs.key_rotation import KeyRotationTask
+from source.configs.secrets import Secrets
+from source.configs.services import Services
+from source.configs.settings import Settings
+from source.helpers.cache import TTLCache
+from source.helpers.jwt import CachedTokenVerifier, JwtKeyMaterial, JwtSignatureProvider
+from tests.test_jwt_helper import generate_rsa_key_pair
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return {"old": generate_rsa_key_pair(), "new": generate_rsa_key_pair()}
+
+
+@pytest.fixture
+def services(keys):
+    services = Services()
+    services.jwt_signer = JwtSignatureProvider(
+        private_key=keys["old"],
+        kid="key-1",
+        token_cache=TTLCache(max_size=10, ttl=3600),
+    )
+    services.token_verifier = CachedTokenVerifier(
+        jwt_signer=services.jwt_signer,
+        cache=TTLCache(max_size=10, ttl=300),
+    )
+    return services
+
+
+class TestKeyRotationTask:
+    """Testes para a rotação de chaves sem restart"""
+
+    @pytest.mark.asyncio
+    async def test_refresh_swaps_signing_key(self, keys, services):
+        current = Secrets(jwt_private_key=keys["old"], jwt_key_id="key-1")
+        rotated = Secrets(
+            jwt_private_key=keys["new"],
+            jwt_key_id="key-2",
+            jwt_verification_keys=[JwtKeyMaterial(key=keys["old"], kid="key-1")],
+        )
+        task = KeyRotationTask(
+            settings=Settings(),
+            services=services,
+            secrets=current,
+            fetch_secrets=AsyncMock(return_value=rotated),
+        )
+        old_token = services.jwt_signer.sign({"sub": "user-123"})
+
+        assert await task.refresh() is True
+
+        assert services.jwt_signer.kid == "key-2"
+        assert task.rotations == 1
+        assert task.secrets is rotated
+        # tokens emitidos com a chave anterior continuam válidos
+        assert json.loads(services.jwt_signer.verify(old_token))["sub"] == "user-123"
+        kids = [key["kid"] for key in json.loads(services.jwt_signer.jwks.body)["keys"]]
+        assert kids == ["key-2", "key-1"]
+
+    @pytest.mark.asyncio
+    async def test_refresh_clears_token_caches(self, keys, services):
+        token = await services.jwt_signer.issue({"sub": "user-123"})
+        await services.token_verifier.introspect(token)
+        task = KeyRotationTask(
+            settings=Settings(),
+            services=services,
+            secrets=Secrets(jwt_private_key=keys["old"], jwt_key_id="key-1"),
+            fetch_secrets=AsyncMock(return_value=Secrets(jwt_private_key=keys["new"], jwt_key_id="key-2")),
+        )
+
+        await task.refresh()
+
+        assert len(services.jwt_signer.token_cache) == 0
+        assert len(services.token_verifier.cache) == 0
+        new_token = await services.jwt_signer.issue({"sub": "user-123"})
+        assert new_token != token
+
+    @pytest.mark.asyncio
+    async def test_refresh_without_changes_keeps_key_set(self, keys, services):
+        secrets = Secrets(jwt_private_key=keys["old"], jwt_key_id="key-1")
+        key_set = services.jwt_signer.key_set
+        task = KeyRotationTask(
+            settings=Settings(),
+            services=services,
+            secrets=secrets,
+            fetch_secrets=AsyncMock(return_value=Secrets(jwt_private_key=keys["old"], jwt_key_id="key-1")),
+        )
+
+        assert await task.refresh() is False
+        assert services.jwt_signer.key_set is key_set
+
+    @pytest.mark.asyncio
+    async def test_run_survives_fetch_failures(self, keys, services):
+        settings = Settings(jwt_key_refresh_interval_seconds=0.01, jwt_key_refresh_jitter=0)
+        task = KeyRotationTask(
+            settings=settings,
+            services=services,
+            secrets=Secrets(jwt_private_key=keys["old"], jwt_key_id="key-1"),
+            fetch_secrets=AsyncMock(side_effect=RuntimeError("Secrets Manager unavailable")),
+        )
+
+        task.start()
+        await asyncio.sleep(0.05)
+        await task.stop()
+
+        assert task.failures >= 1
+        assert services.jwt_signer.kid == "key-1"
+
+    @pytest.mark.asyncio
+    async def test_disabled_when_interval_is_zero(self, keys, services):
+        task = KeyRotationTask(
+            settings=Settings(jwt_key_refresh_interval_seconds=0),
+            services=services,
+            secrets=Secrets(jwt_private_key=keys["old"]),
+        )
+
+        task.start()
+        assert task._task is None
+        await task.stop()
+
+    def test_next_delay_is_jittered(self, keys, services):
+        task = KeyRotationTask(
+            settings=Settings(jwt_key_refresh_interval_seconds=100, jwt_key_refresh_jitter=0.2),
+            services=services,
+            secrets=Secrets(jwt_private_key=keys["old"]),
+        )
+
+        delays = [task.next_delay() for _ in range(50)]
+
+        assert all(80 <= delay <= 120 for delay in delays)
+        assert len(set(delays)) > 1
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+from source.configs.loop_monitor import LoopMonitorTask
+from source.configs.settings import Settings
+from source.helpers import metrics
+
+
+def blocking_handler(seconds: float):
+    # simula uma assinatura RSA ou validação pydantic pesada rodando direto no loop
+    time.sleep(seconds)
+
+
+class TestLoopMonitorTask:
+    """Testes para o monitor de atraso e bloqueio do event loop"""
+
+    @pytest.fixture
+    def settings(self):
+        return Settings(
+            loop_monitor_interval_seconds=0.01,
+            loop_block_threshold_seconds=0.05,
+            loop_block_report_interval_seconds=60,
+        )
+
+    @pytest.mark.asyncio
+    async def test_records_lag(self, settings):
+        samples = metrics.LOOP_LAG_SECONDS.count()
+        monitor = LoopMonitorTask(settings=settings)
+        monitor.start()
+
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+
+        assert metrics.LOOP_LAG_SECONDS.count() > samples
+
+    @pytest.mark.asyncio
+    async def test_reports_blocking_stack(self, settings, caplog):
+        blocks = metrics.LOOP_BLOCKS.value()
+        monitor = LoopMonitorTask(settings=settings)
+        monitor.start()
+        await asyncio.sleep(0.02)
+
+        with caplog.at_level(logging.WARNING, logger="source.configs.loop_monitor"):
+            blocking_handler(0.2)
+            await asyncio.sleep(0.05)
+        await monitor.stop()
+
+        assert metrics.LOOP_BLOCKS.value() == blocks + 1
+        assert monitor.reports == 1
+        assert "Event loop blocked for at least" in caplog.text
+        assert "in blocking_handler" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_reports_are_rate_limited(self, settings, caplog):
+        monitor = LoopMonitorTask(settings=settings)
+        monitor.start()
+        await asyncio.sleep(0.02)
+
+        with caplog.at_level(logging.WARNING, logger="source.configs.loop_monitor"):
+            for _ in range(3):
+                blocking_handler(0.15)
+                await asyncio.sleep(0.03)
+        await monitor.stop()
+
+        assert monitor.reports == 1
+        assert monitor.suppressed == 2
+        assert caplog.text.count("Event loop blocked") == 1
+
+    @pytest.mark.asyncio
+    async def test_disabled(self):
+        monitor = LoopMonitorTask(settings=Settings(loop_monitor_interval_seconds=0))
+        monitor.start()
+
+        assert monitor._task is None
+        await monitor.stop()
+
+    @pytest.mark.asyncio
+    async def test_stop_joins_watchdog(self, settings):
+        monitor = LoopMonitorTask(settings=settings)
+        monitor.start()
+        watchdog = monitor._watchdog
+
+        await monitor.stop()
+
+        assert not watchdog.is_alive()
+        assert monitor._task is None
@@ -0,0 +1,198 @@
+import os
+
+import orjson
+import pytest
+from httpx import AsyncClient
+
+from source.configs.metrics import MetricsTask
+from source.configs.settings import Settings
+from source.depends.app import get_metrics
+from source.helpers import metrics
+from source.helpers.cache import TTLCache
+from source.helpers.metrics import MetricsMiddleware, MetricsRegistry, consumed_units, merge_snapshots, render
+
+
+class TestMetricsRegistry:
+    """Testes para o registro de métricas e o formato de exposição do Prometheus"""
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Latência", ("route",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, "/auth")
+        histogram.observe(0.1, "/auth")
+        histogram.observe(0.5, "/auth")
+        histogram.observe(3.0, "/auth")
+
+        text = render(registry.snapshot())
+
+        assert "# TYPE latency_seconds histogram" in text
+        assert 'latency_seconds_bucket{route="/auth",le="0.1"} 2' in text
+        assert 'latency_seconds_bucket{route="/auth",le="1"} 3' in text
+        assert 'latency_seconds_bucket{route="/auth",le="+Inf"} 4' in text
+        assert 'latency_seconds_sum{route="/auth"} 3.65' in text
+        assert 'latency_seconds_count{route="/auth"} 4' in text
+        assert histogram.count("/auth") == 4
+
+    def test_counter_and_gauge(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("responses_total", "Respostas", ("status",))
+        gauge = registry.gauge("entries", "Entradas")
+        counter.inc("404")
+        counter.inc("404")
+        gauge.set(7)
+
+        text = render(registry.snapshot())
+
+        assert 'responses_total{status="404"} 2' in text
+        assert "# TYPE entries gauge" in text
+        assert "entries 7" in text
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "Requisições", ("route",)).inc('a"b\\c\nd')
+
+        assert 'requests_total{route="a\\"b\\\\c\\nd"} 1' in render(registry.snapshot())
+
+    def test_duplicate_metric_name(self):
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "Requisições")
+        with pytest.raises(ValueError):
+            registry.histogram("requests_total", "Requisições")
+
+    def test_consumed_units(self):
+        assert consumed_units(None) == 0.0
+        assert consumed_units({"TableName": "users", "CapacityUnits": 0.5}) == 0.5
+        # TransactWriteItems: uma entrada por tabela
+        assert consumed_units([{"CapacityUnits": 2.0}, {"CapacityUnits": 2.0}]) == 4.0
+
+    def test_merge_sums_worker_snapshots(self):
+        first, second = MetricsRegistry(), MetricsRegistry()
+        for registry, value in ((first, 0.05), (second, 0.5)):
+            registry.counter("responses_total", "Respostas", ("status",)).inc("200")
+            registry.histogram("latency_seconds", "Latência", buckets=(0.1, 1.0)).observe(value)
+        second.get("responses_total").inc("409")
+
+        text = render(merge_snapshots([first.snapshot(), second.snapshot()]))
+
+        assert 'responses_total{status="200"} 2' in text
+        assert 'responses_total{status="409"} 1' in text
+        assert 'latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{le="1"} 2' in text
+        assert "latency_seconds_count 2" in text
+
+
+class TestMetricsTask:
+    """Testes para a coleta e a agregação entre workers"""
+
+    def test_collects_cache_stats(self, test_services):
+        test_services.repository.user_cache = TTLCache(max_size=10, ttl=300)
+        test_services.repository.user_cache.set("12345678900", {"id": "user"})
+        test_services.repository.user_cache.get("12345678900")
+        test_services.repository.user_cache.get("00000000000")
+        registry = MetricsRegistry()
+
+        MetricsTask(settings=Settings(), services=test_services, registry=registry).collect()
+
+        assert metrics.CACHE_REQUESTS.value("user", "hit") == 1
+        assert metrics.CACHE_REQUESTS.value("user", "miss") == 1
+        assert metrics.CACHE_ENTRIES.value("user") == 1
+        assert metrics.CACHE_REQUESTS.value("introspection", "hit") == 0
+
+    def test_render_merges_live_workers(self, test_services, tmp_path):
+        registry = MetricsRegistry()
+        registry.counter("responses_total", "Respostas", ("status",)).inc("200")
+        other = MetricsRegistry()
+        other.counter("responses_total", "Respostas", ("status",)).inc("200", amount=4)
+        # o processo pai faz o papel do outro worker vivo; o pid 999999999 não existe
+        (tmp_path / f"{os.getppid()}.json").write_bytes(orjson.dumps(other.snapshot()))
+        (tmp_path / "999999999.json").write_bytes(orjson.dumps(other.snapshot()))
+        task = MetricsTask(
+            settings=Settings(metrics_multiprocess_dir=str(tmp_path)),
+            services=test_services,
+            registry=registry,
+        )
+
+        text = task.render()
+
+        assert 'responses_total{status="200"} 5' in text
+        assert (tmp_path / f"{os.getpid()}.json").exists()
+
+    @pytest.mark.asyncio
+    async def test_stop_removes_snapshot(self, test_services, tmp_path):
+        task = MetricsTask(
+            settings=Settings(metrics_multiprocess_dir=str(tmp_path)),
+            services=test_services,
+            registry=MetricsRegistry(),
+        )
+        task.start()
+        task.write_snapshot()
+
+        await task.stop()
+
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestMetricsEndpoint:
+    """Testes para o middleware e o endpoint /metrics"""
+
+    @pytest.fixture
+    def metrics_app(self, test_app, test_services):
+        test_app.add_middleware(MetricsMiddleware)
+        task = MetricsTask(settings=Settings(), services=test_services)
+        test_app.dependency_overrides[get_metrics] = lambda: task
+        return test_app
+
+    @pytest.mark.asyncio
+    async def test_records_route_status_and_stages(self, metrics_app, client: AsyncClient, sample_user_data):
+        requests = metrics.REQUEST_SECONDS.count("POST", "/auth", "201")
+        conflicts = metrics.RESPONSES.value("POST", "/auth", "409")
+        not_found = metrics.RESPONSES.value("GET", "/auth", "404")
+        queries = metrics.DYNAMODB_SECONDS.count("query")
+        signatures = metrics.JWT_SIGN_SECONDS.count("inline")
+        serializations = metrics.SERIALIZATION_SECONDS.count("GET", "/auth")
+
+        await client.post("/auth", json=sample_user_data)
+        await client.post("/auth", json=sample_user_data)
+        await client.get("/auth", params={"tax_id": sample_user_data["tax_id"]})
+        await client.get("/auth", params={"tax_id": "00000000000"})
+
+        assert metrics.REQUEST_SECONDS.count("POST", "/auth", "201") == requests + 1
+        assert metrics.RESPONSES.value("POST", "/auth", "409") == conflicts + 1
+        assert metrics.RESPONSES.value("GET", "/auth", "404") == not_found + 1
+        assert metrics.DYNAMODB_SECONDS.count("query") > queries
+        assert metrics.JWT_SIGN_SECONDS.count("inline") == signatures + 1
+        assert metrics.SERIALIZATION_SECONDS.count("GET", "/auth") == serializations + 1
+
+    @pytest.mark.asyncio
+    async def test_metrics_endpoint(self, metrics_app, client: AsyncClient):
+        await client.get("/health")
+        response = await client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'auth_request_duration_seconds_count{method="GET",route="/health",status="200"}' in response.text
+        assert "# TYPE auth_cache_requests_total counter" in response.text
+
+    @pytest.mark.asyncio
+    async def test_unmatched_paths_share_one_label(self, metrics_app, client: AsyncClient):
+        before = metrics.RESPONSES.value("GET", "unmatched", "404")
+
+        await client.get("/wp-admin/setup.php")
+        await client.get("/.env")
+
+        assert metrics.RESPONSES.value("GET", "unmatched", "404") == before + 2
+
+    @pytest.mark.asyncio
+    async def test_records_dynamodb_usage_per_route(self, metrics_app, client: AsyncClient, test_services):
+        test_services.repository.capacity = {"ReturnConsumedCapacity": "TOTAL"}
+        calls = metrics.REQUEST_DYNAMODB_CALLS.value("GET", "/auth", "404")
+        units = metrics.REQUEST_DYNAMODB_CAPACITY.value("GET", "/auth", "404", "read")
+        health_calls = metrics.REQUEST_DYNAMODB_CALLS.value("GET", "/health", "200")
+
+        await client.get("/auth", params={"tax_id": "00000000000"})
+        await client.get("/health")
+
+        # CPF inexistente: uma consulta ao GSI, que consome leitura
+        assert metrics.REQUEST_DYNAMODB_CALLS.value("GET", "/auth", "404") == calls + 1
+        assert metrics.REQUEST_DYNAMODB_CAPACITY.value("GET", "/auth", "404", "read") > units
+        assert metrics.REQUEST_DYNAMODB_CALLS.value("GET", "/health", "200") == health_calls
@@ -0,0 +1,240 @@
+import asyncio
+import os
+import time
+
+import pytest
+from httpx import AsyncClient
+
+from source.configs.profiling import ProfilingTask
+from source.configs.secrets import Secrets
+from source.configs.settings import Settings
+from source.depends.app import get_profiling, get_secrets
+from source.helpers.profiling import (
+    ProfilingMiddleware,
+    ProfilingSession,
+    RequestProfiler,
+    dump_stacks,
+    load_stacks,
+    load_stats,
+)
+from source.routes import admin
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def busy_handler(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+async def asgi_app(scope, receive, send):
+    busy_handler(0.001)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def call(app):
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    await app({"type": "http", "method": "GET", "path": "/auth"}, receive, send)
+
+
+def session(mode="cprofile", sample_every=1, until=2000.0):
+    return ProfilingSession(mode=mode, sample_every=sample_every, started_at=1000.0, until=until)
+
+
+class TestRequestProfiler:
+    """Testes para o profiling amostrado de requisições"""
+
+    @pytest.mark.asyncio
+    async def test_disabled_does_not_profile(self):
+        profiler = RequestProfiler()
+        await call(ProfilingMiddleware(asgi_app, profiler=profiler))
+
+        assert profiler.enabled is False
+        assert profiler.requests == 0
+        assert profiler.stats == {}
+
+    @pytest.mark.asyncio
+    async def test_samples_one_in_n_requests(self):
+        profiler = RequestProfiler(clock=FakeClock())
+        profiler.start(session(sample_every=3))
+        app = ProfilingMiddleware(asgi_app, profiler=profiler)
+
+        for _ in range(7):
+            await call(app)
+
+        assert profiler.requests == 7
+        assert profiler.sampled == 2
+        functions = {func[2] for func in load_stats(profiler.dump("cprofile"))}
+        assert "busy_handler" in functions
+
+    @pytest.mark.asyncio
+    async def test_session_expires(self):
+        clock = FakeClock()
+        profiler = RequestProfiler(clock=clock)
+        profiler.start(session(until=1010.0))
+        assert profiler.enabled is True
+
+        clock.now = 1010.0
+
+        assert profiler.enabled is False
+        assert profiler.session is None
+
+    @pytest.mark.asyncio
+    async def test_concurrent_samples_are_skipped(self):
+        profiler = RequestProfiler(clock=FakeClock())
+        profiler.start(session())
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_app(scope, receive, send):
+            started.set()
+            await release.wait()
+
+        app = ProfilingMiddleware(slow_app, profiler=profiler)
+        first = asyncio.create_task(call(app))
+        await started.wait()
+        await call(ProfilingMiddleware(asgi_app, profiler=profiler))
+        release.set()
+        await first
+
+        assert profiler.sampled == 1
+        assert profiler.skipped == 1
+
+    @pytest.mark.asyncio
+    async def test_stack_sampling(self):
+        profiler = RequestProfiler(stack_interval=0.001, clock=FakeClock())
+        profiler.start(session(mode="stacks"))
+        busy_handler(0.05)
+        profiler.stop()
+
+        stacks = load_stacks(profiler.dump("stacks"))
+        assert any(stack.endswith("test_profiling.py:busy_handler") for stack in stacks)
+        # o resultado continua disponível depois de desligar
+        assert profiler.status()["stack_samples"] == sum(stacks.values())
+
+    def test_invalid_mode(self):
+        with pytest.raises(ValueError):
+            RequestProfiler().start(session(mode="perf"))
+
+
+class TestProfilingTask:
+    """Testes para o comando e os resultados compartilhados entre workers"""
+
+    @pytest.mark.asyncio
+    async def test_session_reaches_other_workers(self, tmp_path):
+        settings = Settings(profiling_dir=str(tmp_path))
+        worker = ProfilingTask(settings=settings, profiler=RequestProfiler())
+        other_worker = ProfilingTask(settings=settings, profiler=RequestProfiler())
+
+        worker.start_session(mode="cprofile", sample_every=10, duration=60)
+        other_worker.poll()
+
+        assert other_worker.profiler.session.sample_every == 10
+
+        worker.stop_session()
+        other_worker.poll()
+
+        assert other_worker.profiler.session is None
+
+    @pytest.mark.asyncio
+    async def test_duration_is_capped(self):
+        task = ProfilingTask(settings=Settings(profiling_max_duration_seconds=30), profiler=RequestProfiler())
+
+        started = task.start_session(mode="cprofile", sample_every=1, duration=3600)
+
+        assert started.until - started.started_at == 30
+
+    @pytest.mark.asyncio
+    async def test_expired_control_is_ignored(self, tmp_path):
+        settings = Settings(profiling_dir=str(tmp_path))
+        worker = ProfilingTask(settings=settings, profiler=RequestProfiler())
+        worker.publish({"session": session(until=time.time() - 1).as_dict()})
+
+        restarted_worker = ProfilingTask(settings=settings, profiler=RequestProfiler())
+        restarted_worker.poll()
+
+        assert restarted_worker.profiler.session is None
+
+    @pytest.mark.asyncio
+    async def test_download_merges_live_workers(self, tmp_path):
+        task = ProfilingTask(settings=Settings(profiling_dir=str(tmp_path)), profiler=RequestProfiler())
+        task.start_session(mode="stacks", sample_every=1, duration=60)
+        task.profiler.stop()
+        task.profiler.stacks["main;handler"] = 2
+        # o processo pai faz o papel do outro worker vivo; o pid 999999999 não existe
+        (tmp_path / f"{os.getppid()}.collapsed").write_bytes(b"main;handler 3\n")
+        (tmp_path / "999999999.collapsed").write_bytes(b"main;handler 100\n")
+
+        stacks = load_stacks(task.download("stacks"))
+
+        assert stacks["main;handler"] == 5
+        await task.stop()
+        assert not (tmp_path / f"{os.getpid()}.collapsed").exists()
+
+    def test_collapsed_round_trip(self):
+        data = dump_stacks(load_stacks(b"a;b 2\na;c d 1\n"))
+        assert load_stacks(data) == {"a;b": 2, "a;c d": 1}
+
+
+class TestAdminProfilingEndpoint:
+    """Testes para os endpoints de administração do profiling"""
+
+    @pytest.fixture
+    def admin_app(self, test_app, test_private_key):
+        test_app.include_router(admin.router)
+        task = ProfilingTask(settings=Settings(), profiler=RequestProfiler())
+        test_app.dependency_overrides[get_profiling] = lambda: task
+        test_app.dependency_overrides[get_secrets] = lambda: Secrets(
+            jwt_private_key=test_private_key,
+            admin_token="s3cret",
+        )
+        return test_app
+
+    @pytest.mark.asyncio
+    async def test_disabled_without_admin_token(self, admin_app, client: AsyncClient, test_private_key):
+        admin_app.dependency_overrides[get_secrets] = lambda: Secrets(jwt_private_key=test_private_key)
+
+        response = await client.get("/admin/profiling", headers={"X-Admin-Token": ""})
+
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_rejects_wrong_token(self, admin_app, client: AsyncClient):
+        assert (await client.get("/admin/profiling")).status_code == 401
+        assert (await client.get("/admin/profiling", headers={"X-Admin-Token": "wrong"})).status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_start_status_and_download(self, admin_app, client: AsyncClient):
+        headers = {"X-Admin-Token": "s3cret"}
+
+        response = await client.post("/admin/profiling", json={"mode": "stacks", "duration_seconds": 5}, headers=headers)
+        assert response.status_code == 200
+        assert response.json()["mode"] == "stacks"
+
+        status = (await client.get("/admin/profiling", headers=headers)).json()
+        assert status["enabled"] is True
+
+        stopped = (await client.delete("/admin/profiling", headers=headers)).json()
+        assert stopped["enabled"] is False
+
+        download = await client.get("/admin/profiling/profile", params={"mode": "stacks"}, headers=headers)
+        assert download.status_code == 200
+        assert download.headers["content-disposition"] == 'attachment; filename="profile.collapsed"'
+
+    @pytest.mark.asyncio
+    async def test_invalid_mode(self, admin_app, client: AsyncClient):
+        response = await client.post("/admin/profiling", json={"mode": "perf"}, headers={"X-Admin-Token": "s3cret"})
+        assert response.status_code == 422
@@ -0,0 +1,458 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from boto3.dynamodb.conditions import Key
+
+from source.cli.backfill_tax_id_markers import backfill
+from source.configs.services import Services
+from source.configs.settings import Settings
+from source.helpers.cache import TTLCache
+from source.helpers.repository import AsyncDatabaseRepository, UserAlreadyExistsError, tax_id_marker_key
+from source.models.user import User
+
+
+class TestRepositoryLifecycle:
+    """Testes para o ciclo de vida do resource do DynamoDB"""
+
+    def test_pool_configuration(self):
+        """Testa que o tamanho do pool e o keep-alive chegam ao AioConfig"""
+        repo = AsyncDatabaseRepository(
+            table_name="users",
+            max_pool_connections=32,
+            keepalive_timeout=15.0,
+            tcp_keepalive=False,
+        )
+
+        assert repo.config.max_pool_connections == 32
+        assert repo.config.tcp_keepalive is False
+        assert repo.config.connector_args["keepalive_timeout"] == 15.0
+        assert repo.is_open is False
+
+    @pytest.mark.asyncio
+    async def test_open_reuses_table_between_calls(self, repository):
+        """Testa que, após open(), todas as chamadas usam o mesmo Table"""
+        assert repository.is_open is True
+
+        async with repository.get_table() as first:
+            pass
+        async with repository.get_table() as second:
+            pass
+
+        assert first is second
+
+    @pytest.mark.asyncio
+    async def test_open_is_idempotent(self, repository):
+        """Testa que chamar open() duas vezes não recria o resource"""
+        async with repository.get_table() as before:
+            pass
+
+        await repository.open()
+
+        async with repository.get_table() as after:
+            pass
+
+        assert before is after
+
+    @pytest.mark.asyncio
+    async def test_close_releases_resource(self, aws_credentials):
+        """Testa que close() libera o resource e o repositório volta ao modo por chamada"""
+        repo = AsyncDatabaseRepository(
+            table_name="test-auth-service-users",
+            region_name=aws_credentials["region_name"],
+            endpoint_url=aws_credentials["endpoint_url"],
+        )
+
+        await repo.open()
+        assert repo.is_open is True
+
+        await repo.close()
+        assert repo.is_open is False
+
+        # close() sem open() não deve falhar
+        await repo.close()
+
+    @pytest.mark.asyncio
+    async def test_queries_work_without_open(self, repository, aws_credentials, sample_user_data):
+        """Testa que o repositório continua funcionando sem open() (resource por chamada)"""
+        user = User.create_costumer(**sample_user_data)
+        await repository.create_user(user.model_dump())
+
+        repo = AsyncDatabaseRepository(
+            table_name=repository.table_name,
+            region_name=aws_credentials["region_name"],
+            endpoint_url=aws_credentials["endpoint_url"],
+        )
+
+        found = await repo.find_user_by_tax_id(sample_user_data["tax_id"])
+
+        assert found is not None
+        assert found["id"] == user.id
+
+
+class TestRepositoryUserCache:
+    """Testes para o cache de usuários na frente do find_user_by_tax_id"""
+
+    @pytest.fixture
+    def cached_repository(self, repository):
+        repository.user_cache = TTLCache(max_size=10, ttl=60)
+        yield repository
+        repository.user_cache = None
+
+    @pytest.mark.asyncio
+    async def test_create_user_primes_cache(self, cached_repository, sample_user_data):
+        """Testa que create_user popula o cache (write-through)"""
+        user = User.create_costumer(**sample_user_data)
+        await cached_repository.create_user(user.model_dump())
+
+        with patch.object(cached_repository, "_query_user_by_tax_id", new_callable=AsyncMock) as query:
+            found = await cached_repository.find_user_by_tax_id(sample_user_data["tax_id"])
+
+        query.assert_not_called()
+        assert found["id"] == user.id
+        assert cached_repository.user_cache.stats.hits == 1
+
+    @pytest.mark.asyncio
+    async def test_find_user_reads_through(self, cached_repository, sample_user_data):
+        """Testa que o segundo login do mesmo tax_id não consulta o DynamoDB"""
+        user = User.create_costumer(**sample_user_data)
+        async with cached_repository.get_table() as table:
+            await table.put_item(Item=user.model_dump())
+
+        first = await cached_repository.find_user_by_tax_id(sample_user_data["tax_id"])
+        with patch.object(cached_repository, "_query_user_by_tax_id", new_callable=AsyncMock) as query:
+            second = await cached_repository.find_user_by_tax_id(sample_user_data["tax_id"])
+
+        query.assert_not_called()
+        assert first == second
+        assert cached_repository.user_cache.stats.misses == 1
+        assert cached_repository.user_cache.stats.hits == 1
+
+    @pytest.mark.asyncio
+    async def test_unknown_user_is_not_cached(self, cached_repository):
+        """Testa que usuários inexistentes não ficam no cache"""
+        assert await cached_repository.find_user_by_tax_id("99999999999") is None
+        assert len(cached_repository.user_cache) == 0
+
+    def test_services_user_cache_from_settings(self):
+        """Testa a criação do cache a partir das Settings"""
+        cache = Services.new_user_cache(Settings(user_cache_max_size=5, user_cache_ttl_seconds=30))
+        assert cache.max_size == 5
+        assert cache.ttl == 30
+
+        assert Services.new_user_cache(Settings(user_cache_max_size=0)) is None
+        assert Services.new_user_cache(Settings(user_cache_ttl_seconds=0)) is None
+
+
+class TestRepositoryConditionalRegistration:
+    """Testes para o cadastro com escrita condicional do tax_id"""
+
+    @pytest.mark.asyncio
+    async def test_create_user_writes_marker(self, repository, sample_user_data):
+        """Testa que o cadastro grava o item TAXID#<cpf> apontando para o usuário"""
+        user = User.create_costumer(**sample_user_data)
+        await repository.create_user(user.model_dump())
+
+        async with repository.get_table() as table:
+            response = await table.get_item(Key={"id": tax_id_marker_key(user.tax_id)})
+
+        assert response["Item"]["user_id"] == user.id
+        assert response["Item"]["user_data"] == user.model_dump()
+
+    @pytest.mark.asyncio
+    async def test_marker_stays_out_of_the_index(self, repository, sample_user_data):
+        """Testa que a cópia do usuário no marcador não vira um segundo item no GSI"""
+        user = User.create_costumer(**sample_user_data)
+        await repository.create_user(user.model_dump())
+
+        async with repository.get_table() as table:
+            response = await table.query(IndexName="TaxIDIndex", KeyConditionExpression=Key("tax_id").eq(user.tax_id))
+
+        assert [item["id"] for item in response["Items"]] == [user.id]
+
+    @pytest.mark.asyncio
+    async def test_duplicate_tax_id_is_rejected(self, repository, sample_user_data):
+        """Testa que o segundo cadastro do mesmo CPF falha sem gravar nada"""
+        first = User.create_costumer(**sample_user_data)
+        second = User.create_costumer(**sample_user_data)
+        await repository.create_user(first.model_dump())
+
+        with pytest.raises(UserAlreadyExistsError) as exc_info:
+            await repository.create_user(second.model_dump())
+
+        assert exc_info.value.tax_id == sample_user_data["tax_id"]
+        async with repository.get_table() as table:
+            response = await table.get_item(Key={"id": second.id})
+        assert "Item" not in response
+
+    @pytest.mark.asyncio
+    async def test_concurrent_registrations_only_one_wins(self, repository, sample_user_data):
+        """Testa que cadastros concorrentes do mesmo CPF resultam em um único usuário"""
+        users = [User.create_costumer(**sample_user_data) for _ in range(5)]
+
+        results = await asyncio.gather(
+            *(repository.create_user(user.model_dump()) for user in users),
+            return_exceptions=True,
+        )
+
+        assert sum(result is None for result in results) == 1
+        assert all(isinstance(result, UserAlreadyExistsError) for result in results if result is not None)
+
+
+class TestTaxIdMarkerBackfill:
+    """Testes para usuários anteriores ao item TAXID#<cpf>"""
+
+    @staticmethod
+    async def put_legacy_user(repository, **overrides):
+        user = User.create_costumer(**{"tax_id": "98765432100", "email": "legacy@example.com", "name": "Legacy"})
+        item = {**user.model_dump(), **overrides}
+        async with repository.get_table() as table:
+            await table.put_item(Item=item)
+        return item
+
+    @pytest.mark.asyncio
+    async def test_legacy_tax_id_is_rejected_through_index(self, repository):
+        """Testa que o CPF de um usuário sem marcador ainda responde como duplicado"""
+        legacy = await self.put_legacy_user(repository)
+        user = User.create_costumer(tax_id=legacy["tax_id"], email="new@example.com", name="New")
+
+        with pytest.raises(UserAlreadyExistsError):
+            await repository.create_user(user.model_dump())
+
+    @pytest.mark.asyncio
+    async def test_backfill_creates_markers(self, repository):
+        """Testa que o backfill cria o marcador e é idempotente"""
+        legacy = await self.put_legacy_user(repository)
+
+        first = await backfill(repository)
+        second = await backfill(repository)
+
+        assert (first["users"], first["created"], first["existing"]) == (1, 1, 0)
+        assert (second["users"], second["created"], second["existing"]) == (1, 0, 1)
+        async with repository.get_table() as table:
+            response = await table.get_item(Key={"id": tax_id_marker_key(legacy["tax_id"])})
+        assert response["Item"]["user_id"] == legacy["id"]
+
+        # com os marcadores criados, o GSI pode deixar de ser consultado
+        repository.check_tax_id_index = False
+        user = User.create_costumer(tax_id=legacy["tax_id"], email="new@example.com", name="New")
+        with pytest.raises(UserAlreadyExistsError):
+            await repository.create_user(user.model_dump())
+
+    @pytest.mark.asyncio
+    async def test_backfill_reports_duplicated_tax_ids(self, repository):
+        """Testa que CPFs já duplicados são listados em vez de sobrescritos"""
+        await self.put_legacy_user(repository)
+        await self.put_legacy_user(repository, id="another-user-id")
+
+        result = await backfill(repository)
+
+        assert result["created"] == 1
+        assert len(result["conflicts"]) == 1
+        assert result["conflicts"][0]["tax_id"] == "98765432100"
+
+    @pytest.mark.asyncio
+    async def test_backfill_completes_markers_without_user_copy(self, repository):
+        """Testa que o backfill grava a cópia do usuário nos marcadores antigos"""
+        legacy = await self.put_legacy_user(repository)
+        async with repository.get_table() as table:
+            await table.put_item(Item={"id": tax_id_marker_key(legacy["tax_id"]), "user_id": legacy["id"]})
+
+        first = await backfill(repository)
+        second = await backfill(repository)
+
+        assert (first["created"], first["migrated"], first["existing"]) == (0, 1, 0)
+        assert (second["created"], second["migrated"], second["existing"]) == (0, 0, 1)
+        async with repository.get_table() as table:
+            response = await table.get_item(Key={"id": tax_id_marker_key(legacy["tax_id"])})
+        assert response["Item"]["user_data"] == legacy
+
+    @pytest.mark.asyncio
+    async def test_dry_run_does_not_write(self, repository):
+        """Testa que o dry-run só conta os usuários"""
+        legacy = await self.put_legacy_user(repository)
+
+        result = await backfill(repository, dry_run=True)
+
+        assert result["users"] == 1 and result["created"] == 0
+        async with repository.get_table() as table:
+            response = await table.get_item(Key={"id": tax_id_marker_key(legacy["tax_id"])})
+        assert "Item" not in response
+
+
+class TestRepositorySingleFlight:
+    """Testes para o agrupamento de consultas concorrentes do mesmo tax_id"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_lookups_make_one_backend_call(self, repository, sample_user_data):
+        """Testa que N logins simultâneos do mesmo CPF fazem uma única consulta ao DynamoDB"""
+        user = User.create_costumer(**sample_user_data)
+        await repository.create_user(user.model_dump())
+
+        query = repository._query_user_by_tax_id
+        with patch.object(repository, "_query_user_by_tax_id", side_effect=query) as backend:
+            results = await asyncio.gather(
+                *(repository.find_user_by_tax_id(sample_user_data["tax_id"]) for _ in range(20))
+            )
+
+        backend.assert_called_once_with(sample_user_data["tax_id"])
+        assert all(result["id"] == user.id for result in results)
+        assert repository.user_lookups.coalesced == 19
+
+
+class TestRepositoryBatchLookup:
+    """Testes para a busca de vários CPFs de uma vez"""
+
+    @staticmethod
+    async def create_users(repository, count: int) -> list:
+        users = [
+            User.create_costumer(tax_id=f"{index:011d}", email=f"user{index}@example.com", name=f"User {index}")
+            for index in range(count)
+        ]
+        await asyncio.gather(*(repository.create_user(user.model_dump()) for user in users))
+        return users
+
+    @pytest.mark.asyncio
+    async def test_lookup_through_index(self, repository):
+        """Testa que, sem o backfill, cada CPF vai ao GSI e os ausentes voltam como None"""
+        users = await self.create_users(repository, 3)
+        tax_ids = [users[0].tax_id, "99999999999", users[2].tax_id, users[0].tax_id]
+
+        query = repository._query_user_by_tax_id
+        with patch.object(repository, "_query_user_by_tax_id", side_effect=query) as backend:
+            found = await repository.find_users_by_tax_ids(tax_ids, concurrency=2)
+
+        assert backend.call_count == 3
+        assert found[users[0].tax_id]["id"] == users[0].id
+        assert found[users[2].tax_id]["id"] == users[2].id
+        assert found["99999999999"] is None
+
+    @pytest.mark.asyncio
+    async def test_lookup_through_markers(self, repository):
+        """Testa que, com os marcadores completos, o lote usa BatchGetItem em vez do GSI"""
+        users = await self.create_users(repository, 120)
+        repository.check_tax_id_index = False
+        tax_ids = [user.tax_id for user in users] + ["99999999999"]
+
+        with patch.object(repository, "_query_user_by_tax_id") as backend:
+            found = await repository.find_users_by_tax_ids(tax_ids)
+
+        backend.assert_not_called()
+        assert all(found[user.tax_id]["id"] == user.id for user in users)
+        assert found["99999999999"] is None
+
+    @pytest.mark.asyncio
+    async def test_unprocessed_keys_are_retried(self, repository):
+        """Testa que as chaves devolvidas em UnprocessedKeys são pedidas de novo"""
+        users = await self.create_users(repository, 2)
+        repository.check_tax_id_index = False
+        keys = [{"id": user.id} for user in users]
+        client = AsyncMock()
+        client.batch_get_item.side_effect = [
+            {"Responses": {repository.table_name: [users[0].model_dump()]},
+             "UnprocessedKeys": {repository.table_name: {"Keys": keys[1:]}}},
+            {"Responses": {repository.table_name: [users[1].model_dump()]}},
+        ]
+
+        with patch("source.helpers.repository.backoff_delay", return_value=0):
+            items = await repository._batch_get_chunk(client, keys, projection=None)
+
+        assert [item["id"] for item in items] == [user.id for user in users]
+        assert client.batch_get_item.call_args_list[1].kwargs["RequestItems"] == {
+            repository.table_name: {"Keys": keys[1:]}
+        }
+
+    @pytest.mark.asyncio
+    async def test_cached_users_skip_the_backend(self, repository, sample_user_data):
+        """Testa que CPFs no cache de usuários não geram chamada"""
+        repository.user_cache = TTLCache(max_size=10, ttl=300)
+        user = User.create_costumer(**sample_user_data)
+        await repository.create_user(user.model_dump())
+
+        with patch.object(repository, "_query_user_by_tax_id") as backend:
+            found = await repository.find_users_by_tax_ids([user.tax_id])
+
+        backend.assert_not_called()
+        assert found[user.tax_id]["id"] == user.id
+
+
+class TestRepositoryTaxIdMarkerLookup:
+    """Testes para o login com GetItem no marcador TAXID#<cpf>"""
+
+    @pytest.fixture
+    def marker_repository(self, repository):
+        repository.tax_id_lookup = "marker"
+        repository.check_tax_id_index = False
+        return repository
+
+    @pytest.mark.asyncio
+    async def test_login_reads_the_marker(self, marker_repository, sample_user_data):
+        """Testa que o login resolve o usuário com um GetItem, sem consultar o GSI"""
+        user = User.create_costumer(**sample_user_data)
+        await marker_repository.create_user(user.model_dump())
+        marker_repository.consistent_tax_id_reads = True
+
+        with patch.object(marker_repository, "_query_user_by_tax_id", side_effect=AssertionError("GSI queried")):
+            found = await marker_repository.find_user_by_tax_id(user.tax_id)
+            missing = await marker_repository.find_user_by_tax_id("99999999999")
+
+        assert found == user.model_dump()
+        assert missing is None
+
+    @pytest.mark.asyncio
+    async def test_consistent_read_is_requested(self, marker_repository):
+        """Testa que DYNAMODB_CONSISTENT_TAX_ID_READS chega ao GetItem"""
+        marker_repository.consistent_tax_id_reads = True
+        table = AsyncMock()
+        table.get_item.return_value = {}
+
+        await marker_repository._get_item(table, tax_id_marker_key("12345678900"))
+
+        assert table.get_item.call_args.kwargs["ConsistentRead"] is True
+
+    @pytest.mark.asyncio
+    async def test_marker_without_user_copy_follows_the_pointer(self, marker_repository, sample_user_data):
+        """Testa que um marcador anterior à cópia ainda leva ao usuário"""
+        user = User.create_costumer(**sample_user_data)
+        async with marker_repository.get_table() as table:
+            await table.put_item(Item=user.model_dump())
+            await table.put_item(Item={"id": tax_id_marker_key(user.tax_id), "user_id": user.id})
+
+        assert (await marker_repository.find_user_by_tax_id(user.tax_id))["id"] == user.id
+        found = await marker_repository.find_users_by_tax_ids([user.tax_id])
+        assert found[user.tax_id]["id"] == user.id
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_index_before_backfill(self, marker_repository, sample_user_data):
+        """Testa que, sem o backfill, um usuário sem marcador ainda é achado pelo GSI"""
+        user = User.create_costumer(**sample_user_data)
+        async with marker_repository.get_table() as table:
+            await table.put_item(Item=user.model_dump())
+
+        assert await marker_repository.find_user_by_tax_id(user.tax_id) is None
+        marker_repository.check_tax_id_index = True
+        assert (await marker_repository.find_user_by_tax_id(user.tax_id))["id"] == user.id
+
+    @pytest.mark.asyncio
+    async def test_batch_lookup_needs_one_batch_get(self, marker_repository):
+        """Testa que, com a cópia nos marcadores, o lote não busca os usuários pelo id"""
+        users = [
+            User.create_costumer(tax_id=f"{index:011d}", email=f"user{index}@example.com", name=f"User {index}")
+            for index in range(3)
+        ]
+        await marker_repository.batch_write_users([user.model_dump() for user in users])
+
+        batch_get = marker_repository._batch_get_chunk
+        with patch.object(marker_repository, "_batch_get_chunk", side_effect=batch_get) as backend:
+            found = await marker_repository.find_users_by_tax_ids([user.tax_id for user in users])
+
+        assert backend.call_count == 1
+        assert all(found[user.tax_id] == user.model_dump() for user in users)
+
+    def test_invalid_lookup(self):
+        """Testa que um modo de busca desconhecido falha na criação"""
+        with pytest.raises(ValueError):
+            AsyncDatabaseRepository(table_name="users", tax_id_lookup="scan")
+
+        repo = Services.new_repository(Settings(dynamodb_tax_id_lookup="marker", dynamodb_consistent_tax_id_reads=True))
+        assert (repo.tax_id_lookup, repo.consistent_tax_id_reads) == ("marker", True)
@@ -1,5 +1,7 @@
 import pytest
 from httpx import AsyncClient
+from source.configs.warm_up import WarmUpTask
+from source.depends.app import get_settings, get_warm_up
 class TestRootRoutes:
     """Testes para os endpoints root"""
     @pytest.mark.asyncio
@@ -28,3 +30,25 @@ class TestRootRoutes:
         """Verifica que o health retorna JSON"""
         response = await client.get("/health")
         assert response.headers["content-type"].startswith("application/json")
+    @pytest.mark.asyncio
+    async def test_ready_while_warming_up(self, client: AsyncClient, test_app, test_services):
+        """Testa que /ready responde 503 enquanto o warm-up não terminou"""
+        warm_up = WarmUpTask(settings=test_app.dependency_overrides[get_settings](), services=test_services)
+        test_app.dependency_overrides[get_warm_up] = lambda: warm_up
+        response = await client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["message"] == "Auth Service is warming up"
+    @pytest.mark.asyncio
+    async def test_ready_after_warm_up(self, client: AsyncClient, test_app, test_services):
+        """Testa que /ready responde 200 depois do warm-up"""
+        warm_up = WarmUpTask(settings=test_app.dependency_overrides[get_settings](), services=test_services)
+        test_app.dependency_overrides[get_warm_up] = lambda: warm_up
+        await warm_up.run()
+        response = await client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["message"] == "Auth Service is ready"
+    @pytest.mark.asyncio
+    async def test_health_does_not_depend_on_warm_up(self, client: AsyncClient):
+        """Testa que /health continua respondendo sem o estado de warm-up"""
+        response = await client.get("/health")
+        assert response.status_code == 200
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from source.helpers.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """Testes para o agrupamento de chamadas concorrentes"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        single_flight = SingleFlight()
+        started = []
+
+        async def backend():
+            started.append(True)
+            await asyncio.sleep(0.01)
+            return {"tax_id": "00000000000"}
+
+        results = await asyncio.gather(*(single_flight.do("00000000000", backend) for _ in range(10)))
+
+        assert len(started) == 1
+        assert all(result is results[0] for result in results)
+        assert single_flight.calls == 10
+        assert single_flight.executions == 1
+        assert single_flight.coalesced == 9
+        assert single_flight.coalescing_ratio == 0.9
+        assert single_flight.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_different_keys_run_separately(self):
+        single_flight = SingleFlight()
+
+        async def backend(key):
+            await asyncio.sleep(0)
+            return key
+
+        results = await asyncio.gather(
+            single_flight.do("a", lambda: backend("a")),
+            single_flight.do("b", lambda: backend("b")),
+        )
+
+        assert results == ["a", "b"]
+        assert single_flight.executions == 2
+
+    @pytest.mark.asyncio
+    async def test_exception_is_shared(self):
+        single_flight = SingleFlight()
+
+        async def backend():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("DynamoDB unavailable")
+
+        results = await asyncio.gather(
+            *(single_flight.do("key", backend) for _ in range(3)),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert single_flight.executions == 1
+
+    @pytest.mark.asyncio
+    async def test_sequential_calls_execute_again(self):
+        single_flight = SingleFlight()
+
+        async def backend():
+            return 1
+
+        await single_flight.do("key", backend)
+        await single_flight.do("key", backend)
+
+        assert single_flight.executions == 2
+        assert single_flight.coalescing_ratio == 0.0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        single_flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def backend():
+            await release.wait()
+            return "done"
+
+        first = asyncio.create_task(single_flight.do("key", backend))
+        second = asyncio.create_task(single_flight.do("key", backend))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        release.set()
+
+        assert await second == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await first
@@ -0,0 +1,96 @@
+import asyncio
+import uuid
+from unittest.mock import patch
+
+import aioboto3
+import orjson
+import pytest
+import pytest_asyncio
+
+from source.helpers.repository import AsyncDatabaseRepository
+from source.helpers.startup import StartupReport
+from source.main import app, app_lifespan
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 10.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestStartupReport:
+    """Testes para o relatório de startup"""
+
+    def test_steps_and_total(self):
+        clock = FakeClock()
+        report = StartupReport(started=9.0, clock=clock)
+        report.record("import", 0.5)
+        with report.step("secret_fetch"):
+            clock.now += 0.25
+
+        result = report.finish()
+
+        assert result == {"total_ms": 1250.0, "steps_ms": {"import": 500.0, "secret_fetch": 250.0}}
+
+    def test_step_is_recorded_on_error(self):
+        clock = FakeClock()
+        report = StartupReport(clock=clock)
+        with pytest.raises(RuntimeError):
+            with report.step("repository_open"):
+                clock.now += 1
+                raise RuntimeError("boom")
+
+        assert report.steps == {"repository_open": 1}
+        assert report.as_dict()["total_ms"] is None
+
+
+@pytest_asyncio.fixture
+async def secret_name(aws_credentials, test_private_key):
+    name = f"test-startup-{uuid.uuid4()}"
+    async with aioboto3.Session().client("secretsmanager") as client:
+        await client.create_secret(Name=name, SecretString=orjson.dumps({"JWT_PRIVATE_KEY": test_private_key}).decode())
+        yield name
+        await client.delete_secret(SecretId=name, ForceDeleteWithoutRecovery=True)
+
+
+class TestAppLifespan:
+    """Testes para a inicialização da aplicação"""
+
+    @pytest.mark.asyncio
+    async def test_lifespan_initializes_services(self, secret_name, repository):
+        env = {
+            "APPLICATION_SECRET_NAME": secret_name,
+            "APPLICATION_TABLE_NAME": repository.table_name,
+            "JWT_KEY_REFRESH_INTERVAL_SECONDS": "0",
+        }
+        with patch.dict("os.environ", env):
+            async with app_lifespan(app) as state:
+                services = state["services"]
+                assert services.repository.is_open
+                assert services.token_verifier.jwt_signer is services.jwt_signer
+                token = services.jwt_signer.sign({"sub": "user-123"})
+                assert orjson.loads(services.jwt_signer.verify(token))["sub"] == "user-123"
+                await asyncio.wait_for(state["warm_up"]._task, timeout=10)
+                assert state["warm_up"].ready is True
+
+        assert not services.repository.is_open
+
+    @pytest.mark.asyncio
+    async def test_lifespan_closes_repository_when_secret_fails(self, aws_credentials):
+        env = {"APPLICATION_SECRET_NAME": f"missing-{uuid.uuid4()}"}
+        opened = []
+        real_open = AsyncDatabaseRepository.open
+
+        async def tracking_open(repository):
+            await real_open(repository)
+            opened.append(repository)
+
+        with patch.dict("os.environ", env), patch.object(AsyncDatabaseRepository, "open", tracking_open):
+            with pytest.raises(Exception) as exc_info:
+                async with app_lifespan(app):
+                    pass
+
+        assert "ResourceNotFoundException" in str(exc_info.value)
+        assert opened and not opened[0].is_open
@@ -0,0 +1,219 @@
+import math
+from unittest.mock import patch
+
+import pytest
+from httpx import AsyncClient
+
+from source.configs.metrics import MetricsTask
+from source.configs.services import Services
+from source.configs.settings import Settings
+from source.configs.tax_id_filter import TaxIdFilterTask
+from source.helpers import metrics
+from source.helpers.bloom import BloomFilter, TaxIdFilter
+from source.helpers.metrics import MetricsRegistry
+from source.models.user import User
+
+
+def tax_id(index: int) -> str:
+    return f"{index:011d}"
+
+
+async def create_users(repository, count: int) -> list:
+    users = []
+    for index in range(count):
+        user = User.create_costumer(tax_id=tax_id(index), email=f"user{index}@example.com", name=f"User {index}")
+        await repository.create_user(user.model_dump())
+        users.append(user)
+    return users
+
+
+def ready_filter(*tax_ids: str, **kwargs) -> TaxIdFilter:
+    tax_id_filter = TaxIdFilter(capacity=1000, **kwargs)
+    tax_id_filter.begin_build()
+    for value in tax_ids:
+        tax_id_filter.add(value)
+    tax_id_filter.finish_build()
+    return tax_id_filter
+
+
+class TestBloomFilter:
+    """Testes para o filtro de Bloom"""
+
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        bloom = BloomFilter(capacity=10000, error_rate=0.01)
+        for index in range(10000):
+            bloom.add(tax_id(index))
+
+        assert all(tax_id(index) in bloom for index in range(10000))
+        false_positives = sum(tax_id(index) in bloom for index in range(10000, 30000))
+        assert false_positives / 20000 < 0.02
+        assert bloom.estimated_false_positive_rate() == pytest.approx(0.01, rel=0.2)
+        # ~9,6 bits por item a 1%
+        assert bloom.size_bytes == pytest.approx(12000, rel=0.05)
+
+    def test_repeated_keys_are_counted_once(self):
+        bloom = BloomFilter(capacity=100)
+        bloom.add("12345678900")
+        bloom.add("12345678900")
+
+        assert len(bloom) == 1
+
+    def test_invalid_parameters(self):
+        with pytest.raises(ValueError):
+            BloomFilter(capacity=0)
+        with pytest.raises(ValueError):
+            TaxIdFilter(capacity=10, error_rate=1)
+
+
+class TestTaxIdFilter:
+    """Testes para o filtro de CPFs e as trocas no rebuild"""
+
+    def test_not_used_before_first_build(self):
+        tax_id_filter = TaxIdFilter(capacity=100)
+
+        assert tax_id_filter.check("12345678900") is None
+        assert tax_id_filter.stats.rejected == 0
+
+    def test_registrations_during_rebuild_survive_the_swap(self):
+        tax_id_filter = ready_filter("00000000001")
+
+        tax_id_filter.begin_build()
+        tax_id_filter.add("00000000002")
+        tax_id_filter.finish_build()
+
+        # o Scan do rebuild não viu nenhum dos dois: só o cadastro feito durante ele continua no filtro
+        assert tax_id_filter.check("00000000002") is True
+        assert tax_id_filter.check("00000000001") is False
+
+    def test_stale_filter_is_not_used(self):
+        now = [0.0]
+        tax_id_filter = ready_filter("00000000001", max_age=60, clock=lambda: now[0])
+        assert tax_id_filter.check("00000000002") is False
+
+        now[0] = 61.0
+
+        assert not tax_id_filter.ready
+        assert tax_id_filter.check("00000000002") is None
+
+    def test_next_filter_grows_with_the_table(self):
+        tax_id_filter = ready_filter(*(tax_id(index) for index in range(2000)))
+
+        # lotado, o filtro conta um pouco menos que os 2000 CPFs; o próximo tem 25% de folga sobre a contagem
+        assert tax_id_filter.begin_build().capacity == math.ceil(len(tax_id_filter.current) * 1.25) > 2000
+
+
+class TestRepositoryTaxIdFilter:
+    """Testes para o uso do filtro nas buscas por CPF"""
+
+    @pytest.mark.asyncio
+    async def test_definite_miss_skips_dynamodb(self, repository):
+        repository.tax_id_filter = ready_filter()
+
+        with patch.object(repository, "_query_user_by_tax_id", side_effect=AssertionError("DynamoDB called")):
+            assert await repository.find_user_by_tax_id("99999999999") is None
+            users = await repository.find_users_by_tax_ids(["99999999999"])
+
+        assert users == {"99999999999": None}
+        assert repository.tax_id_filter.stats.rejected == 2
+
+    @pytest.mark.asyncio
+    async def test_registration_updates_filter(self, repository, sample_user_data):
+        repository.tax_id_filter = ready_filter()
+        user = User.create_costumer(**sample_user_data)
+
+        await repository.create_user(user.model_dump())
+        other = User.create_costumer(**{**sample_user_data, "tax_id": tax_id(7)})
+        await repository.batch_write_users([other.model_dump()])
+
+        assert (await repository.find_user_by_tax_id(user.tax_id))["id"] == user.id
+        assert (await repository.find_user_by_tax_id(tax_id(7)))["tax_id"] == tax_id(7)
+        assert repository.tax_id_filter.stats.passed == 2
+
+    @pytest.mark.asyncio
+    async def test_counts_false_positives(self, repository):
+        # o filtro conhece o CPF, mas ele não está na tabela
+        repository.tax_id_filter = ready_filter("99999999999")
+
+        assert await repository.find_user_by_tax_id("99999999999") is None
+
+        assert repository.tax_id_filter.stats.false_positives == 1
+
+    @pytest.mark.asyncio
+    async def test_consistent_read_ignores_filter(self, repository):
+        # cadastrado por outro processo depois do último rebuild
+        await create_users(repository, 1)
+        repository.tax_id_filter = ready_filter()
+
+        users = await repository.find_users_by_tax_ids([tax_id(0)], consistent_read=True)
+
+        assert users[tax_id(0)]["tax_id"] == tax_id(0)
+        assert repository.tax_id_filter.stats.rejected == 0
+
+
+class TestTaxIdFilterTask:
+    """Testes para a montagem do filtro com Scan paralelo"""
+
+    @pytest.fixture
+    def settings(self):
+        return Settings(tax_id_filter_enabled=True, tax_id_filter_expected_items=100, tax_id_filter_scan_segments=3)
+
+    @pytest.mark.asyncio
+    async def test_rebuild_from_parallel_scan(self, settings, test_services):
+        await create_users(test_services.repository, 12)
+        test_services.repository.tax_id_filter = Services.new_tax_id_filter(settings)
+        task = TaxIdFilterTask(settings=settings, services=test_services, page_size=5)
+
+        assert await task.rebuild() == 12
+
+        tax_id_filter = test_services.repository.tax_id_filter
+        assert tax_id_filter.ready
+        assert all(tax_id_filter.check(tax_id(index)) for index in range(12))
+        assert tax_id_filter.check("99999999999") is False
+        assert tax_id_filter.max_age == 3 * settings.tax_id_filter_rebuild_interval_seconds
+
+    @pytest.mark.asyncio
+    async def test_failed_rebuild_keeps_current_filter(self, settings, test_services):
+        tax_id_filter = ready_filter("00000000001")
+        test_services.repository.tax_id_filter = tax_id_filter
+        settings.tax_id_filter_rebuild_interval_seconds = 0
+        task = TaxIdFilterTask(settings=settings, services=test_services)
+
+        async def failing_scan(**kwargs):
+            raise ConnectionError("scan failed")
+            yield
+
+        with patch.object(test_services.repository, "scan_pages", failing_scan):
+            await task.run()
+
+        assert tax_id_filter.stats.failures == 1
+        assert tax_id_filter.check("00000000001") is True
+        assert tax_id_filter.size_bytes == tax_id_filter.current.size_bytes
+
+    def test_disabled_by_default(self):
+        assert Services.new_tax_id_filter(Settings()) is None
+
+    def test_collects_metrics(self, test_services):
+        tax_id_filter = ready_filter("00000000001")
+        tax_id_filter.check("00000000002")
+        test_services.repository.tax_id_filter = tax_id_filter
+
+        MetricsTask(settings=Settings(), services=test_services, registry=MetricsRegistry()).collect()
+
+        assert metrics.TAX_ID_FILTER_LOOKUPS.value("rejected") == 1
+        assert metrics.TAX_ID_FILTER_READY.value() == 1
+        assert metrics.TAX_ID_FILTER_ITEMS.value() == 1
+        assert metrics.TAX_ID_FILTER_BYTES.value() == tax_id_filter.size_bytes
+        assert 0 < metrics.TAX_ID_FILTER_ESTIMATED_FALSE_POSITIVE_RATE.value() < 0.01
+
+
+class TestAuthEndpointTaxIdFilter:
+    """Testes para o login de CPF não cadastrado com o filtro ligado"""
+
+    @pytest.mark.asyncio
+    async def test_unknown_tax_id_is_404_without_dynamodb(self, client: AsyncClient, repository):
+        repository.tax_id_filter = ready_filter()
+
+        with patch.object(repository, "_query_user_by_tax_id", side_effect=AssertionError("DynamoDB called")):
+            response = await client.get("/auth", params={"tax_id": "99999999999"})
+
+        assert response.status_code == 404
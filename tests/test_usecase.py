@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock
 from fastapi import HTTPException
+from source.helpers.repository import UserAlreadyExistsError
 from source.usecase.auth import AuthUseCase, RegisterUseCase
 from source.models.user import User, UserType
 from source.schemas.response.auth import AuthResponse, RegisterResponse
@@ -10,7 +11,7 @@ class TestAuthUseCase:
     async def test_execute_success(self):
         # Arrange
         mock_repository = AsyncMock()
-        mock_jwt_signer = MagicMock()
+        mock_jwt_signer = AsyncMock()
         user_data = {
             "id": "user-123",
             "tax_id": "12345678900",
@@ -19,7 +20,7 @@ class TestAuthUseCase:
             "user_type": "customers"
         }
         mock_repository.find_user_by_tax_id.return_value = user_data
-        mock_jwt_signer.sign.return_value = "mock_jwt_token"
+        mock_jwt_signer.issue.return_value = "mock_jwt_token"
         use_case = AuthUseCase(repository=mock_repository, jwt_signer=mock_jwt_signer)
         # Act
         result = await use_case.execute(tax_id="12345678900")
@@ -30,12 +31,12 @@ class TestAuthUseCase:
         assert result.name == "Test User"
         assert result.email == "test@example.com"
         mock_repository.find_user_by_tax_id.assert_called_once_with("12345678900")
-        mock_jwt_signer.sign.assert_called_once()
+        mock_jwt_signer.issue.assert_called_once()
     @pytest.mark.asyncio
     async def test_execute_user_not_found(self):
         # Arrange
         mock_repository = AsyncMock()
-        mock_jwt_signer = MagicMock()
+        mock_jwt_signer = AsyncMock()
         mock_repository.find_user_by_tax_id.return_value = None
         use_case = AuthUseCase(repository=mock_repository, jwt_signer=mock_jwt_signer)
         # Act & Assert
@@ -44,12 +45,12 @@ class TestAuthUseCase:
         assert exc_info.value.status_code == 404
         assert "not found" in exc_info.value.detail.lower()
         mock_repository.find_user_by_tax_id.assert_called_once_with("99999999999")
-        mock_jwt_signer.sign.assert_not_called()
+        mock_jwt_signer.issue.assert_not_called()
     @pytest.mark.asyncio
     async def test_execute_jwt_payload_structure(self):
         # Arrange
         mock_repository = AsyncMock()
-        mock_jwt_signer = MagicMock()
+        mock_jwt_signer = AsyncMock()
         user_data = {
             "id": "user-123",
             "tax_id": "12345678900",
@@ -58,12 +59,12 @@ class TestAuthUseCase:
             "user_type": "customers"
         }
         mock_repository.find_user_by_tax_id.return_value = user_data
-        mock_jwt_signer.sign.return_value = "mock_jwt_token"
+        mock_jwt_signer.issue.return_value = "mock_jwt_token"
         use_case = AuthUseCase(repository=mock_repository, jwt_signer=mock_jwt_signer)
         # Act
         await use_case.execute(tax_id="12345678900")
         # Assert - verify the JWT payload structure
-        call_args = mock_jwt_signer.sign.call_args[0][0]
+        call_args = mock_jwt_signer.issue.call_args[0][0]
         assert call_args["sub"] == "user-123"
         assert call_args["tax_id"] == "12345678900"
         assert call_args["email"] == "test@example.com"
@@ -73,7 +74,7 @@ class TestAuthUseCase:
     async def test_execute_with_employee_user_type(self):
         # Arrange
         mock_repository = AsyncMock()
-        mock_jwt_signer = MagicMock()
+        mock_jwt_signer = AsyncMock()
         user_data = {
             "id": "user-456",
             "tax_id": "98765432100",
@@ -82,14 +83,44 @@ class TestAuthUseCase:
             "user_type": "employees"
         }
         mock_repository.find_user_by_tax_id.return_value = user_data
-        mock_jwt_signer.sign.return_value = "employee_jwt_token"
+        mock_jwt_signer.issue.return_value = "employee_jwt_token"
         use_case = AuthUseCase(repository=mock_repository, jwt_signer=mock_jwt_signer)
         # Act
         result = await use_case.execute(tax_id="98765432100")
         # Assert
         assert result.user_id == "user-456"
-        call_args = mock_jwt_signer.sign.call_args[0][0]
+        call_args = mock_jwt_signer.issue.call_args[0][0]
         assert call_args["user_type"] == "employees"
+    @pytest.mark.asyncio
+    async def test_execute_batch_signs_found_users(self):
+        """Testa que o lote assina só os CPFs encontrados e devolve 404 para os demais"""
+        mock_repository = AsyncMock()
+        mock_jwt_signer = AsyncMock()
+        user_data = {
+            "id": "user-123",
+            "tax_id": "12345678900",
+            "email": "test@example.com",
+            "name": "Test User",
+            "user_type": "customers"
+        }
+        mock_repository.find_users_by_tax_ids.return_value = {"12345678900": user_data, "99999999999": None}
+        mock_jwt_signer.issue.return_value = "mock_jwt_token"
+        use_case = AuthUseCase(repository=mock_repository, jwt_signer=mock_jwt_signer, batch_concurrency=4)
+        items = [item async for item in await use_case.execute_batch(["12345678900", "99999999999"])]
+        assert [(item.tax_id, item.status) for item in items] == [("12345678900", 200), ("99999999999", 404)]
+        assert items[0].token == "mock_jwt_token"
+        assert items[1].token is None
+        mock_repository.find_users_by_tax_ids.assert_called_once_with(["12345678900", "99999999999"], concurrency=4)
+        mock_jwt_signer.issue.assert_called_once()
+    @pytest.mark.asyncio
+    async def test_execute_batch_too_large(self):
+        """Testa que um lote acima do limite é rejeitado antes de qualquer busca"""
+        mock_repository = AsyncMock()
+        use_case = AuthUseCase(repository=mock_repository, jwt_signer=AsyncMock(), batch_max_size=2)
+        with pytest.raises(HTTPException) as exc_info:
+            await use_case.execute_batch(["1", "2", "3"])
+        assert exc_info.value.status_code == 400
+        mock_repository.find_users_by_tax_ids.assert_not_called()
 class TestRegisterUseCase:
     """Testes unitários para RegisterUseCase"""
     @pytest.mark.asyncio
@@ -112,7 +143,8 @@ class TestRegisterUseCase:
         assert result.name == "Test User"
         assert result.message == "User registered successfully"
         assert result.user_id is not None
-        mock_repository.find_user_by_tax_id.assert_called_once_with("12345678900")
+        # A unicidade é garantida pela escrita condicional, sem consulta prévia
+        mock_repository.find_user_by_tax_id.assert_not_called()
         mock_repository.create_user.assert_called_once()
     @pytest.mark.asyncio
     async def test_execute_creates_customer_user(self):
@@ -134,14 +166,7 @@ class TestRegisterUseCase:
     async def test_execute_user_already_exists(self):
         # Arrange
         mock_repository = AsyncMock()
-        existing_user = {
-            "id": "existing-user-id",
-            "tax_id": "12345678900",
-            "email": "existing@example.com",
-            "name": "Existing User",
-            "user_type": "customers"
-        }
-        mock_repository.find_user_by_tax_id.return_value = existing_user
+        mock_repository.create_user.side_effect = UserAlreadyExistsError("12345678900")
         use_case = RegisterUseCase(repository=mock_repository)
         # Act & Assert
         with pytest.raises(HTTPException) as exc_info:
@@ -152,8 +177,8 @@ class TestRegisterUseCase:
             )
         assert exc_info.value.status_code == 409
         assert "already exists" in exc_info.value.detail.lower()
-        mock_repository.find_user_by_tax_id.assert_called_once_with("12345678900")
-        mock_repository.create_user.assert_not_called()
+        mock_repository.find_user_by_tax_id.assert_not_called()
+        mock_repository.create_user.assert_called_once()
     @pytest.mark.asyncio
     async def test_execute_generates_unique_user_id(self):
         # Arrange
@@ -211,3 +236,21 @@ class TestRegisterUseCase:
         assert result.tax_id == "123.456.789-00"
         assert result.email == "test+tag@example.com"
         assert result.name == "João da Silva"
+    @pytest.mark.asyncio
+    async def test_execute_invalidates_cached_token(self):
+        """Testa que a escrita do usuário descarta o token reaproveitado do mesmo sub"""
+        mock_repository = AsyncMock()
+        jwt_signer = MagicMock()
+        use_case = RegisterUseCase(repository=mock_repository, jwt_signer=jwt_signer)
+        result = await use_case.execute(tax_id="12345678900", email="test@example.com", name="Test User")
+        jwt_signer.invalidate.assert_called_once_with(result.user_id)
+    @pytest.mark.asyncio
+    async def test_duplicate_does_not_invalidate(self):
+        """Testa que um cadastro rejeitado não mexe no cache de tokens"""
+        mock_repository = AsyncMock()
+        mock_repository.create_user.side_effect = UserAlreadyExistsError("12345678900")
+        jwt_signer = MagicMock()
+        use_case = RegisterUseCase(repository=mock_repository, jwt_signer=jwt_signer)
+        with pytest.raises(HTTPException):
+            await use_case.execute(tax_id="12345678900", email="test@example.com", name="Test User")
+        jwt_signer.invalidate.assert_not_called()
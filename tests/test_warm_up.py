@@ -0,0 +1,79 @@
+import os
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from source.configs.settings import Settings
+from source.configs.warm_up import MIN_RETRY_SECONDS, WarmUpTask
+from source.helpers.cache import TTLCache
+from source.models.user import User
+
+
+class TestWarmUpTask:
+    """Testes para o warm-up antes de aceitar tráfego"""
+
+    @pytest.mark.asyncio
+    async def test_warm_up_marks_ready(self, test_services):
+        task = WarmUpTask(settings=Settings(warmup_dynamodb_connections=3), services=test_services)
+        assert task.ready is False
+
+        await task.run()
+
+        assert task.ready is True
+        assert task.attempts == 1
+        assert set(task.report.steps) == {"dynamodb_connections", "sign_verify", "preload_users"}
+
+    @pytest.mark.asyncio
+    async def test_preloads_hot_users(self, test_services):
+        user = User.create_costumer(tax_id="12345678900", email="hot@example.com", name="Hot User")
+        await test_services.repository.create_user(user.model_dump())
+        test_services.repository.user_cache = TTLCache(max_size=10, ttl=300)
+        settings = Settings(warmup_tax_ids=["12345678900", "00000000000"])
+
+        await WarmUpTask(settings=settings, services=test_services).run()
+
+        assert test_services.repository.user_cache.get("12345678900")["id"] == user.id
+        # CPF inexistente não entra no cache
+        assert "00000000000" not in test_services.repository.user_cache
+
+    @pytest.mark.asyncio
+    async def test_retries_until_warm_up_succeeds(self, test_services):
+        settings = Settings(warmup_dynamodb_connections=1, warmup_retry_seconds=0)
+        task = WarmUpTask(settings=settings, services=test_services)
+        ping = AsyncMock(side_effect=[ConnectionError("DynamoDB unavailable"), None])
+
+        with patch.object(test_services.repository, "ping", ping):
+            await task.run()
+
+        assert task.ready is True
+        assert task.attempts == 2
+        # retry_seconds=0 é elevado ao mínimo para não virar loop ocupado
+        assert task.retry_seconds == MIN_RETRY_SECONDS
+
+    @pytest.mark.asyncio
+    async def test_stop_cancels_pending_warm_up(self, test_services):
+        settings = Settings(warmup_retry_seconds=60)
+        task = WarmUpTask(settings=settings, services=test_services)
+
+        with patch.object(test_services.repository, "ping", AsyncMock(side_effect=ConnectionError("down"))):
+            task.start()
+            await task.stop()
+
+        assert task.ready is False
+
+    @pytest.mark.asyncio
+    async def test_ready_only_when_all_workers_warmed_up(self, test_services, tmp_path):
+        settings = Settings(warmup_readiness_dir=str(tmp_path), warmup_expected_workers=2)
+        task = WarmUpTask(settings=settings, services=test_services)
+        # marcador de um worker que já morreu não conta
+        (tmp_path / "999999999").touch()
+
+        await task.run()
+        assert task.ready is True
+        assert task.is_ready() is False
+
+        (tmp_path / str(os.getppid())).touch()
+        assert task.is_ready() is True
+
+        await task.stop()
+        assert not (tmp_path / str(os.getpid())).exists()